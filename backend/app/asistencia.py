@@ -0,0 +1,316 @@
+"""
+Serie semanal de asistencia sacramental por unidad (tabla asistencia_semanal).
+
+Una fila por (unidad, semana), la semana identificada por su domingo. La escriben el
+upload de TXT (la semana se indica al subir) y el refresco de LCR (cada semana del
+reporte). AsistenciaSacramental sigue guardando el total por periodo para el KPI.
+
+Las dos fuentes nombran distinto a la misma unidad ("Montevideo" en el TXT, "Montevideo
+14" en LCR): todo se guarda con el nombre canónico de UNIDADES_ASISTENCIA, para que una
+unidad tenga una sola serie y una semana cargada por las dos fuentes no se cuente dos veces.
+
+Los agregados salen de la base: media móvil con una función de ventana, trimestres con
+GROUP BY unidad, año, trimestre y ranking con AVG ... FILTER sobre el rango de semanas
+indexado (semana, unidad, valor). No se recorren los JSON de desglose ni de snapshots.
+"""
+import logging
+import unicodedata
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import case, delete, func, literal_column, not_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import importacion
+from .dataset_versions import bump
+from .lcr_snapshots import KIND_ASISTENCIA
+from .models import AsistenciaSemanal, LcrSnapshot
+
+VENTANA_MAX = 52
+SEMANAS_RANKING = 12
+
+# Unidades de la estaca: nombre canónico → número de unidad en LCR.
+UNIDADES_ASISTENCIA = {
+    'Bella Italia': 238619,
+    'Belloni': 204625,
+    'Libia': 181420,
+    'Los Ceibos': 209392,
+    'Montevideo 14': 97829,
+    'Pando': 219444,
+    'Toledo': 207462,
+}
+
+PREFIJOS_UNIDAD = ('barrio ', 'rama ', 'unidad ')
+
+
+def domingo(dia: date) -> date:
+    """Domingo de la semana de `dia` (las semanas de LCR empiezan en domingo)."""
+    return dia - timedelta(days=(dia.weekday() + 1) % 7)
+
+
+def _clave_unidad(nombre: str) -> str:
+    texto = unicodedata.normalize('NFKD', ' '.join(nombre.lower().split()))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    for prefijo in PREFIJOS_UNIDAD:
+        if texto.startswith(prefijo):
+            return texto[len(prefijo):]
+    return texto
+
+
+@lru_cache(maxsize=512)
+def unidad_canonica(nombre: str) -> str:
+    """
+    Nombre de UNIDADES_ASISTENCIA que corresponde a `nombre`: igual sin importar
+    mayúsculas, tildes ni "Barrio"/"Rama" delante, o el único canónico que empieza con
+    él ("Montevideo" → "Montevideo 14"). Si no hay uno solo, queda el nombre tal cual.
+    """
+    nombre = ' '.join(nombre.split())
+    clave = _clave_unidad(nombre)
+    canonicos = {_clave_unidad(c): c for c in UNIDADES_ASISTENCIA}
+    if clave in canonicos:
+        return canonicos[clave]
+    candidatos = [c for k, c in canonicos.items() if k.startswith(clave + ' ')]
+    return candidatos[0] if len(candidatos) == 1 else nombre
+
+
+def semanas_lcr(semanas: Dict[str, float]) -> Dict[date, float]:
+    """{"2026-01-04": 123.0, "#3": 80.0} → {date(2026, 1, 4): 123.0}; las claves sin fecha se descartan."""
+    resultado = {}
+    for clave, valor in (semanas or {}).items():
+        try:
+            resultado[domingo(date.fromisoformat(str(clave)[:10]))] = float(valor)
+        except ValueError:
+            continue
+    return resultado
+
+
+def guardar(session: Session, unidad: str, valores: Dict[date, float], fuente: str) -> int:
+    """
+    Reemplaza las semanas indicadas de la unidad (DELETE de esas semanas + INSERT), sin
+    commit. La unidad se guarda con su nombre canónico.
+    """
+    if not valores:
+        return 0
+    unidad = unidad_canonica(unidad)
+    table = AsistenciaSemanal.__table__
+    session.execute(delete(table).where(table.c.unidad == unidad, table.c.semana.in_(list(valores))))
+    return importacion.insertar(session, AsistenciaSemanal, [
+        {'unidad': unidad, 'semana': semana, 'valor': valor, 'fuente': fuente}
+        for semana, valor in sorted(valores.items())
+    ])
+
+
+def _validar_ventana(ventana: int) -> None:
+    if not 1 <= ventana <= VENTANA_MAX:
+        raise HTTPException(status_code=400, detail=f"Ventana inválida; entre 1 y {VENTANA_MAX} semanas")
+
+
+def _rango(consulta, columna, desde: Optional[date], hasta: Optional[date]):
+    if desde:
+        consulta = consulta.where(columna >= desde)
+    if hasta:
+        consulta = consulta.where(columna <= hasta)
+    return consulta
+
+
+async def media_movil(
+    session: AsyncSession,
+    ventana: int = 4,
+    unidad: Optional[str] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+) -> Dict:
+    """
+    Media móvil de las últimas `ventana` semanas con dato, por unidad y del total de la
+    estaca (suma de unidades por semana). AVG(valor) OVER (PARTITION BY unidad ORDER BY
+    semana ROWS ventana-1 PRECEDING); se leen `ventana`-1 semanas antes de `desde` para
+    que la primera media ya esté completa.
+    """
+    _validar_ventana(ventana)
+    m = AsistenciaSemanal
+    inicio = desde - timedelta(weeks=ventana - 1) if desde else None
+    filas = (m.unidad == unidad) if unidad else None
+
+    por_unidad = _rango(
+        select(
+            m.unidad, m.semana, m.valor,
+            func.avg(m.valor).over(partition_by=m.unidad, order_by=m.semana, rows=(-(ventana - 1), 0)),
+        ),
+        m.semana, inicio, hasta,
+    )
+    if filas is not None:
+        por_unidad = por_unidad.where(filas)
+    por_unidad = por_unidad.order_by(m.unidad, m.semana)
+
+    semanal = _rango(select(m.semana, func.sum(m.valor).label('valor')), m.semana, inicio, hasta)
+    if filas is not None:
+        semanal = semanal.where(filas)
+    semanal = semanal.group_by(m.semana).subquery()
+    total = select(
+        semanal.c.semana, semanal.c.valor,
+        func.avg(semanal.c.valor).over(order_by=semanal.c.semana, rows=(-(ventana - 1), 0)),
+    ).order_by(semanal.c.semana)
+
+    def _punto(semana, valor, media):
+        return {'semana': semana, 'valor': round(float(valor), 2), 'media': round(float(media), 2)}
+
+    unidades: Dict[str, List[Dict]] = {}
+    for nombre, semana, valor, media in (await session.execute(por_unidad)).all():
+        if desde is None or semana >= desde:
+            unidades.setdefault(nombre, []).append(_punto(semana, valor, media))
+
+    return {
+        'ventana': ventana,
+        'unidades': unidades,
+        'total': [
+            _punto(semana, valor, media)
+            for semana, valor, media in (await session.execute(total)).all()
+            if desde is None or semana >= desde
+        ],
+    }
+
+
+async def trimestres(session: AsyncSession, anio: int, meta: int) -> Dict:
+    """
+    Promedio semanal por unidad en cada trimestre del año (GROUP BY unidad, trimestre) y
+    el total de la estaca como suma de esos promedios, igual que el indicador de LCR.
+    """
+    m = AsistenciaSemanal
+    mes = func.extract('month', m.semana)
+    trimestre = case((mes <= 3, 1), (mes <= 6, 2), (mes <= 9, 3), else_=4).label('trimestre')
+    # GROUP BY por nombre de la columna de salida (ver recomendaciones.desglose: asyncpg)
+    rows = (await session.execute(
+        select(m.unidad, trimestre, func.avg(m.valor), func.count())
+        .where(m.semana >= date(anio, 1, 1), m.semana <= date(anio, 12, 31))
+        .group_by(m.unidad, literal_column('trimestre'))
+    )).all()
+
+    por_trimestre: Dict[int, List[Dict]] = {}
+    for unidad, numero, promedio, semanas in rows:
+        por_trimestre.setdefault(int(numero), []).append({
+            'unidad': unidad,
+            'promedio': round(float(promedio), 2),
+            'semanas': semanas,
+        })
+
+    serie = []
+    for numero in sorted(por_trimestre):
+        unidades = sorted(por_trimestre[numero], key=lambda u: u['unidad'])
+        total = round(sum(u['promedio'] for u in unidades), 2)
+        serie.append({
+            'trimestre': f'{anio}-Q{numero}',
+            'total': total,
+            'porcentaje': round((total / meta) * 100, 1) if meta > 0 else 0,
+            'unidades': unidades,
+        })
+    return {'anio': anio, 'meta': meta, 'trimestres': serie}
+
+
+async def ranking(
+    session: AsyncSession,
+    semanas: int = SEMANAS_RANKING,
+    hasta: Optional[date] = None,
+) -> Dict:
+    """
+    Unidades ordenadas por promedio de las últimas `semanas` semanas (hasta la última
+    cargada, o `hasta`), con la variación contra las `semanas` anteriores. Una sola
+    consulta GROUP BY unidad con AVG ... FILTER sobre el rango de 2 × semanas.
+    """
+    _validar_ventana(semanas)
+    m = AsistenciaSemanal
+    if hasta is None:
+        hasta = (await session.execute(select(func.max(m.semana)))).scalar()
+        if hasta is None:
+            return {'desde': None, 'hasta': None, 'semanas': semanas, 'unidades': []}
+    corte = hasta - timedelta(weeks=semanas)
+    actual = m.semana > corte
+
+    rows = (await session.execute(
+        select(
+            m.unidad,
+            func.avg(m.valor).filter(actual),
+            func.count().filter(actual),
+            func.min(m.valor).filter(actual),
+            func.max(m.valor).filter(actual),
+            func.avg(m.valor).filter(not_(actual)),
+        )
+        .where(m.semana > corte - timedelta(weeks=semanas), m.semana <= hasta)
+        .group_by(m.unidad)
+    )).all()
+
+    def _r(valor):
+        return round(float(valor), 2) if valor is not None else None
+
+    unidades = [
+        {
+            'unidad': unidad,
+            'promedio': _r(promedio),
+            'semanas': cantidad,
+            'minimo': _r(minimo),
+            'maximo': _r(maximo),
+            'promedio_anterior': _r(anterior),
+            'variacion': _r(promedio - anterior) if promedio is not None and anterior is not None else None,
+        }
+        for unidad, promedio, cantidad, minimo, maximo, anterior in rows
+        if promedio is not None
+    ]
+    unidades.sort(key=lambda u: (-u['promedio'], u['unidad']))
+    total = sum(u['promedio'] for u in unidades)
+    for posicion, u in enumerate(unidades, start=1):
+        u['posicion'] = posicion
+        u['participacion'] = round(u['promedio'] / total * 100, 1) if total else 0
+
+    return {'desde': corte + timedelta(days=1), 'hasta': hasta, 'semanas': semanas, 'unidades': unidades}
+
+
+def backfill_lcr(engine: Engine, unidades: Dict[int, str]) -> int:
+    """
+    Carga asistencia_semanal desde los snapshots de LCR guardados antes de que existiera
+    la tabla. Solo si la tabla está vacía; `unidades` = {unidad_id: nombre}.
+    """
+    table = AsistenciaSemanal.__table__
+    snapshots = LcrSnapshot.__table__
+    with engine.begin() as conn:
+        if conn.execute(select(table.c.id).limit(1)).first():
+            return 0
+        filas = []
+        for unidad_id, semanas in conn.execute(
+            select(snapshots.c.unidad_id, snapshots.c.semanas).where(snapshots.c.kind == KIND_ASISTENCIA)
+        ):
+            nombre = unidades.get(unidad_id)
+            if nombre:
+                filas += [
+                    {'unidad': nombre, 'semana': semana, 'valor': valor, 'fuente': 'lcr'}
+                    for semana, valor in semanas_lcr(semanas).items()
+                ]
+        for inicio in range(0, len(filas), importacion.LOTE_INSERT):
+            conn.execute(table.insert(), filas[inicio:inicio + importacion.LOTE_INSERT])
+        if filas:
+            bump(conn, [table.name])
+    return len(filas)
+
+
+def normalizar_unidades(engine: Engine) -> int:
+    """
+    Pasa al nombre canónico las filas guardadas con otro nombre de la misma unidad. Si
+    la semana ya existe con el nombre canónico, esa se conserva y la otra se borra.
+    """
+    table = AsistenciaSemanal.__table__
+    cambiadas = 0
+    with engine.begin() as conn:
+        nombres = [n for (n,) in conn.execute(select(table.c.unidad).distinct())]
+        for nombre in nombres:
+            canonico = unidad_canonica(nombre)
+            if canonico == nombre:
+                continue
+            repetidas = select(table.c.semana).where(table.c.unidad == canonico).scalar_subquery()
+            conn.execute(delete(table).where(table.c.unidad == nombre, table.c.semana.in_(repetidas)))
+            cambiadas += conn.execute(update(table).where(table.c.unidad == nombre).values(unidad=canonico)).rowcount
+        if cambiadas:
+            bump(conn, [table.name])
+            logging.info("[DB] asistencia_semanal: %s filas pasadas a nombre canónico", cambiadas)
+    return cambiadas
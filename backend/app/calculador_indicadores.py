@@ -1,12 +1,15 @@
 """
 Lógica de cálculo de indicadores KPI
+
+Los conteos se hacen con máscaras sobre el almacén columnar (columnar.ConversosFrame),
+que se arma una vez por versión de personas_conversos; solo las listas de salida
+(potenciales, reales, faltantes) vuelven a objetos Python.
 """
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 from datetime import date
 
-from .models import PersonaConverso, PeriodoKPI, IndicadorKPI
-from .normalizacion import es_elegible_ordenacion
+from .models import PeriodoKPI
 
 
 # === DEFINICIÓN DE INDICADORES ===
@@ -48,16 +51,9 @@ class CalculadorIndicadores:
         POTENCIAL = REAL (evento ya ocurrió)
         % AVANCE = (REAL / META) * 100
         """
-        query = self.db.query(PersonaConverso).filter(
-            PersonaConverso.fecha_confirmacion >= periodo.fecha_inicio,
-            PersonaConverso.fecha_confirmacion <= periodo.fecha_fin
-        )
-        
-        if unidad:
-            query = query.filter(PersonaConverso.unidad == unidad)
-        
-        personas = query.all()
-        real = len(personas)
+        frame = self._conversos()
+        idx = frame.periodo(periodo.fecha_inicio, periodo.fecha_fin, unidad).nonzero()[0]
+        real = len(idx)
         potencial = real
         meta = INDICADORES_CONFIG["bautismos_conversos"]["meta_anual"]
         
@@ -87,10 +83,10 @@ class CalculadorIndicadores:
             },
             "breakdown": {
                 "total_conversos": real,
-                "por_mes": self._breakdown_por_mes(personas, periodo)
+                "por_mes": self._breakdown_por_mes(frame, idx)
             },
-            "personas_ids": [p.id for p in personas],
-            "personas": [{"nombre": p.nombre_preferencia, "unidad": p.unidad or ''} for p in personas],
+            "personas_ids": frame.ids[idx].tolist(),
+            "personas": [{"nombre": p["nombre"], "unidad": p["unidad"] or ''} for p in self._personas(frame, idx)],
             "potenciales": [],
             "reales": [],
             "faltantes": [],  # No aplica para acumulativos
@@ -109,58 +105,19 @@ class CalculadorIndicadores:
         REAL = ELEGIBLES con recomendación en estado ACTIVA
         % = REAL / ELEGIBLES * 100
         """
-        query = self.db.query(PersonaConverso).filter(
-            PersonaConverso.fecha_confirmacion >= periodo.fecha_inicio,
-            PersonaConverso.fecha_confirmacion <= periodo.fecha_fin
-        )
-        
-        if unidad:
-            query = query.filter(PersonaConverso.unidad == unidad)
-        
-
-        todas_personas = query.all()
-
-        # Clasificar por elegibilidad (mayor de 11 años)
-        elegibles = {}
-        con_recomendacion = {}
-        sin_recomendacion = {}
-        no_elegibles = []
-        sin_clasificar = []
-        for persona in todas_personas:
-            edad_valor = persona.edad_al_confirmar
-            if edad_valor is not None and not isinstance(edad_valor, int):
-                try:
-                    edad_valor = int(str(edad_valor).strip())
-                except (ValueError, TypeError):
-                    edad_valor = None
-
-            # Regla de negocio para conversos:
-            # - potencial: edades > 11
-            # - edades <= 11 no son elegibles
-            if edad_valor is None:
-                es_elegible = None
-            else:
-                es_elegible = edad_valor > 11
-            if es_elegible is None:
-                sin_clasificar.append(persona)
-                continue
-
-            if es_elegible:
-                elegibles[persona.id] = persona
-                estado_raw = (persona.estado_recomendacion_raw or "").strip().lower()
-                tiene_estado = estado_raw not in ("", "nan", "none")
-                # REAL solo cuando el estado existe y es activo.
-                # Si no hay estado explícito, se considera sin recomendación.
-                if persona.tiene_recomendacion is True and tiene_estado:
-                    con_recomendacion[persona.id] = persona
-                else:
-                    sin_recomendacion[persona.id] = persona
-            else:
-                no_elegibles.append(persona)
+        frame = self._conversos()
+        en_periodo = frame.periodo(periodo.fecha_inicio, periodo.fecha_fin, unidad)
+        mascaras = self._mascaras_recomendacion(frame, en_periodo)
 
-        elegibles = list(elegibles.values())
-        con_recomendacion = list(con_recomendacion.values())
-        sin_recomendacion = list(sin_recomendacion.values())
+        # Regla de negocio para conversos:
+        # - potencial: edades > 11
+        # - edades <= 11 no son elegibles
+        # REAL solo cuando el estado existe y es activo (recomendacion_activa en el frame).
+        elegibles = mascaras["elegibles"].nonzero()[0]
+        con_recomendacion = mascaras["reales"].nonzero()[0]
+        sin_recomendacion = (mascaras["elegibles"] & ~mascaras["reales"]).nonzero()[0]
+        no_elegibles = int((en_periodo & frame.edad_conocida & ~mascaras["elegibles"]).sum())
+        sin_clasificar = int((en_periodo & ~frame.edad_conocida).sum())
         
         # Calcular resultados
         total_elegibles = len(elegibles)
@@ -171,11 +128,11 @@ class CalculadorIndicadores:
         
         # Preparar advertencias
         advertencias = []
-        if len(sin_clasificar) > 0:
+        if sin_clasificar > 0:
             advertencias.append({
                 "tipo": "datos_incompletos",
-                "mensaje": f"{len(sin_clasificar)} personas sin dato de edad",
-                "cantidad": len(sin_clasificar),
+                "mensaje": f"{sin_clasificar} personas sin dato de edad",
+                "cantidad": sin_clasificar,
                 "accion_sugerida": "enriquecer_datos"
             })
         if total_elegibles == 0:
@@ -205,19 +162,20 @@ class CalculadorIndicadores:
             },
             "breakdown": {
                 "elegibles": total_elegibles,
-                "no_elegibles": len(no_elegibles),
-                "sin_clasificar": len(sin_clasificar),
+                "no_elegibles": no_elegibles,
+                "sin_clasificar": sin_clasificar,
                 "con_recomendacion_activa": real,
                 "sin_recomendacion": len(sin_recomendacion)
             },
-            "potenciales": [{"nombre": p.nombre_preferencia, "unidad": p.unidad} for p in elegibles],
-            "reales": [{"nombre": p.nombre_preferencia, "unidad": p.unidad} for p in con_recomendacion],
+            "potenciales": self._personas(frame, elegibles),
+            "reales": self._personas(frame, con_recomendacion),
             "faltantes": self._preparar_faltantes(
+                frame,
                 sin_recomendacion,
                 "Sin recomendación activa"
             ),
-            "personas_ids": [p.id for p in elegibles],
-            "faltantes_ids": [p.id for p in sin_recomendacion],
+            "personas_ids": frame.ids[elegibles].tolist(),
+            "faltantes_ids": frame.ids[sin_recomendacion].tolist(),
             "advertencias": advertencias
         }
     
@@ -233,41 +191,17 @@ class CalculadorIndicadores:
         REAL = ELEGIBLES ordenados (con sacerdocio)
         % = REAL / ELEGIBLES * 100
         """
-        query = self.db.query(PersonaConverso).filter(
-            PersonaConverso.fecha_confirmacion >= periodo.fecha_inicio,
-            PersonaConverso.fecha_confirmacion <= periodo.fecha_fin
-        )
-        
-        if unidad:
-            query = query.filter(PersonaConverso.unidad == unidad)
-        
-        todas_personas = query.all()
-        
-        # Clasificar por elegibilidad (varones mayores de 12 años)
-        elegibles = {}
-        ordenados = {}
-        sin_ordenar = {}
-        no_elegibles = []
-        sin_clasificar = []
-        for persona in todas_personas:
-            # Es varón si sexo = 'M' explícito
-            es_varon = (persona.sexo is not None and persona.sexo.upper() == 'M')
-            # Si no hay sexo, mirar sacerdocio_normalizado (solo valores explícitos son indicador de varón)
-            # 'no_ordenado' solo aparece cuando el archivo dice "No ha sido ordenado" (nunca para null/vacío)
-            if not es_varon and persona.sacerdocio_normalizado in ['aaronico', 'melquisedec', 'no_ordenado']:
-                es_varon = True
-            if es_varon:
-                elegibles[persona.id] = persona
-                if persona.esta_ordenado is True:
-                    ordenados[persona.id] = persona
-                else:
-                    sin_ordenar[persona.id] = persona
-            else:
-                no_elegibles.append(persona)
+        frame = self._conversos()
+        en_periodo = frame.periodo(periodo.fecha_inicio, periodo.fecha_fin, unidad)
+        mascaras = self._mascaras_ordenados(frame, en_periodo)
 
-        elegibles = list(elegibles.values())
-        ordenados = list(ordenados.values())
-        sin_ordenar = list(sin_ordenar.values())
+        # Elegibles = varones: sexo 'M' explícito, o sacerdocio_normalizado con valor
+        # explícito ('no_ordenado' solo aparece cuando el archivo dice "No ha sido ordenado").
+        elegibles = mascaras["elegibles"].nonzero()[0]
+        ordenados = mascaras["reales"].nonzero()[0]
+        sin_ordenar = (mascaras["elegibles"] & ~mascaras["reales"]).nonzero()[0]
+        no_elegibles = int((en_periodo & ~mascaras["elegibles"]).sum())
+        sin_clasificar = 0
         
         # Calcular resultados
         total_elegibles = len(elegibles)
@@ -278,11 +212,11 @@ class CalculadorIndicadores:
         
         # Preparar advertencias
         advertencias = []
-        if len(sin_clasificar) > 0:
+        if sin_clasificar > 0:
             advertencias.append({
                 "tipo": "datos_incompletos",
-                "mensaje": f"{len(sin_clasificar)} personas sin dato de sexo o edad",
-                "cantidad": len(sin_clasificar),
+                "mensaje": f"{sin_clasificar} personas sin dato de sexo o edad",
+                "cantidad": sin_clasificar,
                 "accion_sugerida": "enriquecer_datos"
             })
         if total_elegibles == 0:
@@ -311,20 +245,21 @@ class CalculadorIndicadores:
             },
             "breakdown": {
                 "elegibles": total_elegibles,
-                "no_elegibles": len(no_elegibles),
-                "sin_clasificar": len(sin_clasificar),
+                "no_elegibles": no_elegibles,
+                "sin_clasificar": sin_clasificar,
                 "varones_ordenados": real,
                 "varones_sin_ordenar": len(sin_ordenar),
-                "mujeres": len(no_elegibles)
+                "mujeres": no_elegibles
             },
-            "potenciales": [{"nombre": p.nombre_preferencia, "unidad": p.unidad} for p in elegibles],
-            "reales": [{"nombre": p.nombre_preferencia, "unidad": p.unidad} for p in ordenados],
+            "potenciales": self._personas(frame, elegibles),
+            "reales": self._personas(frame, ordenados),
             "faltantes": self._preparar_faltantes(
+                frame,
                 sin_ordenar,
                 "No ordenado"
             ),
-            "personas_ids": [p.id for p in elegibles],
-            "faltantes_ids": [p.id for p in sin_ordenar],
+            "personas_ids": frame.ids[elegibles].tolist(),
+            "faltantes_ids": frame.ids[sin_ordenar].tolist(),
             "advertencias": advertencias
         }
     
@@ -356,22 +291,20 @@ class CalculadorIndicadores:
             PeriodoKPI.tipo == "mes"
         ).order_by(PeriodoKPI.fecha_inicio).all()
         
+        if indicador_key not in INDICADORES_CONFIG:
+            return []
+
+        # Solo conteos: no hace falta armar las listas de personas de cada mes
+        frame = self._conversos()
         tendencia = []
         for periodo in periodos:
-            if indicador_key == "bautismos_conversos":
-                resultado = self.calcular_bautismos_conversos(periodo, unidad)
-            elif indicador_key == "conversos_recomendacion":
-                resultado = self.calcular_conversos_recomendacion(periodo, unidad)
-            elif indicador_key == "conversos_ordenados":
-                resultado = self.calcular_conversos_ordenados(periodo, unidad)
-            else:
-                continue
-            
+            en_periodo = frame.periodo(periodo.fecha_inicio, periodo.fecha_fin, unidad)
+            real, potencial, porcentaje = self._conteos(indicador_key, frame, en_periodo)
             tendencia.append({
                 "periodo": periodo.nombre,
-                "real": resultado["resumen"]["real"],
-                "potencial": resultado["resumen"]["potencial"],
-                "porcentaje": resultado["resumen"].get("porcentaje")
+                "real": real,
+                "potencial": potencial,
+                "porcentaje": porcentaje
             })
         
         return tendencia
@@ -384,34 +317,58 @@ class CalculadorIndicadores:
         """
         Calcula breakdown por unidad
         """
-        # Obtener todas las unidades del periodo
-        unidades = self.db.query(PersonaConverso.unidad).filter(
-            PersonaConverso.fecha_confirmacion >= periodo.fecha_inicio,
-            PersonaConverso.fecha_confirmacion <= periodo.fecha_fin,
-            PersonaConverso.unidad.isnot(None)
-        ).distinct().all()
-        
+        if indicador_key not in INDICADORES_CONFIG:
+            return []
+
+        # Unidades con confirmados en el periodo, contadas todas juntas por código de unidad
+        frame = self._conversos()
+        en_periodo = frame.periodo(periodo.fecha_inicio, periodo.fecha_fin)
+        presentes = frame.por_unidad(en_periodo).nonzero()[0]
+
         breakdown = []
-        for (unidad,) in unidades:
-            if indicador_key == "bautismos_conversos":
-                resultado = self.calcular_bautismos_conversos(periodo, unidad)
-            elif indicador_key == "conversos_recomendacion":
-                resultado = self.calcular_conversos_recomendacion(periodo, unidad)
-            elif indicador_key == "conversos_ordenados":
-                resultado = self.calcular_conversos_ordenados(periodo, unidad)
-            else:
-                continue
-            
+        for code in presentes:
+            real, potencial, porcentaje = self._conteos(indicador_key, frame, en_periodo & (frame.unidad == code))
             breakdown.append({
-                "unidad": unidad,
-                "real": resultado["resumen"]["real"],
-                "potencial": resultado["resumen"]["potencial"],
-                "porcentaje": resultado["resumen"].get("porcentaje")
+                "unidad": frame.unidades[code],
+                "real": real,
+                "potencial": potencial,
+                "porcentaje": porcentaje
             })
         
         return sorted(breakdown, key=lambda x: x["real"], reverse=True)
     
     # === HELPERS ===
+
+    def _conversos(self):
+        from . import columnar
+        return columnar.conversos(self.db)
+
+    def _mascaras_recomendacion(self, frame, en_periodo) -> Dict:
+        elegibles = en_periodo & frame.edad_conocida & (frame.edad > 11)
+        return {"elegibles": elegibles, "reales": elegibles & frame.recomendacion_activa}
+
+    def _mascaras_ordenados(self, frame, en_periodo) -> Dict:
+        elegibles = en_periodo & frame.varon
+        return {"elegibles": elegibles, "reales": elegibles & frame.ordenado}
+
+    def _conteos(self, indicador_key: str, frame, en_periodo) -> tuple:
+        """(real, potencial, porcentaje) de un indicador, igual que el resumen de calcular_*"""
+        if indicador_key == "bautismos_conversos":
+            real = int(en_periodo.sum())
+            return real, real, None
+        if indicador_key == "conversos_recomendacion":
+            mascaras = self._mascaras_recomendacion(frame, en_periodo)
+        else:
+            mascaras = self._mascaras_ordenados(frame, en_periodo)
+        potencial = int(mascaras["elegibles"].sum())
+        real = int(mascaras["reales"].sum())
+        return real, potencial, (real / potencial * 100) if potencial > 0 else 0
+
+    def _personas(self, frame, idx) -> List[Dict]:
+        return [
+            {"nombre": nombre, "unidad": unidad}
+            for nombre, unidad in zip(frame.nombres[idx].tolist(), frame.unidad_de(idx))
+        ]
     
     def _calcular_semaforo(self, porcentaje: float, tipo: str = "porcentaje") -> str:
         """
@@ -428,39 +385,34 @@ class CalculadorIndicadores:
         else:
             return "rojo"
     
-    def _preparar_faltantes(self, personas: List[PersonaConverso], razon: str) -> List[Dict]:
+    def _preparar_faltantes(self, frame, idx, razon: str) -> List[Dict]:
         """
         Prepara lista de personas faltantes para el detalle
         """
-        from datetime import datetime
+        hoy = date.today().toordinal()
+        ordinales = frame.fecha[idx].tolist()
         
         faltantes = []
-        for persona in personas:
-            dias_desde = None
-            if persona.fecha_confirmacion:
-                dias_desde = (datetime.now().date() - persona.fecha_confirmacion).days
-            
+        for id_, nombre, unidad, fecha, ordinal in zip(
+            frame.ids[idx].tolist(), frame.nombres[idx].tolist(), frame.unidad_de(idx), frame.fechas_de(idx), ordinales
+        ):
             faltantes.append({
-                "id": persona.id,
-                "nombre": persona.nombre_preferencia,
-                "unidad": persona.unidad,
+                "id": id_,
+                "nombre": nombre,
+                "unidad": unidad,
                 "estado_actual": razon,
-                "fecha_confirmacion": persona.fecha_confirmacion,
-                "dias_desde_confirmacion": dias_desde
+                "fecha_confirmacion": fecha,
+                "dias_desde_confirmacion": hoy - ordinal if ordinal else None
             })
         
         return faltantes
     
-    def _breakdown_por_mes(self, personas: List[PersonaConverso], periodo: PeriodoKPI) -> Dict:
+    def _breakdown_por_mes(self, frame, idx) -> Dict:
         """
         Agrupa personas por mes dentro del periodo
         """
-        from collections import defaultdict
-        
-        por_mes = defaultdict(int)
-        for persona in personas:
-            if persona.fecha_confirmacion:
-                mes = persona.fecha_confirmacion.strftime('%Y-%m')
-                por_mes[mes] += 1
-        
-        return dict(por_mes)
+        import numpy as np
+
+        meses = frame.mes[idx]
+        claves, cantidades = np.unique(meses[meses > 0], return_counts=True)
+        return {f"{clave // 100:04d}-{clave % 100:02d}": int(n) for clave, n in zip(claves.tolist(), cantidades)}
@@ -0,0 +1,159 @@
+"""
+Almacén columnar en memoria para el cálculo de KPIs.
+
+En vez de hidratar miles de objetos del ORM en cada cálculo, se lee una sola vez por
+versión de datos (ver dataset_versions) solo las columnas que usan los indicadores y se
+guardan como arrays NumPy:
+
+- fechas como int32 (date.toordinal, 0 = sin fecha) → filtros de periodo con máscaras,
+- unidad como código categórico (int16, -1 = vacío),
+- banderas booleanas ya resueltas (varón, ordenado, recomendación activa, ...),
+- ids / nombres como arrays de objetos (solo se tocan al armar las listas de salida).
+
+Cada proceso tiene su copia; se reconstruye cuando cambia la versión de la tabla.
+Se importa de forma perezosa (numpy no se carga al arrancar la app).
+"""
+import threading
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import DatasetVersion, PersonaConverso
+
+SEXO_VARON_SACERDOCIO = ('aaronico', 'melquisedec', 'no_ordenado')
+ESTADOS_SIN_DATO = ('', 'nan', 'none')
+
+_lock = threading.Lock()
+_cache: Dict[str, tuple] = {}
+
+
+def _categorize(values: list):
+    """Códigos int16 y lista de categorías; None/'' → -1."""
+    categories: Dict[str, int] = {}
+    codes = np.empty(len(values), dtype=np.int16)
+    for i, value in enumerate(values):
+        if value is None or value == '':
+            codes[i] = -1
+        else:
+            codes[i] = categories.setdefault(value, len(categories))
+    return codes, list(categories)
+
+
+def _objects(values: list) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+class ConversosFrame:
+    """Columnas de personas_conversos que usa CalculadorIndicadores."""
+
+    def __init__(self, rows: list):
+        n = len(rows)
+        self.size = n
+        self.ids = _objects([r.id for r in rows])
+        self.nombres = _objects([r.nombre_preferencia for r in rows])
+        self.unidad, self.unidades = _categorize([r.unidad for r in rows])
+        self.fecha = np.fromiter(
+            (r.fecha_confirmacion.toordinal() if r.fecha_confirmacion else 0 for r in rows), dtype=np.int32, count=n,
+        )
+        # año*100 + mes, para agrupar por mes sin volver a date
+        self.mes = np.fromiter(
+            (f.year * 100 + f.month if f else 0 for f in (r.fecha_confirmacion for r in rows)), dtype=np.int32, count=n,
+        )
+        edades = [_edad(r.edad_al_confirmar) for r in rows]
+        self.edad_conocida = np.fromiter((e is not None for e in edades), dtype=bool, count=n)
+        self.edad = np.fromiter((e if e is not None else -1 for e in edades), dtype=np.int16, count=n)
+        self.varon = np.fromiter(
+            (
+                (r.sexo is not None and r.sexo.upper() == 'M') or r.sacerdocio_normalizado in SEXO_VARON_SACERDOCIO
+                for r in rows
+            ),
+            dtype=bool, count=n,
+        )
+        self.ordenado = np.fromiter((r.esta_ordenado is True for r in rows), dtype=bool, count=n)
+        self.recomendacion_activa = np.fromiter(
+            (
+                r.tiene_recomendacion is True
+                and (r.estado_recomendacion_raw or '').strip().lower() not in ESTADOS_SIN_DATO
+                for r in rows
+            ),
+            dtype=bool, count=n,
+        )
+
+    def periodo(self, fecha_inicio: date, fecha_fin: date, unidad: Optional[str] = None) -> np.ndarray:
+        """Máscara de confirmados en el periodo (y unidad, si se pide)."""
+        mask = (self.fecha >= fecha_inicio.toordinal()) & (self.fecha <= fecha_fin.toordinal())
+        if unidad:
+            code = self.unidades.index(unidad) if unidad in self.unidades else -2
+            mask &= self.unidad == code
+        return mask
+
+    def unidad_de(self, idx: np.ndarray) -> list:
+        return [self.unidades[c] if c >= 0 else None for c in self.unidad[idx]]
+
+    def fechas_de(self, idx: np.ndarray) -> list:
+        return [date.fromordinal(int(o)) if o else None for o in self.fecha[idx]]
+
+    def por_unidad(self, mask: np.ndarray) -> np.ndarray:
+        """Cantidad de filas de la máscara por código de unidad (sin la unidad vacía)."""
+        codes = self.unidad[mask]
+        return np.bincount(codes[codes >= 0], minlength=len(self.unidades))
+
+    def nbytes(self) -> int:
+        arrays = (self.unidad, self.fecha, self.mes, self.edad_conocida, self.edad, self.varon, self.ordenado, self.recomendacion_activa)
+        return sum(a.nbytes for a in arrays) + self.ids.nbytes + self.nombres.nbytes
+
+
+def _edad(value) -> Optional[int]:
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(str(value).strip())
+    except (ValueError, TypeError):
+        return None
+
+
+_SOURCES = {
+    PersonaConverso.__tablename__: (
+        ConversosFrame,
+        select(
+            PersonaConverso.id, PersonaConverso.nombre_preferencia, PersonaConverso.unidad,
+            PersonaConverso.fecha_confirmacion, PersonaConverso.edad_al_confirmar, PersonaConverso.sexo,
+            PersonaConverso.sacerdocio_normalizado, PersonaConverso.esta_ordenado,
+            PersonaConverso.tiene_recomendacion, PersonaConverso.estado_recomendacion_raw,
+        ),
+    ),
+}
+
+
+def frame(session: Session, table: str):
+    """Frame de la tabla para la versión de datos actual (construido una vez por versión)."""
+    cls, query = _SOURCES[table]
+    # Cambios sin confirmar en esta sesión: armar sin cachear (podrían deshacerse).
+    if table in session.info.get('dataset_versions_bumped', ()):
+        return cls(session.execute(query).all())
+
+    version = session.execute(select(DatasetVersion.version).where(DatasetVersion.name == table)).scalar() or 0
+    cached = _cache.get(table)
+    if cached and cached[0] == version:
+        return cached[1]
+    with _lock:
+        cached = _cache.get(table)
+        if cached and cached[0] == version:
+            return cached[1]
+        built = cls(session.execute(query).all())
+        _cache[table] = (version, built)
+        return built
+
+
+def conversos(session: Session) -> ConversosFrame:
+    return frame(session, PersonaConverso.__tablename__)
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,120 @@
+"""
+Versiones de datos y GET condicional (ETag / If-None-Match).
+
+Cada tabla tiene un contador en dataset_versions que se incrementa solo, desde los
+eventos de la sesión del ORM, cuando una transacción inserta, modifica o borra filas
+(incluye query(...).delete() / update() masivos e insert() ejecutados con
+session.execute). Los endpoints de lectura declaran de
+qué tablas dependen y el ETag se arma con esas versiones más la URL, así un
+If-None-Match que coincide se responde 304 con una sola consulta chica, sin recalcular.
+
+Las escrituras con SQL crudo, Core directo sobre el engine o bulk_save_objects no
+cuentan; si se agregan, llamar a bump() en la misma transacción (o bump_once() si van
+por la sesión).
+"""
+import hashlib
+from typing import Callable, Iterable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import bindparam, event, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import Base, DatasetVersion
+
+CACHE_CONTROL = 'private, no-cache'
+
+_table = DatasetVersion.__table__
+_bump_stmt = (
+    update(_table)
+    .where(_table.c.name == bindparam('table_name'))
+    .values(version=_table.c.version + 1)
+)
+
+
+def ensure_versions(engine: Engine) -> None:
+    """Crea la fila (versión 0) de cada tabla que todavía no la tenga."""
+    names = [t.name for t in Base.metadata.sorted_tables if t.name != _table.name]
+    with engine.begin() as conn:
+        existing = {row.name for row in conn.execute(select(_table.c.name))}
+        missing = [{'name': name, 'version': 0} for name in names if name not in existing]
+        if missing:
+            conn.execute(_table.insert(), missing)
+
+
+def bump(connection, tables: Iterable[str]) -> None:
+    connection.execute(_bump_stmt, [{'table_name': name} for name in tables])
+
+
+def bump_once(session: Session, tables: set) -> None:
+    """Una sola vez por tabla y transacción, para no contender por la fila en cada flush."""
+    done = session.info.setdefault('dataset_versions_bumped', set())
+    pending = {t for t in tables if t and t not in done and t != _table.name}
+    if pending:
+        bump(session.connection(), sorted(pending))
+        done.update(pending)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    tables = set()
+    for obj in list(session.new) + list(session.deleted):
+        tables.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tables.add(obj.__table__.name)
+    bump_once(session, tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            bump_once(orm_execute_state.session, {table.name})
+
+
+def _reset(session, *args):
+    session.info.pop('dataset_versions_bumped', None)
+
+
+event.listen(Session, 'after_commit', _reset)
+event.listen(Session, 'after_soft_rollback', _reset)
+
+
+# ── GET condicional ───────────────────────────────────────────────────────────
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+def conditional_get(*tables: str, extra: Optional[Callable[[], str]] = None):
+    """
+    Dependencia para endpoints de lectura: agrega ETag y Cache-Control a la respuesta
+    y corta con 304 si el cliente ya tiene esa versión. `extra` suma al ETag algo que
+    cambia la respuesta sin tocar las tablas (p.ej. la fecha de hoy).
+    """
+    async def dependency(
+        request: Request,
+        response: Response,
+        session: AsyncSession = Depends(db.get_async_db),
+    ):
+        rows = (await session.execute(
+            select(_table.c.name, _table.c.version).where(_table.c.name.in_(tables))
+        )).all()
+        versions = dict(rows)
+        key = '|'.join([request.url.path, request.url.query, *(f'{t}:{versions.get(t, 0)}' for t in tables)])
+        if extra is not None:
+            key += '|' + extra()
+        etag = '"%s"' % hashlib.sha1(key.encode('utf-8')).hexdigest()[:24]
+        headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+        if _matches(request.headers.get('if-none-match'), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(dependency)
@@ -1,7 +1,14 @@
+import logging
 import os
-from sqlalchemy import create_engine
+import re
+import threading
+import time
+from collections import deque
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
 
 
 def _is_truthy(value: str | None) -> bool:
@@ -74,6 +81,194 @@ def _mask_database_url(url: str) -> str:
     return f"{scheme}://{user}:***@{host}"
 
 
+# Perfil de SQLite: WAL deja leer mientras otro proceso escribe (import de reportes).
+# Cada valor se puede cambiar con la variable SQLITE_<NOMBRE> (ej. SQLITE_MMAP_SIZE=0).
+# cache_size es por conexión: con el pool por defecto (2 + 3 de overflow) son hasta
+# 5 x 16 MB = 80 MB por worker. El mmap son páginas del archivo que comparte el SO.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": "268435456",   # 256 MB
+    "cache_size": "-16384",     # negativo = KiB → 16 MB por conexión
+    "busy_timeout": "15000",    # ms
+    "temp_store": "MEMORY",
+}
+SQLITE_WRITE_LOCK_TIMEOUT = float(os.getenv("SQLITE_WRITE_LOCK_TIMEOUT", "30"))
+
+_WRITE_STATEMENT = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+_LOCK_KEY = "sqlite_write_lock"
+
+
+def _sqlite_pragmas() -> dict[str, str]:
+    return {name: os.getenv(f"SQLITE_{name.upper()}", default) for name, default in SQLITE_PRAGMAS.items()}
+
+
+def configure_sqlite_engine(target: Engine, serialize_writes: bool = True) -> Engine:
+    """
+    Aplica el perfil de SQLite a cada conexión nueva y serializa las escrituras del proceso.
+
+    SQLite admite un solo escritor: en vez de que dos imports choquen con
+    "database is locked", el segundo espera su turno. El turno se toma en la primera
+    sentencia de escritura de la transacción y se libera en commit/rollback (o al devolver
+    la conexión al pool). Las lecturas nunca esperan.
+    """
+    pragmas = _sqlite_pragmas()
+    write_lock = threading.Lock()
+
+    @event.listens_for(target, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if value:
+                    cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    if not serialize_writes:
+        return target
+
+    def _release(info):
+        if info.pop(_LOCK_KEY, False):
+            write_lock.release()
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _acquire_for_write(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get(_LOCK_KEY) or not _WRITE_STATEMENT.match(statement):
+            return
+        if write_lock.acquire(timeout=SQLITE_WRITE_LOCK_TIMEOUT):
+            conn.info[_LOCK_KEY] = True
+        else:
+            # Sin turno seguimos igual; queda el busy_timeout de SQLite como respaldo.
+            logging.warning("[DB] Esperando escritura SQLite más de %ss", SQLITE_WRITE_LOCK_TIMEOUT)
+
+    @event.listens_for(target, "commit")
+    def _release_on_commit(conn):
+        _release(conn.info)
+
+    @event.listens_for(target, "rollback")
+    def _release_on_rollback(conn):
+        _release(conn.info)
+
+    @event.listens_for(target.pool, "checkin")
+    def _release_on_checkin(dbapi_connection, connection_record):
+        _release(connection_record.info)
+
+    return target
+
+
+class _PoolStats:
+    """Contadores de checkout del pool (tiempo de espera + conexión nueva si hizo falta)."""
+
+    def __init__(self, window: int = 2000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def record_wait(self, elapsed_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self._waits.append(elapsed_ms)
+            self.total_wait_ms += elapsed_ms
+            self.max_wait_ms = max(self.max_wait_ms, elapsed_ms)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts, timeouts, connects = self.checkouts, self.timeouts, self.connects
+            total, max_wait = self.total_wait_ms, self.max_wait_ms
+
+        def pct(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p / 100 * len(waits)))], 3)
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "conexiones_nuevas": connects,
+            "espera_ms": {
+                "promedio": round(total / checkouts, 3) if checkouts else 0.0,
+                "p50": pct(50),
+                "p95": pct(95),
+                "p99": pct(99),
+                "max": round(max_wait, 3),
+            },
+        }
+
+
+pool_stats_collector = _PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide cuánto tarda cada checkout (espera en cola o conexión nueva)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats_collector.record_wait((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        pool_stats_collector.record_wait((time.perf_counter() - started) * 1000)
+        return conn
+
+
+def _int_env(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+
+def _postgres_engine_options() -> dict:
+    """
+    Opciones del engine de Postgres según el entorno.
+
+    Neon cobra cada conexión nueva (TLS + arranque del compute), así que se mantiene un
+    pool chico de conexiones vivas y se reciclan antes de que el servidor las corte.
+    Con DB_PGBOUNCER=true (endpoint "-pooler" de Neon o un PgBouncer propio) el pooling
+    lo hace el bouncer: NullPool y sin pre_ping.
+    """
+    connect_args = {
+        "application_name": os.getenv("DB_APPLICATION_NAME", "dashboard-backend"),
+        "connect_timeout": _int_env("DB_CONNECT_TIMEOUT", 10),
+        "keepalives": 1,
+        "keepalives_idle": 30,
+        "keepalives_interval": 10,
+        "keepalives_count": 3,
+    }
+    options = {
+        "echo": False,
+        "connect_args": connect_args,
+        # Caché de SQL compilado de SQLAlchemy: las consultas de KPIs se compilan una sola vez.
+        "query_cache_size": _int_env("DB_QUERY_CACHE_SIZE", 1200),
+    }
+    if _is_truthy(os.getenv("DB_PGBOUNCER")):
+        options["poolclass"] = NullPool
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=_int_env("DB_POOL_SIZE", 5),
+        max_overflow=_int_env("DB_MAX_OVERFLOW", 10),
+        pool_timeout=_int_env("DB_POOL_TIMEOUT", 30),
+        pool_recycle=_int_env("DB_POOL_RECYCLE", 300),
+        pool_pre_ping=not _is_falsey(os.getenv("DB_POOL_PRE_PING")),
+        pool_use_lifo=True,  # reusar la conexión más reciente deja que las ociosas expiren
+    )
+    return options
+
+
 DATABASE_URL = _normalize_database_url(os.getenv("DATABASE_URL", _default_database_url()))
 
 # SQLite necesita check_same_thread=False para funcionar con FastAPI (async/multihilo)
@@ -95,14 +290,27 @@ if DATABASE_URL.startswith("sqlite"):
     else:
         # Para archivo en disco, usar pool normal evita comportamientos inesperados
         # con una única conexión global y mantiene mejor estabilidad en producción.
-        engine = create_engine(
+        # QueuePool explícito: SQLAlchemy 1.4 usa NullPool para SQLite en archivo y cada
+        # sesión abría una conexión nueva (PRAGMAs otra vez, caché de páginas y mmap perdidos).
+        # Pool chico: WAL lee en paralelo pero escribe de a uno, y cada conexión suma su
+        # cache_size a la memoria del worker (ver SQLITE_PRAGMAS).
+        # Sin pool_pre_ping: un archivo local no "se cae" y el ping era un round trip por checkout.
+        engine = configure_sqlite_engine(create_engine(
             DATABASE_URL,
             connect_args=sqlite_connect_args,
+            poolclass=InstrumentedQueuePool,
+            pool_size=_int_env("SQLITE_POOL_SIZE", 2),
+            max_overflow=_int_env("SQLITE_MAX_OVERFLOW", 3),
+            pool_timeout=_int_env("DB_POOL_TIMEOUT", 30),
+            pool_use_lifo=True,
             echo=False,
-            pool_pre_ping=True,
-        )
+        ))
 else:
-    engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
+    engine = create_engine(DATABASE_URL, **_postgres_engine_options())
+
+    @event.listens_for(engine, "connect")
+    def _count_connect(dbapi_connection, connection_record):
+        pool_stats_collector.record_connect()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -154,9 +362,105 @@ def db_runtime_diagnostics() -> dict[str, str | bool]:
 _validate_db_configuration()
 
 
+def pool_stats() -> dict:
+    """Estado del pool y tiempos de checkout, para /health/db."""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            tamano=pool.size(),
+            en_uso=pool.checkedout(),
+            libres=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    stats.update(pool_stats_collector.snapshot())
+    return stats
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# === Acceso async (endpoints de solo lectura) ===
+# Mismo DATABASE_URL con driver async: asyncpg para Postgres, aiosqlite para SQLite.
+# Se crea al primer uso para que los procesos que no lo necesitan (celery, scripts)
+# no dependan de esos drivers.
+
+_async_engine = None
+_async_session_factory = None
+_async_lock = threading.Lock()
+
+
+def _async_database_url(url: str) -> tuple[str, dict]:
+    """Traduce la URL sync a su variante async y devuelve (url, connect_args)."""
+    from sqlalchemy.engine import make_url
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return str(parsed.set(drivername="sqlite+aiosqlite")), {}
+
+    # asyncpg no entiende los parámetros libpq de la URL (sslmode, channel_binding...)
+    query = dict(parsed.query)
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+    connect_args = {
+        "server_settings": {"application_name": os.getenv("DB_APPLICATION_NAME", "dashboard-backend")},
+        "timeout": _int_env("DB_CONNECT_TIMEOUT", 10),
+    }
+    if sslmode and sslmode not in ("disable", "allow", "prefer"):
+        connect_args["ssl"] = "require"
+    async_url = parsed.set(drivername="postgresql+asyncpg", query=query)
+    return async_url.render_as_string(hide_password=False), connect_args
+
+
+def get_async_engine():
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        with _async_lock:
+            if _async_engine is None:
+                from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+                url, connect_args = _async_database_url(DATABASE_URL)
+                if url.startswith("sqlite"):
+                    options = {"connect_args": connect_args}
+                    if url.endswith(":memory:"):
+                        options["poolclass"] = StaticPool
+                elif _is_truthy(os.getenv("DB_PGBOUNCER")):
+                    # PgBouncer en modo transacción no soporta el caché de prepared statements de asyncpg.
+                    connect_args["statement_cache_size"] = 0
+                    options = {"connect_args": connect_args, "poolclass": NullPool}
+                else:
+                    options = {
+                        "connect_args": connect_args,
+                        "pool_size": _int_env("DB_ASYNC_POOL_SIZE", _int_env("DB_POOL_SIZE", 5)),
+                        "max_overflow": _int_env("DB_MAX_OVERFLOW", 10),
+                        "pool_timeout": _int_env("DB_POOL_TIMEOUT", 30),
+                        "pool_recycle": _int_env("DB_POOL_RECYCLE", 300),
+                        "pool_pre_ping": not _is_falsey(os.getenv("DB_POOL_PRE_PING")),
+                    }
+                engine_async = create_async_engine(url, echo=False, **options)
+                if url.startswith("sqlite"):
+                    configure_sqlite_engine(engine_async.sync_engine, serialize_writes=False)
+                _async_session_factory = sessionmaker(
+                    engine_async, class_=AsyncSession, expire_on_commit=False, autoflush=False
+                )
+                _async_engine = engine_async
+    return _async_engine
+
+
+def reset_async_engine() -> None:
+    """Olvida el engine async (después de un fork se crea uno nuevo en el worker)."""
+    global _async_engine, _async_session_factory
+    with _async_lock:
+        _async_engine = None
+        _async_session_factory = None
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _async_session_factory() as session:
+        yield session
@@ -0,0 +1,132 @@
+"""
+Histórico de cargas de jóvenes, adultos y misioneros.
+
+Cada upload reemplaza la tabla de personas, así que en la misma transacción se guarda
+un rollup append-only: una fila en historico_cargas (total y real del momento) y una
+por (unidad, estado) en historico_conteos. No se copian las listas de personas.
+
+Las series de tiempo leen solo esas tablas: la serie del estaca sale de
+historico_cargas; por unidad o por estado, de historico_conteos (decenas de filas por carga).
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import AdultoRecomendacion, HistoricoCarga, HistoricoConteo, JovenRecomendacion, MisioneroCampo
+
+ESTADO_SIN_EST = 'sin_estado'
+ESTADOS_REALES_RECOMENDACION = ('activa', 'vence_pronto')
+LIMITE_CARGAS = 500
+
+
+def _estado_misionero(es_servicio) -> str:
+    return 'servicio' if es_servicio else 'campo'
+
+
+# dataset → (columna unidad, columna estado, estado en el rollup, estados que cuentan como real)
+DATASETS = {
+    'jovenes': (
+        JovenRecomendacion.unidad, JovenRecomendacion.estado_normalizado,
+        lambda estado: estado or ESTADO_SIN_EST, ESTADOS_REALES_RECOMENDACION,
+    ),
+    'adultos': (
+        AdultoRecomendacion.unidad, AdultoRecomendacion.estado_normalizado,
+        lambda estado: estado or ESTADO_SIN_EST, ESTADOS_REALES_RECOMENDACION,
+    ),
+    'misioneros': (
+        MisioneroCampo.unidad_actual, MisioneroCampo.es_mision_servicio,
+        _estado_misionero, ('campo',),
+    ),
+}
+
+
+def registrar(session: Session, dataset: str, archivo_fuente_id: Optional[str] = None) -> HistoricoCarga:
+    """
+    Agrega la carga al histórico a partir de lo que quedó en la tabla (llamar después de
+    insertar las filas nuevas y antes del commit del upload).
+    """
+    unidad_col, estado_col, estado_de, reales = DATASETS[dataset]
+    session.flush()
+    conteos: Dict[tuple, int] = {}
+    for unidad, estado, cantidad in session.query(unidad_col, estado_col, func.count()).group_by(unidad_col, estado_col):
+        clave = (unidad or '', estado_de(estado))
+        conteos[clave] = conteos.get(clave, 0) + cantidad
+
+    carga = HistoricoCarga(
+        dataset=dataset,
+        fecha=datetime.now(timezone.utc),
+        total=sum(conteos.values()),
+        real=sum(n for (_, estado), n in conteos.items() if estado in reales),
+        archivo_fuente_id=archivo_fuente_id,
+    )
+    session.add(carga)
+    session.flush()
+    session.add_all([
+        HistoricoConteo(carga_id=carga.id, unidad=unidad, estado=estado, cantidad=cantidad)
+        for (unidad, estado), cantidad in sorted(conteos.items())
+    ])
+    return carga
+
+
+def _porcentaje(real: int, total: int) -> float:
+    return round(real / total * 100, 1) if total > 0 else 0
+
+
+async def serie(
+    session: AsyncSession,
+    dataset: str,
+    unidad: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    desglose: bool = False,
+) -> Dict:
+    """
+    Serie de tiempo de un dataset: una entrada por carga con total, real y porcentaje.
+    Con `unidad` o `desglose` se suma desde historico_conteos (agrupado por carga y estado).
+    """
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Dataset sin histórico: {dataset}")
+    reales = DATASETS[dataset][3]
+
+    filtros = [HistoricoCarga.dataset == dataset]
+    if desde:
+        filtros.append(HistoricoCarga.fecha >= desde)
+    if hasta:
+        filtros.append(HistoricoCarga.fecha <= hasta)
+
+    cargas = (await session.execute(
+        select(HistoricoCarga.id, HistoricoCarga.fecha, HistoricoCarga.total, HistoricoCarga.real)
+        .where(*filtros)
+        .order_by(HistoricoCarga.fecha.desc())
+        .limit(LIMITE_CARGAS)
+    )).all()
+    cargas.reverse()
+
+    puntos: List[Dict] = [
+        {"carga_id": c.id, "fecha": c.fecha, "total": c.total, "real": c.real, "porcentaje": _porcentaje(c.real, c.total)}
+        for c in cargas
+    ]
+    if puntos and (unidad is not None or desglose):
+        query = (
+            select(HistoricoConteo.carga_id, HistoricoConteo.estado, func.sum(HistoricoConteo.cantidad))
+            .where(HistoricoConteo.carga_id.in_([p["carga_id"] for p in puntos]))
+            .group_by(HistoricoConteo.carga_id, HistoricoConteo.estado)
+        )
+        if unidad is not None:
+            query = query.where(HistoricoConteo.unidad == unidad)
+        por_carga: Dict[str, Dict[str, int]] = {}
+        for carga_id, estado, cantidad in (await session.execute(query)).all():
+            por_carga.setdefault(carga_id, {})[estado] = int(cantidad)
+        for punto in puntos:
+            estados = por_carga.get(punto["carga_id"], {})
+            punto["total"] = sum(estados.values())
+            punto["real"] = sum(n for estado, n in estados.items() if estado in reales)
+            punto["porcentaje"] = _porcentaje(punto["real"], punto["total"])
+            if desglose:
+                punto["desglose"] = estados
+
+    return {"dataset": dataset, "unidad": unidad, "serie": puntos}
@@ -0,0 +1,301 @@
+"""
+Importación de reportes de LCR (jóvenes, adultos, misioneros, asistencia, conversos).
+
+Cada tipo de reporte declara un `Reporte`: su esquema (columnas), un lector por
+extensión (para PDF, un parser por línea o por página), un normalizador que arma las
+filas a insertar y la tabla destino. Lo común vive acá:
+
+- despacho por extensión y mensaje de formato no soportado;
+- extracción de PDF página por página (se libera cada página al terminarla) y, en PDFs
+  largos, repartida en procesos por rangos de páginas;
+- caché por checksum (sha256) del resultado parseado: subir el mismo archivo otra vez
+  no vuelve a pasar por pdfplumber/pandas;
+- reemplazo de la tabla con DELETE + INSERT masivo (Core), en lotes;
+- progreso por etapa en el logger del módulo, con tiempos.
+"""
+import copy
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from . import historico
+from .models import PdfFile
+
+PDF_WORKERS = int(os.getenv('IMPORT_PDF_WORKERS', str(min(4, os.cpu_count() or 1))))
+PAGINAS_POR_WORKER = 4
+LOTE_INSERT = 1000
+CACHE_MAX = 8
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Reporte:
+    nombre: str
+    model: Any
+    # extensión ('.pdf', '.csv', ...) → bytes del archivo → filas parseadas (lista o DataFrame)
+    lectores: Dict[str, Callable[[bytes], Any]]
+    # (parseado, archivo_fuente_id) → (filas para insertar, cantidad salteada)
+    normalizar: Optional[Callable[..., Tuple[list, int]]] = None
+    columnas: Sequence[str] = ()
+    formatos: str = 'PDF, CSV o Excel (.xlsx)'
+    historico: bool = False
+
+
+@dataclass
+class Resultado:
+    archivo: PdfFile
+    importados: int
+    salteados: int
+    filas: list = field(repr=False)
+
+
+class Progreso:
+    """Log (logger del módulo, INFO) de etapas de una importación: `[jovenes] parseo: 1200 filas (340 ms)`."""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self._inicio = self._ultimo = time.perf_counter()
+
+    def __call__(self, etapa: str, detalle: str = '') -> None:
+        ahora = time.perf_counter()
+        logger.info("[%s] %s%s (%.0f ms)", self.nombre, etapa, f": {detalle}" if detalle else "", (ahora - self._ultimo) * 1000)
+        self._ultimo = ahora
+
+    def fin(self, detalle: str = '') -> None:
+        logger.info("[%s] listo%s (%.0f ms total)", self.nombre, f": {detalle}" if detalle else "", (time.perf_counter() - self._inicio) * 1000)
+
+
+# ── Lectura ───────────────────────────────────────────────────────────────────
+
+def extension(filename: Optional[str]) -> str:
+    return os.path.splitext((filename or '').lower())[1]
+
+
+def checksum(contents: bytes) -> str:
+    return hashlib.sha256(contents).hexdigest()
+
+
+_cache: 'OrderedDict[Tuple[str, str], Any]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def leer(reporte: Reporte, filename: str, contents: bytes, progreso: Optional[Progreso] = None) -> Any:
+    """
+    Parsea el archivo con el lector de su extensión. El resultado queda en caché por
+    (reporte, sha256): se devuelve una copia, así el normalizador puede modificarla.
+    """
+    progreso = progreso or Progreso(reporte.nombre)
+    lector = reporte.lectores.get(extension(filename))
+    if lector is None:
+        raise HTTPException(status_code=400, detail=f"Tipo de archivo no soportado. Use {reporte.formatos}")
+
+    clave = (reporte.nombre, checksum(contents))
+    with _cache_lock:
+        if clave in _cache:
+            _cache.move_to_end(clave)
+            parseado = _cache[clave]
+            progreso('parseo', f'{_largo(parseado)} filas (caché {clave[1][:12]})')
+            return copy.deepcopy(parseado)
+
+    parseado = lector(contents)
+    progreso('parseo', f'{_largo(parseado)} filas de {filename}')
+    with _cache_lock:
+        _cache[clave] = parseado
+        _cache.move_to_end(clave)
+        while len(_cache) > CACHE_MAX:
+            _cache.popitem(last=False)
+    return copy.deepcopy(parseado)
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def _largo(parseado: Any) -> int:
+    try:
+        return len(parseado)
+    except TypeError:
+        return 0
+
+
+def leer_csv(columnas: Sequence[str] = ()) -> Callable[[bytes], Any]:
+    """Lector CSV a DataFrame; con `columnas`, renombra por posición al esquema del reporte."""
+    def lector(contents: bytes):
+        import pandas as pd
+
+        return _renombrar(pd.read_csv(io.BytesIO(contents)), columnas)
+    return lector
+
+
+def leer_excel(columnas: Sequence[str] = ()) -> Callable[[bytes], Any]:
+    def lector(contents: bytes):
+        import pandas as pd
+
+        return _renombrar(pd.read_excel(io.BytesIO(contents)), columnas)
+    return lector
+
+
+def _renombrar(df, columnas: Sequence[str]):
+    if columnas:
+        df.columns = list(columnas[:len(df.columns)]) + list(df.columns[len(columnas):])
+    return df
+
+
+# ── PDF ───────────────────────────────────────────────────────────────────────
+
+def paginas_pdf(contents: bytes, por_pagina: Callable[[Any], list], progreso: Optional[Progreso] = None) -> list:
+    """
+    Aplica `por_pagina(page)` a cada página y concatena los resultados en orden.
+    Con más de PAGINAS_POR_WORKER páginas por proceso disponible, reparte rangos de
+    páginas entre procesos (pdfminer es Python puro, los threads no ayudan); `por_pagina`
+    tiene que ser picklable (función de módulo o functools.partial de una).
+    """
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(contents)) as pdf:
+        total = len(pdf.pages)
+    workers = min(PDF_WORKERS, total // PAGINAS_POR_WORKER)
+
+    if workers > 1:
+        tamano = -(-total // workers)
+        rangos = [(inicio, min(inicio + tamano, total)) for inicio in range(0, total, tamano)]
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=len(rangos)) as pool:
+                partes = list(pool.map(partial(_procesar_rango, contents, por_pagina=por_pagina), rangos))
+            if progreso:
+                progreso('pdf', f'{total} páginas en {len(rangos)} procesos')
+            return [fila for parte in partes for fila in parte]
+        except Exception as e:
+            logger.warning("Workers de PDF no disponibles (%s); se sigue en un solo proceso", e)
+
+    filas = _procesar_rango(contents, (0, total), por_pagina=por_pagina)
+    if progreso:
+        progreso('pdf', f'{total} páginas')
+    return filas
+
+
+def _procesar_rango(contents: bytes, rango: Tuple[int, int], por_pagina: Callable[[Any], list]) -> list:
+    import pdfplumber
+
+    inicio, fin = rango
+    filas = []
+    with pdfplumber.open(io.BytesIO(contents)) as pdf:
+        for page in pdf.pages[inicio:fin]:
+            filas.extend(por_pagina(page))
+            page.flush_cache()
+    return filas
+
+
+def _lineas_de_pagina(page, parse_linea: Callable[[str], Optional[dict]], saltear: Tuple[str, ...], requiere: str) -> list:
+    text = page.extract_text(x_tolerance=3, y_tolerance=3)
+    if not text:
+        return []
+    filas = []
+    for line in text.split('\n'):
+        line = ' '.join(line.split())
+        if not line:
+            continue
+        ll = line.lower()
+        if ll.startswith(saltear) or ll.split()[0].isdigit():
+            continue
+        if requiere and requiere not in line:
+            continue
+        fila = parse_linea(line)
+        if fila:
+            filas.append(fila)
+    return filas
+
+
+def lineas_pdf(parse_linea: Callable[[str], Optional[dict]], saltear: Iterable[str] = (), requiere: str = '') -> Callable[[Any], list]:
+    """
+    Parser por página para reportes de texto de LCR: una persona por línea. Saltea
+    líneas vacías, las que empiezan con `saltear` (encabezados/pies) o con un número
+    (paginado) y las que no contienen `requiere`; el resto va a `parse_linea`.
+    """
+    return partial(_lineas_de_pagina, parse_linea=parse_linea, saltear=tuple(saltear), requiere=requiere)
+
+
+def tablas_de_pagina(page) -> list:
+    """Filas de todas las tablas que pdfplumber detecta en la página."""
+    return [fila for tabla in page.extract_tables() or [] for fila in tabla]
+
+
+# ── Escritura ─────────────────────────────────────────────────────────────────
+
+def insertar(db_session: Session, model, filas: list, progreso: Optional[Progreso] = None) -> int:
+    """INSERT masivo (Core, executemany) en lotes de LOTE_INSERT filas; la versión de la tabla sube sola."""
+    for inicio in range(0, len(filas), LOTE_INSERT):
+        db_session.execute(model.__table__.insert(), filas[inicio:inicio + LOTE_INSERT])
+        if progreso and len(filas) > LOTE_INSERT:
+            progreso('insert', f'{min(inicio + LOTE_INSERT, len(filas))}/{len(filas)}')
+    return len(filas)
+
+
+def reemplazar(db_session: Session, model, filas: list, progreso: Optional[Progreso] = None) -> int:
+    """Borra la tabla e inserta todas las filas, en la transacción de la sesión."""
+    borrados = db_session.query(model).delete()
+    if progreso:
+        progreso('delete', f'{borrados} registros anteriores de {model.__tablename__}')
+    return insertar(db_session, model, filas, progreso)
+
+
+def registrar_archivo(db_session: Session, filename: str, contents: bytes, mime: Optional[str], status: str, **kwargs) -> PdfFile:
+    archivo = PdfFile(
+        filename=filename,
+        mime=mime or 'application/octet-stream',
+        size_bytes=len(contents),
+        checksum=checksum(contents),
+        status=status,
+        file_metadata=kwargs.pop('file_metadata', {}),
+        **kwargs,
+    )
+    db_session.add(archivo)
+    db_session.flush()
+    return archivo
+
+
+def importar(
+    db_session: Session,
+    reporte: Reporte,
+    filename: str,
+    contents: bytes,
+    mime: Optional[str] = None,
+    status: str = 'processed',
+) -> Resultado:
+    """
+    Importación completa que reemplaza la tabla del reporte: parseo (con caché),
+    registro del archivo, normalización, DELETE + INSERT, histórico y commit.
+    Un archivo que no se puede leer responde 400 sin tocar la base.
+    """
+    progreso = Progreso(reporte.nombre)
+    try:
+        parseado = leer(reporte, filename, contents, progreso)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error leyendo archivo: {str(e)}")
+
+    archivo = registrar_archivo(db_session, filename, contents, mime, status)
+    filas, salteados = reporte.normalizar(parseado, archivo_fuente_id=archivo.id)
+    progreso('normalización', f'{len(filas)} filas, {salteados} salteadas')
+
+    importados = reemplazar(db_session, reporte.model, filas, progreso)
+    if reporte.historico:
+        historico.registrar(db_session, reporte.nombre, archivo.id)
+    db_session.commit()
+    progreso.fin(f'{importados} importados, {salteados} salteados')
+    return Resultado(archivo=archivo, importados=importados, salteados=salteados, filas=filas)
@@ -0,0 +1,89 @@
+"""
+Normalizador de las listas de recomendación (jóvenes y adultos) para importacion.Reporte.
+
+Todo se hace por columna sobre el DataFrame: limpieza de nombre/edad/sexo, máscara de
+filas a saltear (encabezados, totales, números sueltos), normalización de estado mapeada
+sobre los pares (estado, vencimiento) distintos. El INSERT masivo lo hace importacion.
+"""
+from datetime import date
+from typing import TYPE_CHECKING, Callable, Tuple
+
+from .normalizacion import parsear_vencimiento
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COLUMNAS = ['nombre', 'sexo', 'edad', 'estado_raw', 'vencimiento_raw', 'unidad']
+SKIP_NOMBRES = (
+    'nombre', 'apellido', 'lista', 'recuento', 'total', 'subtotal',
+    'estado de', 'para uso', 'derechos', 'intellectual',
+)
+VACIOS = ('', 'none', 'nan')
+ESTADOS_REALES = ('activa', 'vence_pronto')
+
+
+def _texto(df: 'pd.DataFrame', columna: str) -> 'pd.Series':
+    import pandas as pd
+
+    if columna not in df:
+        return pd.Series('', index=df.index)
+    return df[columna].fillna('').astype(str).str.strip()
+
+
+def _o_none(serie: 'pd.Series') -> 'pd.Series':
+    """'' / 'none' / 'nan' → None; el resto igual."""
+    return serie.where(~serie.str.lower().isin(VACIOS), None)
+
+
+def preparar(
+    df: 'pd.DataFrame',
+    normalizar_estado: Callable[[str, str], str],
+    archivo_fuente_id: str,
+) -> Tuple[list, int]:
+    """Filas listas para insertar (dicts de columnas) y cantidad de filas salteadas."""
+    import pandas as pd
+
+    nombre = _texto(df, 'nombre')
+    nombre_lower = nombre.str.lower()
+    saltear = (
+        nombre_lower.isin(VACIOS)
+        | nombre_lower.str.startswith(SKIP_NOMBRES)
+        | nombre_lower.str.replace(r'[.,]', '', regex=True).str.isdigit()
+    )
+    df = df[~saltear]
+    nombre = nombre[~saltear]
+
+    estado_raw = _texto(df, 'estado_raw')
+    venc_raw = _texto(df, 'vencimiento_raw')
+
+    # Normalización y fecha de vencimiento: una llamada por par distinto, no por fila
+    pares = list(zip(estado_raw, venc_raw))
+    hoy = date.today()
+    estados = {par: normalizar_estado(*par) for par in set(pares)}
+    vencimientos = {par: parsear_vencimiento(par[1], par[0], hoy) for par in estados}
+
+    edad = pd.to_numeric(_texto(df, 'edad'), errors='coerce')
+    edad = edad.where(edad == edad.round()).astype('Int64')
+
+    sexo = _texto(df, 'sexo').str.upper()
+    sexo = sexo.where(sexo.isin(('M', 'F')), None)
+
+    unidad = _texto(df, 'unidad')
+    unidad = unidad.where(unidad != '', None)
+
+    estado_norm = [estados[par] for par in pares]
+    filas = pd.DataFrame({
+        'nombre': nombre,
+        'sexo': sexo,
+        'edad': edad.astype(object).where(edad.notna(), None),
+        'estado_raw': _o_none(estado_raw),
+        'vencimiento_raw': _o_none(venc_raw),
+        'vencimiento_fecha': [vencimientos[par] for par in pares],
+        'unidad': unidad,
+        'estado_normalizado': estado_norm,
+        'tiene_recomendacion_activa': [e in ESTADOS_REALES for e in estado_norm],
+        'archivo_fuente_id': archivo_fuente_id,
+        'fila_numero': df.index + 1,
+    }, index=df.index)
+    return filas.to_dict('records'), int(saltear.sum())
+
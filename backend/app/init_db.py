@@ -1,6 +1,98 @@
-from .db import engine, Base
+import contextlib
+import logging
+import os
+
+from sqlalchemy import inspect, text
+
+from .asistencia import UNIDADES_ASISTENCIA, backfill_lcr, normalizar_unidades
+from .db import DATABASE_URL, engine, Base
+from .dataset_versions import ensure_versions
+from .meeting_search import ensure_search_index
+from .misioneros import backfill_fechas
+from .recomendaciones import backfill_vencimientos
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Clave arbitraria para pg_advisory_lock; identifica "init del esquema" en toda la base.
+INIT_LOCK_KEY = 7283015
+
+
+@contextlib.contextmanager
+def _init_lock():
+    """
+    Evita que varios procesos (workers, celery, otra instancia) creen tablas a la vez.
+    Postgres: advisory lock. SQLite: flock sobre un archivo junto a la base.
+    """
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": INIT_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INIT_LOCK_KEY})
+        return
+
+    sqlite_path = DATABASE_URL.replace("sqlite:///", "", 1) if engine.dialect.name == "sqlite" else ""
+    if not sqlite_path or sqlite_path == ":memory:" or fcntl is None:
+        yield
+        return
+
+    with open(f"{os.path.abspath(sqlite_path)}.init.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def ensure_columns(engine) -> list:
+    """
+    create_all no agrega columnas nuevas a tablas que ya existían: las agrega con
+    ALTER TABLE ADD COLUMN. Solo columnas que admiten NULL (las filas viejas quedan en
+    NULL); las NOT NULL se avisan y quedan para una migración manual.
+    Devuelve [(tabla, columna)] agregadas.
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    logging.warning("[DB] Falta la columna NOT NULL %s.%s; requiere migración manual", table.name, column.name)
+                    continue
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)}"
+                ))
+                added.append((table.name, column.name))
+                logging.info("[DB] Columna agregada: %s.%s", table.name, column.name)
+    return added
 
 
 def init():
-    # create tables if not exists (simple migration-free init for MVP)
-    Base.metadata.create_all(bind=engine)
+    with _init_lock():
+        # create tables if not exists (simple migration-free init for MVP)
+        Base.metadata.create_all(bind=engine)
+        added = ensure_columns(engine)
+        # create_all no agrega índices nuevos a tablas que ya existían
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+        ensure_search_index(engine)
+        ensure_versions(engine)
+        if any(column == "vencimiento_fecha" for _, column in added):
+            backfill_vencimientos(engine)
+        if any(table == "misioneros_campo" for table, _ in added):
+            backfill_fechas(engine)
+        normalizar_unidades(engine)
+        backfill_lcr(engine, {unidad: nombre for nombre, unidad in UNIDADES_ASISTENCIA.items()})
+    logging.info("[DB] Esquema verificado")
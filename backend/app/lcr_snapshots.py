@@ -0,0 +1,138 @@
+"""
+Almacén local de reportes LCR (stale-while-revalidate).
+
+Cada reporte se guarda por (tipo, unidad, año). Al refrescar se reemplazan las semanas
+abiertas (la semana en curso, las últimas SEMANAS_REABIERTAS cerradas, que LCR todavía
+completa tarde, y las que no estaban guardadas) y las guardadas en 0 que ahora traen
+dato; el resto del histórico se conserva tal cual.
+"""
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models import LcrSnapshot
+
+KIND_ASISTENCIA = 'asistencia'
+KIND_JOVENES = 'jovenes'
+
+# Minutos tras los cuales un snapshot del año en curso se considera desactualizado.
+SNAPSHOT_TTL_MINUTES = int(os.getenv('LCR_SNAPSHOT_TTL_MINUTES', '60'))
+
+# Semanas cerradas que se vuelven a tomar de LCR en cada refresco (asistencia cargada tarde).
+SEMANAS_REABIERTAS = int(os.getenv('LCR_SEMANAS_REABIERTAS', '4'))
+
+# Claves que LCR usa (según el endpoint) para identificar la semana de cada valor.
+WEEK_KEYS = ('date', 'weekDate', 'week', 'sundayDate', 'startDate', 'period', 'label')
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    # SQLite devuelve datetimes sin tz aunque la columna sea timezone=True.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _parse_week(key: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(key)[:10])
+    except ValueError:
+        return None
+
+
+def extract_weeks(payload: Any) -> Dict[str, float]:
+    """
+    Recorre el payload de asistencia y devuelve {semana: valor}.
+    Si un valor no trae fecha se usa su posición (#1, #2, ...) como clave.
+    """
+    weeks: Dict[str, float] = {}
+
+    def walk(node: Any):
+        if isinstance(node, dict):
+            value = node.get('value')
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                label = next((str(node[k]) for k in WEEK_KEYS if node.get(k)), None)
+                key = label or f'#{len(weeks) + 1}'
+                while key in weeks:
+                    key = f'{key}+'
+                weeks[key] = float(value)
+            for k, v in node.items():
+                if k != 'value':
+                    walk(v)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(payload)
+    return weeks
+
+
+def merge_weeks(stored: Dict[str, float], fetched: Dict[str, float], today: Optional[date] = None) -> Dict[str, float]:
+    """
+    Fusiona semana a semana. Se toma lo recién descargado para la semana en curso, las
+    últimas SEMANAS_REABIERTAS cerradas, las semanas nuevas y las guardadas en 0 (LCR las
+    completa tarde). Una semana cerrada más vieja que ya tenía dato no se pisa.
+    """
+    today = today or date.today()
+    current_week_start = today - timedelta(days=(today.weekday() + 1) % 7)  # domingo
+    reopened_since = current_week_start - timedelta(weeks=SEMANAS_REABIERTAS)
+
+    merged = dict(stored or {})
+    for key, value in fetched.items():
+        week = _parse_week(key)
+        if key in merged and merged[key] and week is not None and week < reopened_since:
+            continue
+        merged[key] = value
+    return dict(sorted(merged.items()))
+
+
+def load_snapshots(session: Session, year: int) -> Dict[Tuple[str, int], LcrSnapshot]:
+    rows = session.query(LcrSnapshot).filter(LcrSnapshot.year == year).all()
+    return {(row.kind, row.unidad_id): row for row in rows}
+
+
+def is_stale(snapshot: LcrSnapshot, today: Optional[date] = None) -> bool:
+    """
+    Un año cerrado es definitivo si se refrescó después de que se cerraran sus últimas
+    semanas (31/12 más SEMANAS_REABIERTAS). Si no, como el año en curso, vence según
+    SNAPSHOT_TTL_MINUTES.
+    """
+    today = today or date.today()
+    refreshed_at = _as_aware(snapshot.refreshed_at)
+    if refreshed_at is None:
+        return True
+    if snapshot.year < today.year:
+        cierre = datetime(snapshot.year, 12, 31, tzinfo=timezone.utc) + timedelta(weeks=SEMANAS_REABIERTAS)
+        if refreshed_at > cierre:
+            return False
+    return _utcnow() - refreshed_at > timedelta(minutes=SNAPSHOT_TTL_MINUTES)
+
+
+def upsert_snapshot(
+    session: Session,
+    kind: str,
+    unidad_id: int,
+    year: int,
+    semanas: Optional[Dict[str, float]] = None,
+    resumen: Optional[Dict[str, Any]] = None,
+) -> LcrSnapshot:
+    row = (
+        session.query(LcrSnapshot)
+        .filter(LcrSnapshot.kind == kind, LcrSnapshot.unidad_id == unidad_id, LcrSnapshot.year == year)
+        .first()
+    )
+    if not row:
+        row = LcrSnapshot(kind=kind, unidad_id=unidad_id, year=year, semanas={}, resumen={})
+        session.add(row)
+
+    if semanas is not None:
+        row.semanas = merge_weeks(row.semanas or {}, semanas)
+    if resumen is not None:
+        row.resumen = resumen
+    row.refreshed_at = _utcnow()
+    return row
@@ -1,7 +1,10 @@
 import logging
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from . import init_db
+from .profiling import ProfilingMiddleware
+from .responses import CompressionMiddleware, ORJSONResponse
 from .routes_auth import router as auth_router
 from .routes_files import router as files_router
 from .routes_internal import router as internal_router
@@ -17,7 +20,7 @@ from .routes_stake_messages import router as stake_messages_router
 from .routes_council_assignments import router as council_assignments_router
 from .routes_meeting_ai import router as meeting_ai_router
 
-app = FastAPI(title="KPI PDF Extractor API")
+app = FastAPI(title="KPI PDF Extractor API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,12 +28,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(ProfilingMiddleware)
+# Última en agregarse = la más externa: comprime también lo que agregan las demás.
+app.add_middleware(CompressionMiddleware)
 
 
 @app.on_event("startup")
 def on_startup():
-    init_db.init()
+    # Con gunicorn (gunicorn.conf.py) el master ya inicializó la base antes del fork.
+    if os.getenv("APP_DB_INITIALIZED") != "1":
+        init_db.init()
 
     diagnostics = None
     try:
@@ -73,3 +82,9 @@ def root():
 @app.get("/health")
 def health():
     return {"status": "healthy"}
+
+
+@app.get("/health/db")
+def health_db():
+    from .db import pool_stats
+    return {"status": "healthy", **pool_stats()}
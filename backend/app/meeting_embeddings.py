@@ -0,0 +1,269 @@
+"""
+Recuperación semántica de actas para las preguntas a la IA.
+
+Las actas se parten en fragmentos al guardarse y cada fragmento se guarda con su
+vector en meeting_chunks. Para responder una pregunta se arma en memoria una matriz
+NumPy con todos los vectores (se recarga solo cuando la tabla cambia) y se toman los
+k fragmentos más parecidos.
+
+Embeddings:
+- Si MEETING_EMBEDDING_MODEL apunta a un modelo de sentence-transformers y la
+  librería está instalada, se usa ese modelo en CPU.
+- Si no, un vectorizador por hashing determinista (sin dependencias ni red).
+"""
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import unicodedata
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .models import MeetingChunk, MeetingMinute
+
+EMBEDDING_MODEL = os.getenv('MEETING_EMBEDDING_MODEL', '').strip()
+HASHING_DIM = int(os.getenv('MEETING_EMBEDDING_DIM', '512'))
+CHUNK_WORDS = int(os.getenv('MEETING_CHUNK_WORDS', '120'))
+CHUNK_OVERLAP = 30
+# Cuántas actas sin indexar se procesan por tanda en segundo plano (el resto, en la próxima).
+BACKFILL_BATCH = 50
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_SENTENCE_RE = re.compile(r'(?<=[.!?;:])\s+|\n+')
+
+_model = None
+_model_lock = threading.Lock()
+
+_index_lock = threading.Lock()
+_backfill_lock = threading.Lock()
+_index: dict = {'version': None, 'matrix': None, 'rows': []}
+
+
+# ── Embeddings ─────────────────────────────────────────────────────────────────
+
+def _load_model():
+    """Carga perezosa del modelo de sentence-transformers; None si no está disponible."""
+    global _model
+    if not EMBEDDING_MODEL:
+        return None
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(EMBEDDING_MODEL, device='cpu')
+                except Exception as exc:
+                    logging.warning("[EMBED] No se pudo cargar %s, se usa hashing: %s", EMBEDDING_MODEL, exc)
+                    _model = False
+    return _model or None
+
+
+def model_name() -> str:
+    return EMBEDDING_MODEL if _load_model() else f'hashing-{HASHING_DIM}'
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def _hash_features(text: str) -> np.ndarray:
+    """Palabras y bigramas hasheados (blake2b, estable entre procesos) con signo y tf logarítmico."""
+    vec = np.zeros(HASHING_DIM, dtype=np.float32)
+    words = [w for w in _WORD_RE.findall(_normalize(text)) if len(w) > 2]
+    features = words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+    counts: dict[str, int] = {}
+    for feat in features:
+        counts[feat] = counts.get(feat, 0) + 1
+    for feat, count in counts.items():
+        digest = hashlib.blake2b(feat.encode('utf-8'), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], 'little') % HASHING_DIM
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vec[bucket] += sign * (1.0 + math.log(count))
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def embed(texts: list[str]) -> np.ndarray:
+    """Devuelve una matriz (len(texts), dim) float32 con filas normalizadas."""
+    model = _load_model()
+    if model is not None:
+        vectors = model.encode(texts, batch_size=16, normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+    if not texts:
+        return np.zeros((0, HASHING_DIM), dtype=np.float32)
+    return np.vstack([_hash_features(t) for t in texts])
+
+
+# ── Fragmentación e indexado ──────────────────────────────────────────────────
+
+def chunk_text(text: str, max_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """Agrupa oraciones en ventanas de hasta max_words palabras, con solapamiento."""
+    words: list[str] = []
+    for sentence in _SENTENCE_RE.split(text or ''):
+        words.extend(sentence.split())
+    if not words:
+        return []
+    chunks = []
+    step = max(max_words - overlap, 1)
+    for start in range(0, len(words), step):
+        chunks.append(' '.join(words[start:start + max_words]))
+        if start + max_words >= len(words):
+            break
+    return chunks
+
+
+def index_meeting(db: Session, minute: MeetingMinute) -> int:
+    """Reemplaza los fragmentos del acta. No hace commit."""
+    db.query(MeetingChunk).filter(MeetingChunk.meeting_id == minute.id).delete(synchronize_session=False)
+    pieces = [('summary', c) for c in chunk_text(minute.summary)]
+    pieces += [('transcript', c) for c in chunk_text(minute.transcript)]
+    if not pieces:
+        return 0
+    vectors = embed([text for _, text in pieces])
+    name = model_name()
+    positions: dict[str, int] = {}
+    for (source, text), vector in zip(pieces, vectors):
+        position = positions.get(source, 0)
+        positions[source] = position + 1
+        db.add(MeetingChunk(
+            meeting_id=minute.id,
+            category=minute.category,
+            date=minute.date,
+            source=source,
+            position=position,
+            text=text,
+            model=name,
+            embedding=vector.astype(np.float32).tobytes(),
+        ))
+    return len(pieces)
+
+
+def _con_texto(column):
+    return func.length(func.trim(func.coalesce(column, ''))) > 0
+
+
+def backfill(db: Session, limit: Optional[int] = BACKFILL_BATCH) -> int:
+    """
+    Indexa actas sin fragmentos o indexadas con otro modelo. Devuelve cuántas procesó.
+    Las actas sin texto no generan fragmentos: se excluyen para no volver a elegirlas
+    en cada tanda (y que no tapen a las más viejas).
+    """
+    name = model_name()
+    indexed = db.query(MeetingChunk.meeting_id).filter(MeetingChunk.model == name).distinct()
+    query = (
+        db.query(MeetingMinute)
+        .filter(
+            MeetingMinute.id.notin_(indexed),
+            or_(_con_texto(MeetingMinute.summary), _con_texto(MeetingMinute.transcript)),
+        )
+        .order_by(MeetingMinute.date.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+    minutes = query.all()
+    for minute in minutes:
+        index_meeting(db, minute)
+    if minutes:
+        db.commit()
+        logging.info("[EMBED] %s actas indexadas con %s", len(minutes), name)
+    return len(minutes)
+
+
+def backfill_en_segundo_plano() -> None:
+    """Tanda de backfill con su propia sesión, fuera del request (BackgroundTasks). Una a la vez."""
+    if not _backfill_lock.acquire(blocking=False):
+        return
+    db = SessionLocal()
+    try:
+        backfill(db)
+    except Exception as exc:
+        db.rollback()
+        logging.warning("[EMBED] No se pudieron indexar actas pendientes: %s", exc)
+    finally:
+        db.close()
+        _backfill_lock.release()
+
+
+# ── Índice en memoria ─────────────────────────────────────────────────────────
+
+def _load_index(db: Session) -> dict:
+    """Matriz de vectores del modelo actual; se recarga si cambió la tabla."""
+    name = model_name()
+    count, max_id = db.query(func.count(MeetingChunk.id), func.max(MeetingChunk.id)).filter(MeetingChunk.model == name).one()
+    version = (name, count, max_id)
+    with _index_lock:
+        if _index['version'] == version:
+            return _index
+        rows = (
+            db.query(
+                MeetingChunk.meeting_id, MeetingChunk.category, MeetingChunk.date,
+                MeetingChunk.source, MeetingChunk.text, MeetingChunk.embedding,
+            )
+            .filter(MeetingChunk.model == name)
+            .order_by(MeetingChunk.id)
+            .all()
+        )
+        if rows:
+            matrix = np.vstack([np.frombuffer(r.embedding, dtype=np.float32) for r in rows])
+        else:
+            matrix = np.zeros((0, HASHING_DIM), dtype=np.float32)
+        _index.update(
+            version=version,
+            matrix=matrix,
+            dates=np.array([r.date or '' for r in rows], dtype=object),
+            rows=[
+                {'meeting_id': r.meeting_id, 'category': r.category, 'date': r.date, 'source': r.source, 'text': r.text}
+                for r in rows
+            ],
+        )
+        return _index
+
+
+def retrieve(
+    db: Session,
+    question: str,
+    top_k: int = 8,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    max_chars: int = 6000,
+    min_score: float = 0.05,
+) -> list[dict]:
+    """
+    Fragmentos más parecidos a la pregunta, sin superar max_chars en total. Solo lee
+    el índice: las actas pendientes las indexa backfill_en_segundo_plano().
+    """
+    index = _load_index(db)
+    matrix = index['matrix']
+    if matrix is None or not len(matrix):
+        return []
+
+    scores = matrix @ embed([question])[0]
+    mask = np.ones(len(scores), dtype=bool)
+    if date_from:
+        mask &= index['dates'] >= date_from
+    if date_to:
+        mask &= index['dates'] <= date_to
+    scores = np.where(mask, scores, -np.inf)
+
+    k = min(top_k * 3, len(scores))
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    candidates = candidates[np.argsort(-scores[candidates])]
+
+    results, used = [], 0
+    for i in candidates:
+        score = float(scores[i])
+        if score < min_score or len(results) >= top_k:
+            break
+        row = index['rows'][i]
+        if used + len(row['text']) > max_chars:
+            continue
+        used += len(row['text'])
+        results.append({**row, 'score': round(score, 4)})
+    return results
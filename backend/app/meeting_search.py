@@ -0,0 +1,192 @@
+"""
+Búsqueda de texto completo sobre actas de reunión.
+
+- SQLite: tabla virtual FTS5 (external content sobre meeting_minutes) sincronizada con triggers.
+- PostgreSQL: columna tsvector generada + índice GIN.
+
+En ambos casos el índice se mantiene solo en create/update/delete de meeting_minutes,
+sin código extra en los endpoints.
+"""
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+FTS_TABLE = 'meeting_minutes_fts'
+MIN_TOKEN_LEN = 3
+MAX_TOKENS = 12
+
+# Se desactiva si el SQLite del sistema no trae FTS5 (se usa LIKE como respaldo).
+_fts_available = True
+
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        participants, summary, transcript,
+        content='meeting_minutes', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON meeting_minutes BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, participants, summary, transcript)
+        VALUES (new.rowid, new.participants, new.summary, new.transcript);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON meeting_minutes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, participants, summary, transcript)
+        VALUES ('delete', old.rowid, old.participants, old.summary, old.transcript);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON meeting_minutes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, participants, summary, transcript)
+        VALUES ('delete', old.rowid, old.participants, old.summary, old.transcript);
+        INSERT INTO {FTS_TABLE}(rowid, participants, summary, transcript)
+        VALUES (new.rowid, new.participants, new.summary, new.transcript);
+    END
+    """,
+]
+
+_POSTGRES_DDL = [
+    """
+    ALTER TABLE meeting_minutes ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', coalesce(summary, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(participants, '')), 'B') ||
+        setweight(to_tsvector('spanish', coalesce(transcript, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_meeting_minutes_search ON meeting_minutes USING GIN (search_vector)",
+]
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Crea (si falta) el índice de búsqueda y lo llena con las actas existentes."""
+    global _fts_available
+
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as conn:
+            for ddl in _POSTGRES_DDL:
+                conn.execute(text(ddl))
+        return
+
+    if engine.dialect.name != 'sqlite':
+        _fts_available = False
+        return
+
+    try:
+        with engine.begin() as conn:
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE},
+            ).first()
+            for ddl in _SQLITE_DDL:
+                conn.execute(text(ddl))
+            if not existed:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    except Exception as exc:
+        _fts_available = False
+        logging.warning("[SEARCH] FTS5 no disponible, se usará búsqueda LIKE: %s", exc)
+
+
+def _tokens(query: str) -> list[str]:
+    words = re.findall(r'\w+', query.lower())
+    return [w for w in words if len(w) >= MIN_TOKEN_LEN][:MAX_TOKENS]
+
+
+def search_minutes(
+    db: Session,
+    query: str,
+    category: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    match_any: bool = False,
+    snippet_words: int = 24,
+) -> dict:
+    """
+    Busca actas y devuelve fragmentos ordenados por relevancia.
+    match_any=False exige todos los términos; True acepta cualquiera (útil para preguntas).
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return {'items': [], 'limit': limit, 'offset': offset, 'has_more': False}
+
+    filters = []
+    params = {'limit': limit + 1, 'offset': offset}
+    if category:
+        filters.append('m.category = :category')
+        params['category'] = category
+    if date_from:
+        filters.append('m.date >= :date_from')
+        params['date_from'] = date_from
+    if date_to:
+        filters.append('m.date <= :date_to')
+        params['date_to'] = date_to
+    extra_where = ''.join(f' AND {f}' for f in filters)
+
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        joiner = ' | ' if match_any else ' & '
+        params['tsq'] = joiner.join(f'{t}:*' for t in tokens)
+        params['headline_opts'] = f'MaxWords={snippet_words}, MinWords={max(snippet_words // 2, 5)}, StartSel=«, StopSel=»'
+        sql = f"""
+            SELECT m.id, m.category, m.date, m.participants,
+                   ts_headline('spanish', coalesce(m.summary, '') || ' ' || coalesce(m.transcript, ''), q, :headline_opts) AS snippet,
+                   ts_rank(m.search_vector, q) AS rank
+            FROM meeting_minutes m, to_tsquery('spanish', :tsq) q
+            WHERE m.search_vector @@ q{extra_where}
+            ORDER BY rank DESC, m.date DESC
+            LIMIT :limit OFFSET :offset
+        """
+    elif dialect == 'sqlite' and _fts_available:
+        joiner = ' OR ' if match_any else ' '
+        params['match'] = joiner.join(f'"{t}"*' for t in tokens)
+        params['snippet_tokens'] = min(snippet_words, 64)
+        # bm25 devuelve valores más bajos para mejores coincidencias; pesos: participants, summary, transcript.
+        sql = f"""
+            SELECT m.id, m.category, m.date, m.participants,
+                   snippet({FTS_TABLE}, -1, '«', '»', '…', :snippet_tokens) AS snippet,
+                   -bm25({FTS_TABLE}, 2.0, 4.0, 1.0) AS rank
+            FROM {FTS_TABLE} JOIN meeting_minutes m ON m.rowid = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH :match{extra_where}
+            ORDER BY rank DESC, m.date DESC
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        likes = []
+        for i, token in enumerate(tokens):
+            params[f't{i}'] = f'%{token}%'
+            likes.append(
+                f"(lower(coalesce(m.summary, '')) LIKE :t{i} OR lower(coalesce(m.transcript, '')) LIKE :t{i}"
+                f" OR lower(coalesce(m.participants, '')) LIKE :t{i})"
+            )
+        where = (' OR ' if match_any else ' AND ').join(likes)
+        sql = f"""
+            SELECT m.id, m.category, m.date, m.participants,
+                   substr(coalesce(m.summary, ''), 1, 200) AS snippet, 0 AS rank
+            FROM meeting_minutes m
+            WHERE ({where}){extra_where}
+            ORDER BY m.date DESC
+            LIMIT :limit OFFSET :offset
+        """
+
+    rows = db.execute(text(sql), params).mappings().all()
+    items = [
+        {
+            'id': r['id'],
+            'category': r['category'],
+            'date': r['date'],
+            'participants': r['participants'] or '',
+            'snippet': r['snippet'] or '',
+            'rank': round(float(r['rank'] or 0), 4),
+        }
+        for r in rows[:limit]
+    ]
+    return {'items': items, 'limit': limit, 'offset': offset, 'has_more': len(rows) > limit}
@@ -0,0 +1,167 @@
+"""
+KPI y proyección de misioneros agregados en la base.
+
+El KPI sale de un SELECT unidad_actual, COUNT(*) FILTER (campo), COUNT(*) FILTER
+(servicio) ... GROUP BY unidad_actual; las listas de detalle son un SELECT de columnas
+(la cantidad de misioneros de una estaca es chica).
+
+La proyección cuenta, para cada mes de los próximos N, cuántos siguen en el campo según
+comenzo_fecha / termino_fecha (parseadas al importar). Es un rango sobre el índice
+(termino_fecha, comenzo_fecha, es_mision_servicio) agrupado por esas columnas, así que
+devuelve a lo sumo una fila por combinación de fechas.
+"""
+from datetime import date
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, func, not_, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .dataset_versions import bump
+from .models import MisioneroCampo
+from .normalizacion import parsear_fecha_lcr
+
+MESES_PROYECCION = 24
+MESES_PROYECCION_MAX = 60
+
+
+def fechas(comenzo: Optional[str], termino_esperado: Optional[str]) -> Dict[str, Optional[date]]:
+    return {
+        'comenzo_fecha': parsear_fecha_lcr(comenzo),
+        'termino_fecha': parsear_fecha_lcr(termino_esperado),
+    }
+
+
+def _porcentaje(real: int, meta: int) -> float:
+    return round((real / meta) * 100, 1) if meta > 0 else 0
+
+
+async def kpi(session: AsyncSession, meta: int) -> Dict:
+    """En el campo (misiones que no son de servicio) vs. servicio a la Iglesia, total y por unidad."""
+    servicio = MisioneroCampo.es_mision_servicio.is_(True)
+    rows = (await session.execute(
+        select(
+            MisioneroCampo.unidad_actual,
+            func.count().filter(not_(servicio)),
+            func.count().filter(servicio),
+        ).group_by(MisioneroCampo.unidad_actual)
+    )).all()
+    por_unidad = sorted(
+        ({'unidad_actual': unidad or '', 'campo': campo, 'servicio': serv} for unidad, campo, serv in rows),
+        key=lambda u: u['unidad_actual'],
+    )
+    total_campo = sum(u['campo'] for u in por_unidad)
+    total_servicio = sum(u['servicio'] for u in por_unidad)
+
+    personas = (await session.execute(
+        select(
+            MisioneroCampo.nombre, MisioneroCampo.mision, MisioneroCampo.comenzo,
+            MisioneroCampo.termino_esperado, MisioneroCampo.unidad_actual, MisioneroCampo.es_mision_servicio,
+        ).order_by(MisioneroCampo.fila_numero, MisioneroCampo.nombre)
+    )).all()
+
+    return {
+        'indicador': 'misioneros_campo',
+        'nombre': 'Misioneros en el Campo',
+        'real': total_campo,           # Los que están en misiones reales
+        'meta': meta,
+        'porcentaje': _porcentaje(total_campo, meta),
+        'sub_servicio': total_servicio,  # Misioneros de servicio a la Iglesia
+        'por_unidad': por_unidad,
+        'personas': [
+            {
+                'nombre': m.nombre,
+                'mision': m.mision or '',
+                'comenzo': m.comenzo or '',
+                'termino_esperado': m.termino_esperado or '',
+                'unidad_actual': m.unidad_actual or '',
+            }
+            for m in personas if not m.es_mision_servicio
+        ],
+        'personas_servicio': [
+            {
+                'nombre': m.nombre,
+                'unidad_actual': m.unidad_actual or '',
+                'comenzo': m.comenzo or '',
+                'termino_esperado': m.termino_esperado or '',
+            }
+            for m in personas if m.es_mision_servicio
+        ],
+    }
+
+
+def _sumar_meses(inicio: date, meses: int) -> date:
+    total = inicio.year * 12 + inicio.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+async def proyeccion(session: AsyncSession, meta: int, meses: int = MESES_PROYECCION, hoy: Optional[date] = None) -> Dict:
+    """
+    Misioneros en el campo y de servicio en cada uno de los próximos `meses` meses
+    (empezando por el actual). Un misionero cuenta en un mes si comenzó antes de que
+    termine el mes y su término esperado no es anterior al primer día. Sin fecha de
+    término reconocida solo se cuenta en el mes actual (se informa aparte): no se sabe
+    hasta cuándo sigue y contarlo en todos los meses inflaría la proyección contra la meta.
+    """
+    if not 1 <= meses <= MESES_PROYECCION_MAX:
+        raise HTTPException(status_code=400, detail=f"Meses inválidos; entre 1 y {MESES_PROYECCION_MAX}")
+    inicio = (hoy or date.today()).replace(day=1)
+    limites = [_sumar_meses(inicio, i) for i in range(meses + 1)]
+
+    m = MisioneroCampo
+    rows = (await session.execute(
+        select(m.termino_fecha, m.comenzo_fecha, m.es_mision_servicio, func.count())
+        .where(or_(m.termino_fecha.is_(None), m.termino_fecha >= inicio))
+        .group_by(m.termino_fecha, m.comenzo_fecha, m.es_mision_servicio)
+    )).all()
+
+    serie = []
+    for desde, hasta in zip(limites, limites[1:]):
+        campo = servicio = 0
+        for termino, comenzo, es_servicio, cantidad in rows:
+            sigue = termino >= desde if termino is not None else desde == inicio
+            if sigue and (comenzo is None or comenzo < hasta):
+                if es_servicio:
+                    servicio += cantidad
+                else:
+                    campo += cantidad
+        serie.append({
+            'mes': desde.strftime('%Y-%m'),
+            'campo': campo,
+            'servicio': servicio,
+            'porcentaje': _porcentaje(campo, meta),
+            'diferencia_meta': campo - meta,
+        })
+
+    return {
+        'meta': meta,
+        'desde': inicio,
+        'meses': serie,
+        'sin_fecha_termino': sum(r[3] for r in rows if r[0] is None),
+    }
+
+
+def backfill_fechas(engine: Engine, batch: int = 1000) -> int:
+    """Completa comenzo_fecha / termino_fecha de misioneros importados antes de que existieran."""
+    table = MisioneroCampo.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam('row_id'))
+        .values(comenzo_fecha=bindparam('fecha_inicio'), termino_fecha=bindparam('fecha_termino'))
+    )
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(table.c.id, table.c.comenzo, table.c.termino_esperado)
+            .where(table.c.comenzo_fecha.is_(None), table.c.termino_fecha.is_(None))
+        ).all()
+        updates = []
+        for row in rows:
+            f = fechas(row.comenzo, row.termino_esperado)
+            if f['comenzo_fecha'] or f['termino_fecha']:
+                updates.append({'row_id': row.id, 'fecha_inicio': f['comenzo_fecha'], 'fecha_termino': f['termino_fecha']})
+        for i in range(0, len(updates), batch):
+            conn.execute(stmt, updates[i:i + batch])
+        if updates:
+            bump(conn, [table.name])
+    return len(updates)
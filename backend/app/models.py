@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Text, JSON, Numeric, BigInteger, Date, Integer, Float, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, Text, JSON, Numeric, BigInteger, Date, Integer, Float, ForeignKey, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .db import Base
@@ -137,6 +137,12 @@ class IndicadorKPI(Base):
 class JovenRecomendacion(Base):
     """Representa a cada joven de la lista de recomendación"""
     __tablename__ = 'jovenes_recomendacion'
+    __table_args__ = (
+        # KPI por estado (GROUP BY) y listas paginadas por estado ordenadas por nombre
+        Index('ix_jovenes_recomendacion_estado_nombre', 'estado_normalizado', 'nombre'),
+        # Pronóstico de vencimientos: estado vigente + rango de fechas, cubre unidad
+        Index('ix_jovenes_recomendacion_estado_vencimiento', 'estado_normalizado', 'vencimiento_fecha', 'unidad'),
+    )
 
     id = Column(String, primary_key=True, default=gen_uuid)
 
@@ -146,6 +152,7 @@ class JovenRecomendacion(Base):
     edad = Column(Integer)
     estado_raw = Column(String)         # "Activa", "Vencen en 15 días", "Vencida", "Cancelada", etc.
     vencimiento_raw = Column(String)    # Contenido de la columna Vencimiento
+    vencimiento_fecha = Column(Date)    # vencimiento_raw parseado (ver normalizacion.parsear_vencimiento)
     unidad = Column(String)
 
     # Valores normalizados
@@ -162,6 +169,12 @@ class JovenRecomendacion(Base):
 class AdultoRecomendacion(Base):
     """Representa a cada adulto investido de la lista de recomendación"""
     __tablename__ = 'adultos_recomendacion'
+    __table_args__ = (
+        # KPI por estado (GROUP BY) y listas paginadas por estado ordenadas por nombre
+        Index('ix_adultos_recomendacion_estado_nombre', 'estado_normalizado', 'nombre'),
+        # Pronóstico de vencimientos: estado vigente + rango de fechas, cubre unidad
+        Index('ix_adultos_recomendacion_estado_vencimiento', 'estado_normalizado', 'vencimiento_fecha', 'unidad'),
+    )
 
     id = Column(String, primary_key=True, default=gen_uuid)
 
@@ -171,6 +184,7 @@ class AdultoRecomendacion(Base):
     edad = Column(Integer)
     estado_raw = Column(String)
     vencimiento_raw = Column(String)
+    vencimiento_fecha = Column(Date)
     unidad = Column(String)
 
     # Valores normalizados
@@ -186,6 +200,10 @@ class AdultoRecomendacion(Base):
 class MisioneroCampo(Base):
     """Represent cada misionero actualmente en el campo"""
     __tablename__ = 'misioneros_campo'
+    __table_args__ = (
+        # Proyección mensual: rango sobre término, cubre comienzo y tipo de misión
+        Index('ix_misioneros_campo_termino', 'termino_fecha', 'comenzo_fecha', 'es_mision_servicio'),
+    )
 
     id = Column(String, primary_key=True, default=gen_uuid)
 
@@ -194,6 +212,8 @@ class MisioneroCampo(Base):
     comenzo = Column(String)           # Fecha de inicio (guardada como texto desde CSV/Excel)
     termino_esperado = Column(String)  # Fecha término esperado
     unidad_actual = Column(String)     # Unidad/barrio actual
+    comenzo_fecha = Column(Date)       # comenzo / termino_esperado parseados (None si no se reconocen)
+    termino_fecha = Column(Date)
 
     # Es "Misión de servicio a la Iglesia"?
     es_mision_servicio = Column(Boolean, default=False)
@@ -215,6 +235,39 @@ class AsistenciaSacramental(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class AsistenciaSemanal(Base):
+    """Asistencia sacramental de una unidad en una semana (domingo). Hecho normalizado para tendencias."""
+    __tablename__ = 'asistencia_semanal'
+    __table_args__ = (
+        UniqueConstraint('unidad', 'semana', name='uq_asistencia_semanal_unidad_semana'),
+        Index('ix_asistencia_semanal_semana', 'semana', 'unidad', 'valor'),
+    )
+
+    id = Column(String, primary_key=True, default=gen_uuid)
+    unidad = Column(String, nullable=False)
+    semana = Column(Date, nullable=False)      # domingo de la semana
+    valor = Column(Float, nullable=False)
+    fuente = Column(String)                    # 'txt' | 'lcr' | 'manual'
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class LcrSnapshot(Base):
+    """Copia local de un reporte LCR por (tipo, unidad, año) para servir sin consultar LCR en vivo."""
+    __tablename__ = 'lcr_snapshots'
+    __table_args__ = (
+        UniqueConstraint('kind', 'unidad_id', 'year', name='uq_lcr_snapshots_kind_unidad_year'),
+    )
+
+    id = Column(String, primary_key=True, default=gen_uuid)
+    kind = Column(String, nullable=False)          # 'asistencia' | 'jovenes'
+    unidad_id = Column(Integer, nullable=False)    # número de unidad en LCR
+    year = Column(Integer, nullable=False)
+    semanas = Column(JSON, default=dict)           # {"2026-01-04": 123.0, ...} (asistencia)
+    resumen = Column(JSON, default=dict)           # conteos agregados (jóvenes)
+    refreshed_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class AppSetting(Base):
     """Almacena configuraciones simples de la app (clave/valor)."""
     __tablename__ = 'app_settings'
@@ -250,6 +303,9 @@ class CouncilAssignmentsPlan(Base):
 class MeetingMinute(Base):
     """Actas de reuniones por categoría (presidencia o consejo)."""
     __tablename__ = 'meeting_minutes'
+    __table_args__ = (
+        Index('ix_meeting_minutes_category_date', 'category', 'date', 'created_at'),
+    )
 
     id = Column(String, primary_key=True, default=gen_uuid)
     category = Column(String, nullable=False, default='consejo')  # 'presidencia' | 'consejo'
@@ -261,6 +317,38 @@ class MeetingMinute(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+class MeetingChunk(Base):
+    """Fragmentos de actas con su embedding (float32) para la búsqueda semántica."""
+    __tablename__ = 'meeting_chunks'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    meeting_id = Column(String, nullable=False, index=True)
+    category = Column(String)
+    date = Column(String)  # fecha ISO del acta, para filtrar por rango
+    source = Column(String, nullable=False)  # 'summary' | 'transcript'
+    position = Column(Integer, nullable=False, default=0)
+    text = Column(Text, nullable=False)
+    model = Column(String, nullable=False)  # modelo que generó el vector
+    embedding = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class MeetingAnalysis(Base):
+    """Análisis de IA de una reunión: una fila por análisis, consultable por organización y fecha."""
+    __tablename__ = 'meeting_analyses'
+    __table_args__ = (
+        Index('ix_meeting_analyses_org_date', 'org_id', 'date', 'created_at'),
+    )
+
+    id = Column(String, primary_key=True, default=gen_uuid)
+    org_id = Column(String, nullable=False, default='default')
+    meeting_id = Column(String, nullable=False)
+    date = Column(String, nullable=False)           # ISO "YYYY-MM-DD"
+    participants = Column(JSON, default=list)
+    analysis = Column(Text, default='')
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class MapeoColumna(Base):
     """Mapeo de columnas del archivo fuente a campos del modelo"""
     __tablename__ = 'mapeos_columnas'
@@ -287,3 +375,41 @@ class ValorNormalizado(Base):
     categoria = Column(String)  # "activo", "inactivo", "desconocido"
     activo = Column(Boolean, default=True)  # Para deshabilitar reglas
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class DatasetVersion(Base):
+    """Contador de cambios por tabla; alimenta los ETag de los endpoints de lectura."""
+    __tablename__ = 'dataset_versions'
+
+    name = Column(String, primary_key=True)       # nombre de la tabla
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class HistoricoCarga(Base):
+    """Una fila por importación de jóvenes/adultos/misioneros (append-only), con los totales del momento."""
+    __tablename__ = 'historico_cargas'
+    __table_args__ = (
+        Index('ix_historico_cargas_dataset_fecha', 'dataset', 'fecha'),
+    )
+
+    id = Column(String, primary_key=True, default=gen_uuid)
+    dataset = Column(String, nullable=False)       # 'jovenes' | 'adultos' | 'misioneros'
+    fecha = Column(DateTime(timezone=True), nullable=False)
+    total = Column(Integer, nullable=False)
+    real = Column(Integer, nullable=False)         # con recomendación vigente / en el campo
+    archivo_fuente_id = Column(String, ForeignKey('pdf_files.id'))
+
+
+class HistoricoConteo(Base):
+    """Rollup de una carga: cantidad por (unidad, estado). Unas decenas de filas por carga, sin personas."""
+    __tablename__ = 'historico_conteos'
+    __table_args__ = (
+        Index('ix_historico_conteos_carga', 'carga_id', 'unidad'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    carga_id = Column(String, ForeignKey('historico_cargas.id'), nullable=False)
+    unidad = Column(String, nullable=False, default='')
+    estado = Column(String, nullable=False)
+    cantidad = Column(Integer, nullable=False)
@@ -2,8 +2,10 @@
 Módulo de normalización de datos para conversos
 Convierte valores raw de archivos a valores estandarizados
 """
+import calendar
+import re
 from typing import Tuple, Optional
-from datetime import date
+from datetime import date, timedelta
 
 
 # === CATÁLOGOS DE NORMALIZACIÓN ===
@@ -162,6 +164,76 @@ def calcular_edad(fecha_nacimiento: Optional[date], fecha_referencia: Optional[d
     return edad
 
 
+MESES_ABREV = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic']
+VENCE_DIAS_RE = re.compile(r'vencen?\s+en\s+(\d+)\s+d[íi]as?', re.IGNORECASE)
+VENCE_MES_RE = re.compile(r'\b(%s)[a-z]*\.?\s+(\d{4})\b' % '|'.join(MESES_ABREV), re.IGNORECASE)
+
+
+def parsear_vencimiento(
+    vencimiento_raw: Optional[str],
+    estado_raw: Optional[str] = None,
+    fecha_referencia: Optional[date] = None
+) -> Optional[date]:
+    """
+    Fecha de vencimiento de una recomendación a partir del texto de LCR
+    
+    - "mar. 2026" / "Vencen en feb. 2026" → último día de ese mes
+    - "Vencen en 15 días" → fecha_referencia (día de la importación) + 15 días
+    
+    Busca primero en vencimiento_raw y después en estado_raw (el PDF a veces
+    deja el texto completo en la columna de estado). None si no hay fecha.
+    """
+    for texto in (vencimiento_raw, estado_raw):
+        if not texto:
+            continue
+        m = VENCE_MES_RE.search(str(texto))
+        if m:
+            year, month = int(m.group(2)), MESES_ABREV.index(m.group(1).lower()) + 1
+            return date(year, month, calendar.monthrange(year, month)[1])
+    for texto in (vencimiento_raw, estado_raw):
+        if not texto:
+            continue
+        m = VENCE_DIAS_RE.search(str(texto))
+        if m:
+            return (fecha_referencia or date.today()) + timedelta(days=int(m.group(1)))
+    return None
+
+
+FECHA_LCR_RE = re.compile(r'\b(\d{1,2})\s+([a-záéíóú]{3,})\.?\s+(\d{4})\b', re.IGNORECASE)
+FECHA_ISO_RE = re.compile(r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b')
+FECHA_DMA_RE = re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b')
+
+
+def parsear_fecha_lcr(texto: Optional[str]) -> Optional[date]:
+    """
+    Fecha de un campo de texto de LCR / portal de miembros
+    
+    - "3 ene 2025", "3 ene. 2025", "15 agosto 2026", "1 set 2025"
+    - "2025-01-03" (Excel, también con hora) o "03/01/2025" (día primero)
+    
+    None si no hay fecha completa o no es válida.
+    """
+    if not texto:
+        return None
+    texto = str(texto)
+    try:
+        m = FECHA_LCR_RE.search(texto)
+        if m:
+            mes = m.group(2).lower()[:3]
+            mes = 'sep' if mes == 'set' else mes
+            if mes in MESES_ABREV:
+                return date(int(m.group(3)), MESES_ABREV.index(mes) + 1, int(m.group(1)))
+        m = FECHA_ISO_RE.search(texto)
+        if m:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        m = FECHA_DMA_RE.search(texto)
+        if m:
+            return date(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+    except ValueError:
+        return None
+    return None
+
+
 def es_elegible_recomendacion(edad: Optional[int]) -> Optional[bool]:
     """
     Determina si es elegible para recomendación (mayor de 8 años)
@@ -0,0 +1,176 @@
+"""
+Calendario de periodos de KPI (mes, trimestre, año).
+
+Las filas de `periodos` se leen una vez por versión y se indexan por nombre exacto y por clave
+canónica (tipo, año, número). A la clave se llega desde cualquier alias aceptado:
+"2026", "Q1 2026", "2026-Q1", "2026 Q1", "2026q1", "Enero 2026", "enero-2026".
+Un texto reconocible que no está en la base se resuelve con un periodo virtual, que
+siempre es el mismo para el mismo texto. Resolver un periodo es un dict lookup; el
+parseo del texto queda en un lru_cache.
+
+El índice es por proceso y va atado a la versión de `periodos` en dataset_versions (igual
+que el almacén de columnar): se recarga cuando otro proceso, worker o script crea periodos.
+Por pedido cuesta solo leer esa versión (una fila por clave primaria).
+"""
+import re
+import threading
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import DatasetVersion, PeriodoKPI
+
+MESES = (
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre',
+)
+NUMERO_MES = {**{mes.lower(): i for i, mes in enumerate(MESES, start=1)}, 'setiembre': 9}
+
+ANIO_RE = re.compile(r"^(\d{4})$")
+TRIMESTRE_RE = re.compile(r"^(?:(\d{4})\s*q([1-4])|q([1-4])\s*(\d{4}))$")
+MES_RE = re.compile(r"^(?:([a-zñ]+) (\d{4})|(\d{4}) ([a-zñ]+))$")
+
+Clave = Tuple[str, int, int]  # (tipo, año, número de mes/trimestre; 0 para el año)
+
+
+@dataclass(frozen=True)
+class Periodo:
+    id: str
+    nombre: str
+    tipo: str
+    fecha_inicio: date
+    fecha_fin: date
+    year: int
+    created_at: Optional[datetime] = None
+
+
+def _normalizar(texto: str) -> str:
+    return " ".join(texto.strip().lower().replace("-", " ").split())
+
+
+@lru_cache(maxsize=1024)
+def clave(texto: str) -> Optional[Clave]:
+    """Clave canónica de un nombre de periodo, o None si no se reconoce."""
+    normalizado = _normalizar(texto)
+
+    match = ANIO_RE.match(normalizado)
+    if match:
+        return ('año', int(match.group(1)), 0)
+
+    match = TRIMESTRE_RE.match(normalizado)
+    if match:
+        return ('trimestre', int(match.group(1) or match.group(4)), int(match.group(2) or match.group(3)))
+
+    match = MES_RE.match(normalizado)
+    if match:
+        mes = NUMERO_MES.get(match.group(1) or match.group(4))
+        if mes:
+            return ('mes', int(match.group(2) or match.group(3)), mes)
+
+    return None
+
+
+def rango(clave_periodo: Clave) -> Tuple[date, date]:
+    tipo, year, numero = clave_periodo
+    if tipo == 'año':
+        return date(year, 1, 1), date(year, 12, 31)
+    primer_mes, ultimo_mes = (numero, numero) if tipo == 'mes' else ((numero - 1) * 3 + 1, numero * 3)
+    return date(year, primer_mes, 1), date(year, ultimo_mes, monthrange(year, ultimo_mes)[1])
+
+
+def periodos_del_anio(year: int) -> List[Dict]:
+    """Los 17 periodos estándar del año (12 meses, 4 trimestres, el año) como columnas de PeriodoKPI."""
+    claves = [
+        *((f"{MESES[mes - 1]} {year}", ('mes', year, mes)) for mes in range(1, 13)),
+        *((f"Q{q} {year}", ('trimestre', year, q)) for q in range(1, 5)),
+        (str(year), ('año', year, 0)),
+    ]
+    periodos = []
+    for nombre, clave_periodo in claves:
+        inicio, fin = rango(clave_periodo)
+        periodos.append({'nombre': nombre, 'tipo': clave_periodo[0], 'fecha_inicio': inicio, 'fecha_fin': fin, 'year': year})
+    return periodos
+
+
+@lru_cache(maxsize=1024)
+def _virtual(texto: str) -> Optional[Periodo]:
+    clave_periodo = clave(texto)
+    if clave_periodo is None:
+        return None
+    inicio, fin = rango(clave_periodo)
+    return Periodo(
+        id=f"virtual-{texto}",
+        nombre=texto,
+        tipo=clave_periodo[0],
+        fecha_inicio=inicio,
+        fecha_fin=fin,
+        year=clave_periodo[1],
+    )
+
+
+# ── Índice de periodos guardados ──────────────────────────────────────────────
+
+Indice = Tuple[Dict[str, Periodo], Dict[Clave, Periodo]]
+
+_lock = threading.Lock()
+_cache: Dict[str, Tuple[int, Indice]] = {}
+
+
+def _leer(session: Session) -> Indice:
+    por_nombre: Dict[str, Periodo] = {}
+    por_clave: Dict[Clave, Periodo] = {}
+    for row in session.execute(select(PeriodoKPI).order_by(PeriodoKPI.fecha_inicio, PeriodoKPI.created_at)).scalars():
+        periodo = Periodo(
+            id=row.id, nombre=row.nombre, tipo=row.tipo, fecha_inicio=row.fecha_inicio,
+            fecha_fin=row.fecha_fin, year=row.year, created_at=row.created_at,
+        )
+        por_nombre.setdefault(periodo.nombre, periodo)
+        clave_periodo = clave(periodo.nombre)
+        if clave_periodo is not None:
+            por_clave.setdefault(clave_periodo, periodo)
+    return por_nombre, por_clave
+
+
+def _indice(session: Session) -> Indice:
+    """Índice para la versión actual de `periodos` (armado una vez por versión)."""
+    table = PeriodoKPI.__tablename__
+    # Cambios sin confirmar en esta sesión: armar sin cachear (podrían deshacerse).
+    if table in session.info.get('dataset_versions_bumped', ()):
+        return _leer(session)
+
+    version = session.execute(select(DatasetVersion.version).where(DatasetVersion.name == table)).scalar() or 0
+    cached = _cache.get(table)
+    if cached and cached[0] == version:
+        return cached[1]
+    with _lock:
+        cached = _cache.get(table)
+        if cached and cached[0] == version:
+            return cached[1]
+        indice = _leer(session)
+        _cache[table] = (version, indice)
+        return indice
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
+
+
+def resolver(session: Session, texto: str) -> Optional[Periodo]:
+    """
+    Nombre exacto guardado, después cualquier alias de un periodo guardado y por último
+    el periodo virtual del texto. None si el texto no es un periodo reconocible.
+    """
+    por_nombre, por_clave = _indice(session)
+    periodo = por_nombre.get(texto)
+    if periodo is not None:
+        return periodo
+    clave_periodo = clave(texto)
+    if clave_periodo is not None and clave_periodo in por_clave:
+        return por_clave[clave_periodo]
+    return _virtual(texto.strip())
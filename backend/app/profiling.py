@@ -0,0 +1,326 @@
+"""
+Perfilado opt-in de pedidos individuales.
+
+- A pedido: header `X-Profile: <PROFILING_TOKEN>` perfila ese pedido. El token va solo en
+  el header, nunca en la URL (quedaría en el access log y en los proxies). Con `X-Profile-Output: inline` (o `?_profile_output=inline`) la respuesta es
+  el perfil en lugar del JSON normal; si no, se guarda y se devuelve `X-Profile-Id`.
+- Muestreo: con PROFILING_SAMPLE_RATE=N se perfila 1 de cada N pedidos a las rutas de
+  PROFILING_PATHS (por defecto KPIs e imports).
+
+Cada perfil guarda en PROFILING_DIR el volcado del profiler (.prof de cProfile o .html de
+pyinstrument si está instalado) y un .json con la duración y el log de SQL del pedido
+(sentencia, ms y filas). El directorio rota y conserva los últimos PROFILING_MAX_FILES.
+
+cProfile mide todo el hilo del event loop: si hay otros pedidos en curso pueden aparecer
+en el perfil. pyinstrument (async_mode) atribuye el tiempo solo al pedido perfilado.
+"""
+import contextvars
+import cProfile
+import hmac
+import io
+import itertools
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+from typing import Optional
+from urllib.parse import parse_qs
+
+from fastapi import Header, HTTPException
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '').strip()
+PROFILING_SAMPLE_RATE = int(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_DIR = os.getenv('PROFILING_DIR', '/tmp/profiles')
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', '200'))
+PROFILING_ENGINE = os.getenv('PROFILING_ENGINE', 'auto').strip().lower()  # auto | cprofile | pyinstrument
+PROFILING_PATHS = tuple(
+    p.strip() for p in os.getenv(
+        'PROFILING_PATHS',
+        '/api/kpis,/api/conversos/import,/api/conversos/confirmar,'
+        '/api/jovenes/upload,/api/adultos/upload,/api/misioneros/upload',
+    ).split(',') if p.strip()
+)
+
+MAX_SQL_STATEMENTS = 500
+MAX_SQL_CHARS = 2000
+
+# Log de SQL del pedido perfilado (None = no se está perfilando).
+_sql_log: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar('profiling_sql_log', default=None)
+_sample_counter = itertools.count(1)
+# cProfile y pyinstrument usan el hook de profiling del intérprete: uno por vez.
+_profiler_lock = threading.Lock()
+
+
+# ── Log de SQL ────────────────────────────────────────────────────────────────
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _sql_log.get() is not None:
+        conn.info.setdefault('profiling_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _sql_log.get()
+    started = conn.info.get('profiling_started')
+    if log is None or not started:
+        return
+    elapsed = (time.perf_counter() - started.pop()) * 1000
+    if len(log) < MAX_SQL_STATEMENTS:
+        rowcount = getattr(cursor, 'rowcount', -1)
+        log.append({
+            'sql': ' '.join(statement.split())[:MAX_SQL_CHARS],
+            'ms': round(elapsed, 2),
+            # SQLite devuelve -1 en los SELECT; Postgres informa las filas leídas.
+            'rows': rowcount if rowcount is not None and rowcount >= 0 else None,
+            'executemany': executemany,
+        })
+
+
+# ── Profilers ─────────────────────────────────────────────────────────────────
+
+def _engine_name(requested: Optional[str]) -> str:
+    name = (requested or PROFILING_ENGINE or 'auto').lower()
+    if name in ('auto', 'pyinstrument'):
+        try:
+            import pyinstrument  # noqa: F401
+            return 'pyinstrument'
+        except ImportError:
+            return 'cprofile'
+    return 'cprofile'
+
+
+class _Profiler:
+    def __init__(self, engine: str):
+        self.engine = engine
+        if engine == 'pyinstrument':
+            from pyinstrument import Profiler
+            self._impl = Profiler(async_mode='enabled')
+        else:
+            self._impl = cProfile.Profile()
+
+    def start(self):
+        if self.engine == 'pyinstrument':
+            self._impl.start()
+        else:
+            self._impl.enable()
+
+    def stop(self):
+        if self.engine == 'pyinstrument':
+            self._impl.stop()
+        else:
+            self._impl.disable()
+
+    def text(self, limit: int = 40) -> str:
+        if self.engine == 'pyinstrument':
+            return self._impl.output_text(unicode=True, show_all=False)
+        buf = io.StringIO()
+        pstats.Stats(self._impl, stream=buf).sort_stats('cumulative').print_stats(limit)
+        return buf.getvalue()
+
+    def html(self) -> Optional[str]:
+        return self._impl.output_html() if self.engine == 'pyinstrument' else None
+
+    def dump(self, base_path: str) -> str:
+        if self.engine == 'pyinstrument':
+            path = base_path + '.html'
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write(self._impl.output_html())
+        else:
+            path = base_path + '.prof'
+            self._impl.dump_stats(path)
+        return os.path.basename(path)
+
+
+# ── Almacenamiento ────────────────────────────────────────────────────────────
+
+def _rotate() -> None:
+    try:
+        metas = sorted(f for f in os.listdir(PROFILING_DIR) if f.endswith('.json'))
+    except FileNotFoundError:
+        return
+    for meta in metas[:max(len(metas) - PROFILING_MAX_FILES, 0)]:
+        stem = meta[:-5]
+        for ext in ('.json', '.prof', '.html'):
+            try:
+                os.remove(os.path.join(PROFILING_DIR, stem + ext))
+            except FileNotFoundError:
+                pass
+
+
+def _store(profile_id: str, profiler: Optional[_Profiler], info: dict) -> None:
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    base_path = os.path.join(PROFILING_DIR, profile_id)
+    if profiler:
+        info['archivo'] = profiler.dump(base_path)
+        info['resumen'] = profiler.text(limit=30)
+    with open(base_path + '.json', 'w', encoding='utf-8') as fh:
+        json.dump(info, fh, ensure_ascii=False, indent=1)
+    _rotate()
+
+
+def list_profiles(limit: int = 50) -> list:
+    try:
+        metas = sorted((f for f in os.listdir(PROFILING_DIR) if f.endswith('.json')), reverse=True)
+    except FileNotFoundError:
+        return []
+    items = []
+    for name in metas[:limit]:
+        try:
+            with open(os.path.join(PROFILING_DIR, name), encoding='utf-8') as fh:
+                info = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        info.pop('resumen', None)
+        info['sql'] = {k: v for k, v in info.get('sql', {}).items() if k != 'sentencias'}
+        items.append(info)
+    return items
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Ruta de un archivo de perfil (solo nombres generados por este módulo)."""
+    if os.path.basename(name) != name or not name.endswith(('.json', '.prof', '.html')):
+        return None
+    path = os.path.join(PROFILING_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def _token_valido(token: Optional[str]) -> bool:
+    if not PROFILING_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), PROFILING_TOKEN.encode('utf-8'))
+
+
+def require_profiling_token(x_profile: Optional[str] = Header(None)):
+    """Dependencia para los endpoints que exponen perfiles (token en el header X-Profile)."""
+    if not _token_valido(x_profile):
+        raise HTTPException(status_code=403, detail='Perfilado no habilitado')
+
+
+# ── Middleware ────────────────────────────────────────────────────────────────
+
+def _summarize_sql(log: list) -> dict:
+    total = sum(q['ms'] for q in log)
+    by_sql: dict = {}
+    for q in log:
+        agg = by_sql.setdefault(q['sql'], {'sql': q['sql'], 'veces': 0, 'ms': 0.0})
+        agg['veces'] += 1
+        agg['ms'] = round(agg['ms'] + q['ms'], 2)
+    return {
+        'consultas': len(log),
+        'ms': round(total, 1),
+        'mas_costosas': sorted(by_sql.values(), key=lambda a: a['ms'], reverse=True)[:10],
+        'sentencias': log,
+    }
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI; sin token ni muestreo configurado no agrega trabajo por pedido."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _decide(self, scope) -> Optional[dict]:
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        if PROFILING_TOKEN:
+            if _token_valido(headers.get('x-profile')):
+                return {
+                    'motivo': 'pedido',
+                    'inline': (headers.get('x-profile-output') or (query.get('_profile_output') or [''])[0]) == 'inline',
+                    'engine': headers.get('x-profile-engine') or (query.get('_profile_engine') or [None])[0],
+                }
+        if PROFILING_SAMPLE_RATE > 0 and scope['path'].startswith(PROFILING_PATHS):
+            if next(_sample_counter) % PROFILING_SAMPLE_RATE == 0:
+                return {'motivo': 'muestreo', 'inline': False, 'engine': None}
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not (PROFILING_TOKEN or PROFILING_SAMPLE_RATE > 0):
+            await self.app(scope, receive, send)
+            return
+        options = self._decide(scope)
+        if options is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        status = {'code': None}
+        buffered = []
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                if not options['inline']:
+                    message.setdefault('headers', [])
+                    message['headers'] = list(message['headers']) + [(b'x-profile-id', profile_id.encode())]
+            if options['inline']:
+                buffered.append(message)
+            else:
+                await send(message)
+
+        profiler = None
+        if _profiler_lock.acquire(blocking=False):
+            profiler = _Profiler(_engine_name(options['engine']))
+        log: list = []
+        token = _sql_log.set(log)
+        started = time.perf_counter()
+        try:
+            if profiler:
+                profiler.start()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler:
+                profiler.stop()
+                _profiler_lock.release()
+            _sql_log.reset(token)
+
+        info = {
+            'id': profile_id,
+            'motivo': options['motivo'],
+            'metodo': scope['method'],
+            'ruta': scope['path'],
+            'query': scope.get('query_string', b'').decode('latin-1'),
+            'status': status['code'],
+            'duracion_ms': round((time.perf_counter() - started) * 1000, 1),
+            'profiler': profiler.engine if profiler else None,
+            'sql': _summarize_sql(log),
+        }
+        try:
+            _store(profile_id, profiler, info)
+        except OSError as exc:
+            logging.warning("[PROFILE] No se pudo guardar %s: %s", profile_id, exc)
+        logging.info(
+            "[PROFILE] %s %s %s ms, %s consultas (%s ms SQL) -> %s",
+            info['metodo'], info['ruta'], info['duracion_ms'], info['sql']['consultas'], info['sql']['ms'], profile_id,
+        )
+
+        if options['inline']:
+            html = profiler.html() if profiler else None
+            if html is not None:
+                body, content_type = html.encode('utf-8'), b'text/html; charset=utf-8'
+            else:
+                sql_text = '\n'.join(
+                    f"{q['ms']:>9.2f} ms  x{q['veces']:<4} {q['sql'][:200]}" for q in info['sql']['mas_costosas']
+                )
+                body = (
+                    f"{info['metodo']} {info['ruta']} -> {info['status']} en {info['duracion_ms']} ms\n"
+                    f"SQL: {info['sql']['consultas']} consultas, {info['sql']['ms']} ms\n\n{sql_text}\n\n"
+                    + (profiler.text() if profiler else 'Profiler ocupado por otro pedido; solo se registró el SQL.\n')
+                ).encode('utf-8')
+                content_type = b'text/plain; charset=utf-8'
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', content_type),
+                    (b'content-length', str(len(body)).encode()),
+                    (b'x-profile-id', profile_id.encode()),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': body})
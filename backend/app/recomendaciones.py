@@ -0,0 +1,237 @@
+"""
+KPI de recomendación (jóvenes y adultos) agregado en la base.
+
+El KPI sale de un solo SELECT estado_normalizado, COUNT(*) ... GROUP BY (opcionalmente
+también por unidad o sexo), así el costo no depende del tamaño de las listas. Las
+personas se piden aparte, por estado y paginadas, solo cuando se abre el detalle.
+El desglose por unidad, sexo y banda de edad sale también de una sola consulta agrupada.
+El pronóstico de vencimientos es un rango sobre el índice (estado, vencimiento_fecha, unidad).
+
+Estados vacíos o fuera de la lista del indicador cuentan como sin_estado.
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, case, func, literal_column, not_, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .dataset_versions import bump
+from .models import AdultoRecomendacion, JovenRecomendacion
+from .normalizacion import parsear_vencimiento
+
+ESTADO_SIN_EST = 'sin_estado'
+ESTADOS_REALES = ('activa', 'vence_pronto')
+DESGLOSES = ('unidad', 'sexo')
+LIMITE_PERSONAS = 50
+LIMITE_PERSONAS_MAX = 500
+SIN_EDAD = 'sin_edad'
+HORIZONTES_DIAS = (30, 60, 90)
+HORIZONTE_MAX = 366
+
+
+def _estado(valor: Optional[str], estados: List[str]) -> str:
+    return valor if valor in estados else ESTADO_SIN_EST
+
+
+def _resumen(desglose: Dict[str, int]) -> Dict:
+    real = sum(desglose.get(e, 0) for e in ESTADOS_REALES)
+    potencial = sum(desglose.values())
+    return {
+        "real": real,
+        "potencial": potencial,
+        "porcentaje": round(real / potencial * 100, 1) if potencial > 0 else 0,
+    }
+
+
+async def kpi(session: AsyncSession, model, estados: List[str], por: Optional[str] = None) -> Dict:
+    """
+    real / potencial / porcentaje y desglose por estado. Con `por` ('unidad' o 'sexo')
+    agrega el mismo cálculo por cada valor de esa columna (sin valor → '').
+    """
+    if por is not None and por not in DESGLOSES:
+        raise HTTPException(status_code=400, detail=f"Desglose inválido: {por}. Opciones: {', '.join(DESGLOSES)}")
+
+    columnas = [model.estado_normalizado]
+    if por:
+        columnas.insert(0, getattr(model, por))
+    rows = (await session.execute(
+        select(*columnas, func.count()).group_by(*columnas)
+    )).all()
+
+    desglose = {e: 0 for e in estados}
+    grupos: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        *clave, estado, cantidad = row
+        estado = _estado(estado, estados)
+        desglose[estado] += cantidad
+        if por:
+            grupo = grupos.setdefault(clave[0] or '', {e: 0 for e in estados})
+            grupo[estado] += cantidad
+
+    resultado = {**_resumen(desglose), "desglose": desglose}
+    if por:
+        resultado[f"por_{por}"] = [
+            {por: valor, **_resumen(grupo), "desglose": grupo}
+            for valor, grupo in sorted(grupos.items())
+        ]
+    return resultado
+
+
+async def personas(
+    session: AsyncSession,
+    model,
+    estados: List[str],
+    estado: List[str],
+    offset: int = 0,
+    limit: int = LIMITE_PERSONAS,
+) -> Dict:
+    """Página de personas en los estados pedidos, ordenadas por nombre."""
+    invalidos = [e for e in estado if e not in estados]
+    if invalidos or not estado:
+        raise HTTPException(status_code=400, detail=f"Estado inválido: {', '.join(invalidos) or '(vacío)'}. Opciones: {', '.join(estados)}")
+    limit = max(1, min(limit, LIMITE_PERSONAS_MAX))
+    offset = max(0, offset)
+
+    condiciones = [model.estado_normalizado.in_([e for e in estado if e != ESTADO_SIN_EST])]
+    if ESTADO_SIN_EST in estado:
+        conocidos = [e for e in estados if e != ESTADO_SIN_EST]
+        condiciones.append(or_(model.estado_normalizado.is_(None), not_(model.estado_normalizado.in_(conocidos))))
+    filtro = or_(*condiciones)
+
+    total = (await session.execute(select(func.count()).select_from(model).where(filtro))).scalar_one()
+    rows = (await session.execute(
+        select(model.nombre, model.unidad, model.vencimiento_raw, model.estado_raw)
+        .where(filtro)
+        .order_by(model.nombre, model.id)
+        .offset(offset)
+        .limit(limit)
+    )).all()
+    return {
+        "estado": estado,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "personas": [
+            {"nombre": r.nombre, "unidad": r.unidad or '', "vencimiento": r.vencimiento_raw or '', "estado": r.estado_raw or ''}
+            for r in rows
+        ],
+    }
+
+
+def _banda_edad(columna, bandas: List[tuple]):
+    """CASE con la etiqueta de la banda; bandas = [(etiqueta, edad_maxima o None), ...] en orden."""
+    whens = [(columna.is_(None), SIN_EDAD)]
+    whens += [(columna <= maxima, etiqueta) for etiqueta, maxima in bandas if maxima is not None]
+    abierta = next((etiqueta for etiqueta, maxima in bandas if maxima is None), bandas[-1][0])
+    return case(*whens, else_=abierta)
+
+
+def _filas(grupos: Dict[str, Dict[str, int]], clave: str, orden: Optional[List[str]] = None) -> List[Dict]:
+    valores = orden if orden is not None else sorted(grupos)
+    return [{clave: valor, **_resumen(grupos[valor]), "desglose": grupos[valor]} for valor in valores if valor in grupos]
+
+
+async def desglose(session: AsyncSession, model, estados: List[str], bandas: List[tuple]) -> Dict:
+    """
+    Conteos por estado para cada unidad, sexo y banda de edad, con una sola consulta
+    GROUP BY unidad, sexo, banda, estado (a lo sumo unidades × 3 × bandas × estados filas).
+    """
+    banda = _banda_edad(model.edad, bandas).label('banda')
+    columnas = [model.unidad, model.sexo, banda, model.estado_normalizado]
+    # GROUP BY por nombre de la columna de salida: con asyncpg el CASE repetido llevaría
+    # parámetros distintos ($n) y Postgres no lo reconocería como la misma expresión.
+    rows = (await session.execute(
+        select(*columnas, func.count())
+        .group_by(model.unidad, model.sexo, literal_column('banda'), model.estado_normalizado)
+    )).all()
+
+    dimensiones = {"unidad": {}, "sexo": {}, "edad": {}}
+    for unidad, sexo, banda_valor, estado, cantidad in rows:
+        estado = _estado(estado, estados)
+        sexo = (sexo or '').strip().upper()
+        for nombre, valor in (("unidad", unidad or ''), ("sexo", sexo), ("edad", banda_valor)):
+            grupo = dimensiones[nombre].setdefault(valor, {e: 0 for e in estados})
+            grupo[estado] += cantidad
+
+    return {
+        "estados": estados,
+        "por_unidad": _filas(dimensiones["unidad"], "unidad"),
+        "por_sexo": _filas(dimensiones["sexo"], "sexo"),
+        "por_edad": _filas(dimensiones["edad"], "banda", [etiqueta for etiqueta, _ in bandas] + [SIN_EDAD]),
+    }
+
+
+async def vencimientos(session: AsyncSession, model, horizontes: List[int], hoy: Optional[date] = None) -> Dict:
+    """
+    Recomendaciones vigentes (activa / vence_pronto) que vencen en los próximos N días,
+    acumulado por horizonte y por unidad. Rango sobre (estado, vencimiento_fecha) indexado,
+    agrupado por unidad y fecha: a lo sumo unidades × días filas.
+    """
+    horizontes = sorted({h for h in horizontes if h > 0})
+    if not horizontes or horizontes[-1] > HORIZONTE_MAX:
+        raise HTTPException(status_code=400, detail=f"Horizontes inválidos; entre 1 y {HORIZONTE_MAX} días")
+    hoy = hoy or date.today()
+    hasta = hoy + timedelta(days=horizontes[-1])
+
+    rows = (await session.execute(
+        select(model.unidad, model.vencimiento_fecha, func.count())
+        .where(
+            model.vencimiento_fecha >= hoy,
+            model.vencimiento_fecha <= hasta,
+            model.estado_normalizado.in_(ESTADOS_REALES),
+        )
+        .group_by(model.unidad, model.vencimiento_fecha)
+    )).all()
+
+    claves = [f"{h}_dias" for h in horizontes]
+    total = dict.fromkeys(claves, 0)
+    por_unidad: Dict[str, Dict[str, int]] = {}
+    for unidad, fecha, cantidad in rows:
+        dias = (fecha - hoy).days
+        grupo = por_unidad.setdefault(unidad or '', dict.fromkeys(claves, 0))
+        for h, clave in zip(horizontes, claves):
+            if dias <= h:
+                grupo[clave] += cantidad
+                total[clave] += cantidad
+
+    return {
+        "fecha_referencia": hoy,
+        "horizontes": horizontes,
+        "total": total,
+        "por_unidad": [{"unidad": unidad, **conteos} for unidad, conteos in sorted(por_unidad.items())],
+    }
+
+
+def backfill_vencimientos(engine: Engine, batch: int = 1000) -> int:
+    """
+    Completa vencimiento_fecha de filas importadas antes de que existiera la columna.
+    "Vencen en N días" se calcula desde la fecha de carga (created_at).
+    """
+    total = 0
+    for model in (JovenRecomendacion, AdultoRecomendacion):
+        table = model.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam('row_id'))
+            .values(vencimiento_fecha=bindparam('fecha'))
+        )
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.vencimiento_raw, table.c.estado_raw, table.c.created_at)
+                .where(table.c.vencimiento_fecha.is_(None))
+                .where(or_(table.c.vencimiento_raw.isnot(None), table.c.estado_raw.isnot(None)))
+            ).all()
+            updates = []
+            for row in rows:
+                referencia = row.created_at.date() if row.created_at else None
+                fecha = parsear_vencimiento(row.vencimiento_raw, row.estado_raw, referencia)
+                if fecha:
+                    updates.append({'row_id': row.id, 'fecha': fecha})
+            for i in range(0, len(updates), batch):
+                conn.execute(stmt, updates[i:i + batch])
+            if updates:
+                bump(conn, [table.name])
+        total += len(updates)
+    return total
@@ -0,0 +1,171 @@
+"""
+Serialización JSON con orjson y compresión de respuestas.
+
+- ORJSONResponse: clase de respuesta por defecto de la app. orjson serializa date,
+  datetime, UUID y dataclasses de forma nativa; Decimal y numpy se convierten en `_default`
+  y cualquier otro objeto es un TypeError.
+- fast_json(): para endpoints con payloads grandes (listas de personas). Devuelve la
+  respuesta ya armada y así se saltea jsonable_encoder, que es lo más caro del camino
+  normal de FastAPI. Copia los headers que las dependencias pusieron en `response`
+  (por ejemplo ETag/Cache-Control de conditional_get).
+- CompressionMiddleware: brotli (si está instalado) o gzip según Accept-Encoding,
+  solo para respuestas de texto/JSON de al menos COMPRESSION_MIN_SIZE bytes.
+"""
+import dataclasses
+import gzip
+import os
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli se usa gzip
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '5'))
+# Calidad 4-5 comprime mejor que gzip 6 y es más rápida; 11 es solo para estáticos.
+BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml',
+)
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'tolist'):  # numpy
+        return value.tolist()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):  # periodos.Periodo
+        return dataclasses.asdict(value)
+    # Cualquier otro objeto (p. ej. una instancia ORM devuelta por error) falla en vez de
+    # volcar sus atributos internos.
+    raise TypeError(f'{type(value).__name__} no es serializable a JSON')
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = 'application/json'
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def fast_json(content: Any, response: Optional[Response] = None, status_code: int = 200) -> ORJSONResponse:
+    headers = dict(response.headers) if response is not None else None
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
+
+
+# ── Compresión ────────────────────────────────────────────────────────────────
+
+def _accepted(headers: list) -> Optional[str]:
+    accept = ''
+    for key, value in headers:
+        if key == b'accept-encoding':
+            accept = value.decode('latin-1').lower()
+            break
+    codings = {part.split(';')[0].strip() for part in accept.split(',')}
+    if brotli is not None and 'br' in codings:
+        return 'br'
+    if 'gzip' in codings:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _vary(raw_headers: list) -> list:
+    """Headers con Accept-Encoding agregado a Vary (sin duplicarlo)."""
+    vary = b''
+    rest = []
+    for key, value in raw_headers:
+        if key.lower() == b'vary':
+            vary = value
+        else:
+            rest.append((key, value))
+    if b'accept-encoding' in vary.lower() or vary.strip() == b'*':
+        return raw_headers
+    return rest + [(b'vary', vary + b', Accept-Encoding' if vary else b'Accept-Encoding')]
+
+
+def _weak_etag(raw_headers: list) -> list:
+    """El cuerpo comprimido no es byte a byte el mismo: su ETag pasa a débil (W/)."""
+    return [
+        (k, b'W/' + v if k.lower() == b'etag' and not v.startswith(b'W/') else v)
+        for k, v in raw_headers
+    ]
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI. Junta el cuerpo de la respuesta (las de la API son de un solo
+    mensaje); las respuestas en streaming pasan sin comprimir.
+
+    Toda respuesta de tipo comprimible lleva Vary: Accept-Encoding, se comprima o no,
+    para que un caché compartido no sirva la copia sin comprimir a quien acepta br/gzip
+    (ni al revés). Al comprimir, el ETag se vuelve débil; conditional_get acepta W/.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted(scope.get('headers', []))
+        start: dict = {}
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+            if message['type'] != 'http.response.body' or not start:
+                await send(message)
+                return
+
+            headers = {k.lower(): v for k, v in start.get('headers', [])}
+            body = message.get('body', b'')
+            content_type = headers.get(b'content-type', b'').decode('latin-1')
+            compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+            raw_headers = start.get('headers', [])
+            if start.get('status') == 304 and b'etag' in headers:
+                # Mismos Vary/ETag que tendría el 200 para este Accept-Encoding
+                raw_headers = _vary(raw_headers)
+                if encoding is not None:
+                    raw_headers = _weak_etag(raw_headers)
+            elif compressible:
+                raw_headers = _vary(raw_headers)
+            if (
+                encoding is None
+                or not compressible
+                or message.get('more_body')
+                or b'content-encoding' in headers
+                or len(body) < self.minimum_size
+            ):
+                await send({**start, 'headers': raw_headers})
+                start = {}
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            raw_headers = [(k, v) for k, v in _weak_etag(raw_headers) if k.lower() != b'content-length']
+            raw_headers += [
+                (b'content-encoding', encoding.encode()),
+                (b'content-length', str(len(compressed)).encode()),
+            ]
+            await send({**start, 'headers': raw_headers})
+            start = {}
+            await send({**message, 'body': compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,16 +1,21 @@
 """
 Rutas para gestión de Adultos Investidos con Recomendación: upload e importación
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, Query, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import pandas as pd
-import io
+from datetime import date, datetime
+from functools import partial
 import re
 import os
-import pdfplumber
+from typing import List, Optional, TYPE_CHECKING
 
-from . import db
-from .models import PdfFile, AdultoRecomendacion
+from . import db, historico, importacion, importacion_recomendaciones, recomendaciones
+from .dataset_versions import conditional_get
+from .models import HistoricoCarga, HistoricoConteo, AdultoRecomendacion
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 router = APIRouter(prefix='/adultos', tags=['adultos'])
 
@@ -50,67 +55,46 @@ MESES = r'(?:ene|feb|mar|abr|may|jun|jul|ago|sep|oct|nov|dic)'
 VENCE_RE = re.compile(rf'Vencen?\s+en\s+(?:\d+\s+d[íi]as?|{MESES}\.?\s+\d{{4}})', re.IGNORECASE)
 MES_ANIO_RE = re.compile(rf'{MESES}\.?\s+\d{{4}}', re.IGNORECASE)
 
-def _parse_adultos_pdf(contents: bytes) -> pd.DataFrame:
+ESTADOS_PDF = [
+    'extraviada o robada', 'extraviado o robado',
+    'no ha sido bautizado', 'no bautizado',
+    'vencen en', 'vence en',
+    'cancelada', 'cancelado',
+    'vencida', 'vencido',
+    'activa', 'vigente',
+]
+MES_ANIO_FULL = re.compile(
+    r'\b(ene|feb|mar|abr|may|jun|jul|ago|sep|oct|nov|dic)\.?\s+\d{4}\b',
+    re.IGNORECASE
+)
+UNIDAD_RE = re.compile(
+    r'\b(Barrio|Rama|Distrito|Estaca)\s+[\w\s]+$',
+    re.IGNORECASE
+)
+SKIP_STARTS = (
+    'nombre', 'estado de la recomendaci',
+    'para uso exclusivo', 'derechos reservados',
+    'intellectual reserve', 'estaca montevideo',
+    'recuento:', 'total:',
+)
+
+
+def _parse_adultos_pdf(contents: bytes) -> "pd.DataFrame":
     """
     Extrae lista de adultos investidos con recomendación con extract_text
     para evitar que las filas con fondo de color sean ignoradas.
     """
-    ESTADOS = [
-        'extraviada o robada', 'extraviado o robado',
-        'no ha sido bautizado', 'no bautizado',
-        'vencen en', 'vence en',
-        'cancelada', 'cancelado',
-        'vencida', 'vencido',
-        'activa', 'vigente',
-    ]
-    MES_ANIO_FULL = re.compile(
-        r'\b(ene|feb|mar|abr|may|jun|jul|ago|sep|oct|nov|dic)\.?\s+\d{4}\b',
-        re.IGNORECASE
-    )
-    UNIDAD_RE = re.compile(
-        r'\b(Barrio|Rama|Distrito|Estaca)\s+[\w\s]+$',
-        re.IGNORECASE
-    )
-    SKIP_STARTS = [
-        'nombre', 'estado de la recomendaci',
-        'para uso exclusivo', 'derechos reservados',
-        'intellectual reserve', 'estaca montevideo',
-        'recuento:', 'total:',
-    ]
-
-    records = []
-
-    with pdfplumber.open(io.BytesIO(contents)) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            text = page.extract_text(x_tolerance=3, y_tolerance=3)
-            if not text:
-                continue
-            lines = text.split('\n')
-            print(f"[DEBUG ADULTOS TEXT] Page {page_num+1}: {len(lines)} lines")
-
-            for line in lines:
-                line = ' '.join(line.split()).strip()
-                if not line:
-                    continue
-                ll = line.lower()
-                if any(ll.startswith(s) for s in SKIP_STARTS):
-                    continue
-                first_tok = ll.split()[0] if ll.split() else ''
-                if re.match(r'^\d+$', first_tok):
-                    continue
-                if ',' not in line:
-                    continue
-
-                rec = _parse_adultos_line(line, ESTADOS, MES_ANIO_FULL, UNIDAD_RE)
-                if rec:
-                    records.append(rec)
+    import pandas as pd
 
+    por_pagina = importacion.lineas_pdf(
+        partial(_parse_adultos_line, estados=ESTADOS_PDF, mes_re=MES_ANIO_FULL, unidad_re=UNIDAD_RE),
+        saltear=SKIP_STARTS,
+        requiere=',',
+    )
+    records = importacion.paginas_pdf(contents, por_pagina)
     if not records:
         raise ValueError("No se encontraron datos de adultos en el PDF")
-
-    df = pd.DataFrame(records)
-    print(f"[DEBUG ADULTOS] Total parsed: {len(df)} records")
-    return df
+    return pd.DataFrame(records)
 
 
 def _parse_adultos_line(line: str, estados: list, mes_re, unidad_re) -> dict:
@@ -171,6 +155,21 @@ def _parse_adultos_line(line: str, estados: list, mes_re, unidad_re) -> dict:
     return result
 
 
+REPORTE = importacion.Reporte(
+    nombre='adultos',
+    model=AdultoRecomendacion,
+    columnas=importacion_recomendaciones.COLUMNAS,
+    lectores={
+        '.pdf': _parse_adultos_pdf,
+        '.csv': importacion.leer_csv(importacion_recomendaciones.COLUMNAS),
+        '.xlsx': importacion.leer_excel(importacion_recomendaciones.COLUMNAS),
+        '.xls': importacion.leer_excel(importacion_recomendaciones.COLUMNAS),
+    },
+    normalizar=partial(importacion_recomendaciones.preparar, normalizar_estado=normalizar_estado_adulto),
+    historico=True,
+)
+
+
 # === ENDPOINTS ===
 
 @router.post('/upload')
@@ -187,153 +186,78 @@ async def upload_adultos(
     with open(file_path, 'wb') as f:
         f.write(contents)
 
-    pdf_file = PdfFile(
-        filename=file.filename,
-        mime=file.content_type,
-        size_bytes=len(contents),
-        status='processed',
-        file_metadata={}
-    )
-    db_session.add(pdf_file)
-    db_session.flush()
-
-    try:
-        if file.filename.endswith('.pdf'):
-            df = _parse_adultos_pdf(contents)
-        elif file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-            df.columns = ['nombre', 'sexo', 'edad', 'estado_raw', 'vencimiento_raw', 'unidad'][:len(df.columns)]
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
-            df.columns = ['nombre', 'sexo', 'edad', 'estado_raw', 'vencimiento_raw', 'unidad'][:len(df.columns)]
-    except Exception as e:
-        db_session.rollback()
-        raise HTTPException(status_code=400, detail=f"Error leyendo archivo: {str(e)}")
-
-    deleted = db_session.query(AdultoRecomendacion).delete()
-    print(f"[DEBUG ADULTOS] Deleted {deleted} previous records")
-
-    SKIP_NOMBRES = [
-        'nombre', 'apellido', 'lista', 'recuento', 'total', 'subtotal',
-        'estado de', 'para uso', 'derechos', 'intellectual',
-    ]
-    imported = 0
-    skipped = 0
-
-    for idx, row in df.iterrows():
-        nombre = str(row.get('nombre', '') or '').strip()
-        if not nombre or nombre.lower() in ('none', 'nan'):
-            skipped += 1
-            continue
-        nombre_lower = nombre.lower()
-        if any(nombre_lower.startswith(p) for p in SKIP_NOMBRES):
-            skipped += 1
-            continue
-        if nombre_lower.replace('.', '').replace(',', '').isdigit():
-            skipped += 1
-            continue
-
-        estado_raw  = str(row.get('estado_raw', '') or '').strip()
-        venc_raw    = str(row.get('vencimiento_raw', '') or '').strip()
-        estado_norm = normalizar_estado_adulto(estado_raw, venc_raw)
-        rec_activa  = tiene_rec_activa(estado_norm)
-
-        edad_raw = row.get('edad', None)
-        try:
-            edad_val = int(str(edad_raw).strip()) if edad_raw not in (None, '', 'nan', 'None') else None
-        except Exception:
-            edad_val = None
-
-        sexo_raw  = str(row.get('sexo', '') or '').strip()
-        sexo_norm = None
-        if sexo_raw.upper() == 'M':
-            sexo_norm = 'M'
-        elif sexo_raw.upper() == 'F':
-            sexo_norm = 'F'
-
-        adulto = AdultoRecomendacion(
-            nombre=nombre,
-            sexo=sexo_norm,
-            edad=edad_val,
-            estado_raw=estado_raw if estado_raw and estado_raw.lower() not in ('none', 'nan') else None,
-            vencimiento_raw=venc_raw if venc_raw and venc_raw.lower() not in ('none', 'nan') else None,
-            unidad=str(row.get('unidad', '') or '').strip() or None,
-            estado_normalizado=estado_norm,
-            tiene_recomendacion_activa=rec_activa,
-            archivo_fuente_id=pdf_file.id,
-            fila_numero=idx + 1
-        )
-        db_session.add(adulto)
-        imported += 1
-        print(f"[DEBUG ADULTOS IMPORT] Row {idx+1}: nombre={nombre} | estado='{estado_raw}' | norm={estado_norm}")
-
-    db_session.commit()
-    print(f"[DEBUG ADULTOS] Imported {imported}, skipped {skipped}")
+    resultado = importacion.importar(db_session, REPORTE, file.filename, contents, file.content_type)
 
     return {
         "success": True,
-        "file_id": pdf_file.id,
-        "importados": imported,
-        "skipped": skipped
+        "file_id": resultado.archivo.id,
+        "importados": resultado.importados,
+        "skipped": resultado.salteados
     }
 
 
-@router.get('/kpi')
-async def kpi_adultos_recomendacion(db_session: Session = Depends(db.get_db)):
+BANDAS_EDAD = [('18-30', 30), ('31-45', 45), ('46-60', 60), ('61+', None)]
+ESTADOS_KPI = [ESTADO_ACTIVA, ESTADO_VENCE, ESTADO_VENCIDA, ESTADO_CANCELADA, ESTADO_SIN_EST]
+
+
+@router.get('/kpi', dependencies=[conditional_get(AdultoRecomendacion.__tablename__)])
+async def kpi_adultos_recomendacion(
+    por: Optional[str] = Query(None, description="Desglose adicional: unidad | sexo"),
+    db_session: AsyncSession = Depends(db.get_async_db),
+):
     """
     KPI: Adultos Investidos con Recomendación.
     Real = activa + vence_pronto / Potencial = todos
+    Las listas de personas se piden aparte en /kpi/personas.
     """
-    todos = db_session.query(AdultoRecomendacion).all()
-    empty = {
+    resultado = await recomendaciones.kpi(db_session, AdultoRecomendacion, ESTADOS_KPI, por)
+    return {
         "indicador": "adultos_recomendacion",
         "nombre": "Adultos Investidos con Recomendación",
-        "real": 0, "potencial": 0, "porcentaje": 0, "meta": META_ADULTOS_RECOMENDACION,
-        "desglose": {"activa":0,"vence_pronto":0,"vencida":0,"cancelada":0,"sin_estado":0},
-        "personas": {"activa":[],"vence_pronto":[],"vencida":[],"cancelada":[],"sin_estado":[]}
-    }
-    if not todos:
-        return empty
-
-    grupos = {
-        ESTADO_ACTIVA:    [],
-        ESTADO_VENCE:     [],
-        ESTADO_VENCIDA:   [],
-        ESTADO_CANCELADA: [],
-        ESTADO_SIN_EST:   [],
+        "meta": META_ADULTOS_RECOMENDACION,
+        **resultado,
     }
-    for a in todos:
-        est = a.estado_normalizado or ESTADO_SIN_EST
-        if est not in grupos:
-            est = ESTADO_SIN_EST
-        grupos[est].append(a)
 
-    real       = len(grupos[ESTADO_ACTIVA]) + len(grupos[ESTADO_VENCE])
-    potencial  = len(todos)
-    porcentaje = round(real / potencial * 100, 1) if potencial > 0 else 0
 
-    def personas(lista):
-        return [{"nombre": a.nombre, "unidad": a.unidad or '', "vencimiento": a.vencimiento_raw or '', "estado": a.estado_raw or ''} for a in lista]
+@router.get('/kpi/personas', dependencies=[conditional_get(AdultoRecomendacion.__tablename__)])
+async def kpi_adultos_personas(
+    estado: List[str] = Query(..., description="Uno o más estados del desglose"),
+    offset: int = 0,
+    limit: int = recomendaciones.LIMITE_PERSONAS,
+    db_session: AsyncSession = Depends(db.get_async_db),
+):
+    """Adultos en los estados pedidos, paginados y ordenados por nombre."""
+    return await recomendaciones.personas(db_session, AdultoRecomendacion, ESTADOS_KPI, estado, offset, limit)
 
-    return {
-        "indicador": "adultos_recomendacion",
-        "nombre": "Adultos Investidos con Recomendación",
-        "real": real,
-        "potencial": potencial,
-        "porcentaje": porcentaje,
-        "meta": META_ADULTOS_RECOMENDACION,
-        "desglose": {
-            "activa":       len(grupos[ESTADO_ACTIVA]),
-            "vence_pronto": len(grupos[ESTADO_VENCE]),
-            "vencida":      len(grupos[ESTADO_VENCIDA]),
-            "cancelada":    len(grupos[ESTADO_CANCELADA]),
-            "sin_estado":   len(grupos[ESTADO_SIN_EST]),
-        },
-        "personas": {
-            "activa":       personas(grupos[ESTADO_ACTIVA]),
-            "vence_pronto": personas(grupos[ESTADO_VENCE]),
-            "vencida":      personas(grupos[ESTADO_VENCIDA]),
-            "cancelada":    personas(grupos[ESTADO_CANCELADA]),
-            "sin_estado":   personas(grupos[ESTADO_SIN_EST]),
-        }
-    }
+
+@router.get('/kpi/desglose', dependencies=[conditional_get(AdultoRecomendacion.__tablename__)])
+async def kpi_adultos_desglose(db_session: AsyncSession = Depends(db.get_async_db)):
+    """Adultos: conteos por estado para cada unidad, sexo y banda de edad (sin listas de personas)."""
+    return await recomendaciones.desglose(db_session, AdultoRecomendacion, ESTADOS_KPI, BANDAS_EDAD)
+
+
+@router.get(
+    '/kpi/vencimientos',
+    dependencies=[conditional_get(AdultoRecomendacion.__tablename__, extra=lambda: date.today().isoformat())],
+)
+async def kpi_adultos_vencimientos(
+    horizonte: List[int] = Query(list(recomendaciones.HORIZONTES_DIAS), description="Días hacia adelante (repetible)"),
+    db_session: AsyncSession = Depends(db.get_async_db),
+):
+    """Adultos: recomendaciones vigentes que vencen en los próximos 30/60/90 días, por unidad."""
+    return await recomendaciones.vencimientos(db_session, AdultoRecomendacion, horizonte)
+
+
+@router.get(
+    '/historico',
+    dependencies=[conditional_get(HistoricoCarga.__tablename__, HistoricoConteo.__tablename__)],
+)
+async def historico_adultos(
+    unidad: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    desglose: bool = False,
+    db_session: AsyncSession = Depends(db.get_async_db),
+):
+    """Adultos: serie de tiempo (total / con recomendación vigente) con una entrada por carga, leída del rollup."""
+    return await historico.serie(db_session, 'adultos', unidad, desde, hasta, desglose)
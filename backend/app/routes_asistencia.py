@@ -1,10 +1,16 @@
 import io
 import re
+from datetime import date
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from .db import get_db
-from .models import AsistenciaSacramental
+from . import asistencia, importacion
+from .dataset_versions import conditional_get
+from .db import get_async_db, get_db
+from .models import AsistenciaSacramental, AsistenciaSemanal
 
 router = APIRouter(prefix='/asistencia', tags=['asistencia'])
 
@@ -51,6 +57,15 @@ def _parse_asistencia_txt(content: bytes) -> tuple[int, dict]:
     return total, desglose
 
 
+REPORTE = importacion.Reporte(
+    nombre='asistencia',
+    model=AsistenciaSacramental,
+    columnas=('unidad', 'valor'),
+    lectores={'.txt': _parse_asistencia_txt, '.csv': _parse_asistencia_txt},
+    formatos='TXT o CSV',
+)
+
+
 class RegistrarAsistenciaBody(BaseModel):
     periodo: str = '2026'
     valor: int
@@ -58,15 +73,17 @@ class RegistrarAsistenciaBody(BaseModel):
 
 
 @router.post('/upload')
-async def upload_asistencia(file: UploadFile = File(...), periodo: str = '2026', db: Session = Depends(get_db)):
-    """Sube un TXT con asistencia por barrio y suma el total."""
+async def upload_asistencia(
+    file: UploadFile = File(...),
+    periodo: str = '2026',
+    semana: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Sube un TXT con asistencia por barrio y suma el total.
+    Cada barrio queda además en la serie semanal, en la semana de `semana` (por defecto la actual)."""
     content = await file.read()
-    fname = file.filename.lower()
-
-    if not (fname.endswith('.txt') or fname.endswith('.csv')):
-        raise HTTPException(status_code=400, detail="Solo se acepta archivo .txt o .csv")
-
-    total, desglose = _parse_asistencia_txt(content)
+    progreso = importacion.Progreso('asistencia')
+    total, desglose = importacion.leer(REPORTE, file.filename, content, progreso)
 
     if total == 0:
         raise HTTPException(status_code=400, detail="No se encontraron datos válidos. Formato esperado: 'Barrio Número' por línea.")
@@ -88,11 +105,20 @@ async def upload_asistencia(file: UploadFile = File(...), periodo: str = '2026',
         )
         db.add(nuevo)
 
+    semana = asistencia.domingo(semana or date.today())
+    por_unidad: dict = {}
+    for barrio, valor in desglose.items():
+        unidad = asistencia.unidad_canonica(barrio)
+        por_unidad[unidad] = por_unidad.get(unidad, 0) + valor
+    for unidad, valor in por_unidad.items():
+        asistencia.guardar(db, unidad, {semana: valor}, fuente='txt')
+
     db.commit()
-    print(f"[ASISTENCIA] Periodo {periodo}: total={total}, barrios={list(desglose.keys())}")
+    progreso.fin(f'periodo {periodo}, semana {semana}: {total} en {len(por_unidad)} unidades')
     return {
         'ok': True,
         'total': total,
+        'semana': semana,
         'desglose': desglose,
         'mensaje': f'Asistencia registrada: {total} personas en {len(desglose)} barrios'
     }
@@ -121,11 +147,14 @@ def registrar_asistencia(body: RegistrarAsistenciaBody, db: Session = Depends(ge
     return {'ok': True, 'periodo': body.periodo, 'valor': body.valor}
 
 
-@router.get('/kpi')
-def get_kpi_asistencia(periodo: str = '2026', db: Session = Depends(get_db)):
-    registro = db.query(AsistenciaSacramental).filter(
-        AsistenciaSacramental.periodo == periodo
-    ).order_by(AsistenciaSacramental.created_at.desc()).first()
+@router.get('/kpi', dependencies=[conditional_get(AsistenciaSacramental.__tablename__)])
+async def get_kpi_asistencia(periodo: str = '2026', db: AsyncSession = Depends(get_async_db)):
+    registro = (await db.execute(
+        select(AsistenciaSacramental)
+        .where(AsistenciaSacramental.periodo == periodo)
+        .order_by(AsistenciaSacramental.created_at.desc())
+        .limit(1)
+    )).scalars().first()
 
     valor = registro.valor if registro else 0
     porcentaje = round((valor / META_ASISTENCIA) * 100, 1) if META_ASISTENCIA > 0 else 0
@@ -139,3 +168,31 @@ def get_kpi_asistencia(periodo: str = '2026', db: Session = Depends(get_db)):
         'notas': registro.notas if registro else '',
         'desglose': registro.desglose if registro else {},
     }
+
+
+@router.get('/semanal/media-movil', dependencies=[conditional_get(AsistenciaSemanal.__tablename__)])
+async def get_media_movil(
+    ventana: int = 4,
+    unidad: Optional[str] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Media móvil semanal por unidad y del total de la estaca."""
+    return await asistencia.media_movil(db, ventana, unidad, desde, hasta)
+
+
+@router.get('/semanal/trimestres', dependencies=[conditional_get(AsistenciaSemanal.__tablename__)])
+async def get_trimestres(anio: int = 2026, db: AsyncSession = Depends(get_async_db)):
+    """Promedio semanal por unidad en cada trimestre del año."""
+    return await asistencia.trimestres(db, anio, META_ASISTENCIA)
+
+
+@router.get('/semanal/ranking', dependencies=[conditional_get(AsistenciaSemanal.__tablename__)])
+async def get_ranking(
+    semanas: int = asistencia.SEMANAS_RANKING,
+    hasta: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Unidades ordenadas por promedio de las últimas semanas, con variación."""
+    return await asistencia.ranking(db, semanas, hasta)
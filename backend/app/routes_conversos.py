@@ -3,13 +3,12 @@ Rutas para gestión de conversos: upload, mapeo, validación, enriquecimiento
 """
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
-import pandas as pd
+from typing import List, Optional, TYPE_CHECKING
 import io
-import pdfplumber
+import logging
 from datetime import datetime, date
 
-from . import db
+from . import db, importacion
 from .models import PdfFile, PersonaConverso, MapeoColumna, PeriodoKPI
 from .schemas import (
     PersonaConversoCreate, PersonaConversoOut, PersonaConversoEnriquecer,
@@ -21,8 +20,13 @@ from .normalizacion import (
     calcular_edad, validar_fecha_confirmacion, calcular_completitud
 )
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 router = APIRouter(prefix='/conversos', tags=['conversos'])
 
+logger = logging.getLogger(__name__)
+
 
 def _merge_pdf_continuation_rows(raw_rows: list, num_cols: int) -> list:
     """
@@ -147,12 +151,35 @@ def _merge_pdf_continuation_rows(raw_rows: list, num_cols: int) -> list:
         # Normal row: keep as-is
         result.append(list(row))
 
-    print(f"[DEBUG] PDF merge: {len(padded)} raw rows → {len(result)} merged rows")
-    for i, r in enumerate(result):
-        print(f"[DEBUG]   row {i+1}: {[cell(c) for c in r]}")
+    logger.debug('merge de filas: %s → %s', len(padded), len(result))
     return result
 
 
+def _leer_conversos_pdf(contents: bytes) -> "pd.DataFrame":
+    """Tablas de todas las páginas; la primera fila es el encabezado y las filas colapsadas se reconstruyen."""
+    import pandas as pd
+
+    all_tables = importacion.paginas_pdf(contents, importacion.tablas_de_pagina)
+    if not all_tables:
+        raise HTTPException(status_code=400, detail="No se encontraron tablas en el PDF")
+    headers = all_tables[0]
+    clean_headers = [h if h is not None else f"col_{i+1}" for i, h in enumerate(headers)]
+    merged_rows = _merge_pdf_continuation_rows(all_tables[1:], len(clean_headers))
+    return pd.DataFrame(merged_rows, columns=clean_headers)
+
+
+REPORTE = importacion.Reporte(
+    nombre='conversos',
+    model=PersonaConverso,
+    lectores={
+        '.pdf': _leer_conversos_pdf,
+        '.csv': importacion.leer_csv(),
+        '.xlsx': importacion.leer_excel(),
+        '.xls': importacion.leer_excel(),
+    },
+)
+
+
 # === UPLOAD Y DETECCIÓN DE COLUMNAS ===
 
 @router.post('/upload', response_model=UploadResponse)
@@ -164,14 +191,12 @@ async def upload_archivo(
     Sube archivo CSV/Excel y detecta columnas automáticamente
     """
     # Validar tipo de archivo por extensión (más confiable que content_type que varía por navegador)
-    fname_lower = file.filename.lower() if file.filename else ''
-    allowed_extensions = ('.pdf', '.csv', '.xls', '.xlsx')
-    if not fname_lower.endswith(allowed_extensions):
+    if importacion.extension(file.filename) not in REPORTE.lectores:
         raise HTTPException(
             status_code=400,
-            detail=f"Tipo de archivo no soportado. Use PDF, CSV o Excel (.xlsx)"
+            detail=f"Tipo de archivo no soportado. Use {REPORTE.formatos}"
         )
-    
+
     import os
     try:
         # Leer archivo
@@ -185,41 +210,16 @@ async def upload_archivo(
             f.write(contents)
 
         # Detectar formato y leer para preview
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-        elif file.filename.endswith('.pdf'):
-            with pdfplumber.open(io.BytesIO(contents)) as pdf:
-                all_tables = []
-                for page in pdf.pages:
-                    tables = page.extract_tables()
-                    if tables:
-                        for table in tables:
-                            all_tables.extend(table)
-                if not all_tables:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="No se encontraron tablas en el PDF"
-                    )
-                headers = all_tables[0]
-                clean_headers = [h if h is not None else f"col_{i+1}" for i, h in enumerate(headers)]
-                raw_rows = all_tables[1:]
-                merged_rows = _merge_pdf_continuation_rows(raw_rows, len(clean_headers))
-                df = pd.DataFrame(merged_rows, columns=clean_headers)
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
+        df = importacion.leer(REPORTE, file.filename, contents)
 
         # Guardar registro del archivo
-        pdf_file = PdfFile(
-            filename=file.filename,
-            mime=file.content_type,
-            size_bytes=len(contents),
-            status='pending_mapping',
+        pdf_file = importacion.registrar_archivo(
+            db_session, file.filename, contents, file.content_type, 'pending_mapping',
             file_metadata={
                 'total_filas': len(df),
                 'columnas': list(df.columns)
             }
         )
-        db_session.add(pdf_file)
         db_session.commit()
         db_session.refresh(pdf_file)
 
@@ -316,6 +316,8 @@ async def confirmar_importacion(
     Confirma la importación y guarda los conversos en la BD.
     Si no hay mapeos explícitos, usa mapeo automático.
     """
+    import pandas as pd
+
     archivo = db_session.query(PdfFile).filter(PdfFile.id == file_id).first()
     if not archivo:
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
@@ -353,6 +355,7 @@ async def confirmar_importacion(
     errores = []
     advertencias = []
     personas_importadas = 0
+    filas = []
 
     # Recuperar metadata
     columnas = archivo.file_metadata.get('columnas', [])
@@ -361,35 +364,15 @@ async def confirmar_importacion(
     # Buscar archivo en disco - usar ruta absoluta consistente con el upload
     file_path = os.path.join('/app/uploads', archivo.filename)
     df = None
+    progreso = importacion.Progreso('conversos')
     try:
-        if archivo.filename.endswith('.csv') and os.path.exists(file_path):
-            df = pd.read_csv(file_path)
-        elif archivo.filename.endswith('.xlsx') and os.path.exists(file_path):
-            df = pd.read_excel(file_path)
-        elif archivo.filename.endswith('.pdf') and os.path.exists(file_path):
-            import pdfplumber
-            with pdfplumber.open(file_path) as pdf:
-                all_tables = []
-                for page in pdf.pages:
-                    tables = page.extract_tables()
-                    if tables:
-                        for table in tables:
-                            all_tables.extend(table)
-                if not all_tables:
-                    raise Exception('No se encontraron tablas en el PDF')
-                headers = all_tables[0]
-                clean_headers = [h if h is not None else f"col_{i+1}" for i, h in enumerate(headers)]
-                raw_rows = all_tables[1:]
-                print(f"[DEBUG RAW] {len(raw_rows)} raw rows before merge:")
-                for ri, rr in enumerate(raw_rows):
-                    print(f"[DEBUG RAW]   {ri+1}: {[' '.join(str(c).split()) if c else '' for c in rr]}")
-                merged_rows = _merge_pdf_continuation_rows(raw_rows, len(clean_headers))
-                df = pd.DataFrame(merged_rows, columns=clean_headers)
-        else:
-            # Si no existe el archivo físico, intentar reconstruir desde metadata (no ideal)
+        if not os.path.exists(file_path):
+            # Si no existe el archivo físico, no hay de dónde reconstruir las filas
             raise Exception('Archivo original no disponible en disco')
+        with open(file_path, 'rb') as f:
+            df = importacion.leer(REPORTE, archivo.filename, f.read(), progreso)
     except Exception as e:
-        errores.append(f'Error leyendo archivo original: {str(e)}')
+        errores.append(f'Error leyendo archivo original: {getattr(e, "detail", e)}')
         archivo.status = 'error'
         db_session.commit()
         return ImportacionConfirmada(
@@ -403,8 +386,6 @@ async def confirmar_importacion(
     # Aplicar mapeo y crear registros
     # Mapeo automático si no hay mapeos explícitos
     if not mapeos:
-        print(f"[DEBUG] No hay mapeos explícitos, usando mapeo automático")
-        print(f"[DEBUG] Columnas del df: {list(df.columns)}")
         
         mapeo_dict = {}
         
@@ -422,7 +403,6 @@ async def confirmar_importacion(
         for col in df.columns:
             if col in mapeo_generico:
                 mapeo_dict[col] = mapeo_generico[col]
-                print(f"[DEBUG] Mapeado por posición: {col} -> {mapeo_generico[col]}")
         
         # SEGUNDO: Para columnas NO genéricas, intentar mapeo por nombre/variantes
         variantes_mapeo = {
@@ -441,24 +421,20 @@ async def confirmar_importacion(
                 for campo, variantes_lista in variantes_mapeo.items():
                     if any(col_norm == v for v in variantes_lista):  # Coincidencia exacta, no "in"
                         mapeo_dict[col] = campo
-                        print(f"[DEBUG] Mapeado por nombre: {col} -> {campo}")
                         break
         
         # TERCERO: Si la primera columna aún no está mapeada, asumirla como nombre
         primera_col = df.columns[0] if len(df.columns) > 0 else None
         if primera_col and primera_col not in mapeo_dict:
             mapeo_dict[primera_col] = 'nombre_preferencia'
-            print(f"[DEBUG] Primera columna mapeada por defecto: {primera_col} -> nombre_preferencia")
         
-        print(f"[DEBUG] Mapeo final: {mapeo_dict}")
-        print(f"[DEBUG] Total filas en df: {len(df)}")
+        logger.debug('Mapeo automático de %s: %s', list(df.columns), mapeo_dict)
 
     from dateutil import parser as dateparser
     for idx, row in df.iterrows():
         try:
             # Saltar filas que sean encabezados o vacías
             if all((str(x).strip() == '' or pd.isna(x)) for x in row.values):
-                print(f"[DEBUG] Fila {idx+1} vacía, saltando")
                 continue
             datos = {}
             for col_src, col_dst in mapeo_dict.items():
@@ -492,15 +468,12 @@ async def confirmar_importacion(
             FILAS_IGNORAR = ['nombre', 'lista', 'recuento', 'total', 'subtotal', 'suma',
                              'count', 'header', 'encabezado', 'nombre preferencia', 'barrio']
             if any(nombre_val.startswith(p) for p in FILAS_IGNORAR):
-                print(f"[DEBUG] Fila {idx+1} es encabezado/resumen ({nombre_val}), saltando")
                 continue
             # Saltar si el nombre contiene solo números (ej: "10", "168")
             if nombre_val.replace('.','').replace(',','').isdigit():
-                print(f"[DEBUG] Fila {idx+1} es numérica ({nombre_val}), saltando")
                 continue
             if not datos.get('nombre_preferencia'):
                 advertencias.append(f'Fila {idx+1} sin nombre_preferencia, omitida')
-                print(f"[DEBUG] Fila {idx+1} sin nombre_preferencia, saltando")
                 continue
 
             # Normalizaciones básicas para que los KPIs tengan datos mínimos
@@ -598,34 +571,30 @@ async def confirmar_importacion(
                     from datetime import datetime
                     datos['fecha_confirmacion'] = datetime.now().date()
 
-            print(f"[DEBUG] Insertando fila {idx+1}: {datos.get('nombre_preferencia')} | sacerdocio='{sacerdocio_raw}' | rec_raw='{datos.get('estado_recomendacion_raw')}' | tiene_rec={tiene_recomendacion} | sexo={sexo_norm} | sacerdocio_norm={sacerdocio_norm} | ordenado={esta_ordenado}")
-            converso = PersonaConverso(
-                id=None,
-                nombre_preferencia=datos.get('nombre_preferencia', ''),
-                sacerdocio=datos.get('sacerdocio'),
-                estado_recomendacion_raw=datos.get('estado_recomendacion_raw'),
-                llamamientos=datos.get('llamamientos'),
-                unidad=datos.get('unidad'),
-                fecha_confirmacion=datos.get('fecha_confirmacion'),
-                fecha_nacimiento=datos.get('fecha_nacimiento'),
-                sexo=sexo_norm,
-                edad_al_confirmar=edad_val,
-                tiene_recomendacion=tiene_recomendacion,
-                sacerdocio_normalizado=sacerdocio_norm,
-                esta_ordenado=esta_ordenado,
-                archivo_fuente_id=file_id,
-                fila_numero=idx+1
-            )
-            db_session.add(converso)
+            filas.append({
+                'nombre_preferencia': datos.get('nombre_preferencia', ''),
+                'sacerdocio': datos.get('sacerdocio'),
+                'estado_recomendacion_raw': datos.get('estado_recomendacion_raw'),
+                'llamamientos': datos.get('llamamientos'),
+                'unidad': datos.get('unidad'),
+                'fecha_confirmacion': datos.get('fecha_confirmacion'),
+                'fecha_nacimiento': datos.get('fecha_nacimiento'),
+                'sexo': sexo_norm,
+                'edad_al_confirmar': edad_val,
+                'tiene_recomendacion': tiene_recomendacion,
+                'sacerdocio_normalizado': sacerdocio_norm,
+                'esta_ordenado': esta_ordenado,
+                'archivo_fuente_id': file_id,
+                'fila_numero': idx+1,
+            })
             personas_importadas += 1
         except Exception as e:
             errores.append(f'Fila {idx+1}: {str(e)}')
-            print(f"[DEBUG] Error en fila {idx+1}: {str(e)}")
     
-    print(f"[DEBUG] Total personas importadas: {personas_importadas}")
+    importacion.insertar(db_session, PersonaConverso, filas)
     archivo.status = 'processed'
     db_session.commit()
-    print(f"[DEBUG] Commit realizado")
+    progreso.fin(f'{personas_importadas} personas')
     return ImportacionConfirmada(
         success=True,
         file_id=file_id,
@@ -648,48 +617,26 @@ async def import_conversos_directo(
     """
     import os, re
     from dateutil import parser as dateparser
+    import pandas as pd
 
-    fname_lower = file.filename.lower() if file.filename else ''
-    allowed_extensions = ('.pdf', '.csv', '.xls', '.xlsx')
-    if not fname_lower.endswith(allowed_extensions):
+    if importacion.extension(file.filename) not in REPORTE.lectores:
         raise HTTPException(
             status_code=400,
-            detail="Tipo de archivo no soportado. Use PDF, CSV o Excel (.xlsx)"
+            detail=f"Tipo de archivo no soportado. Use {REPORTE.formatos}"
         )
 
     try:
         contents = await file.read()
 
         # --- Parsear archivo en memoria ---
-        if fname_lower.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-        elif fname_lower.endswith('.pdf'):
-            with pdfplumber.open(io.BytesIO(contents)) as pdf:
-                all_tables = []
-                for page in pdf.pages:
-                    tables = page.extract_tables()
-                    if tables:
-                        for table in tables:
-                            all_tables.extend(table)
-                if not all_tables:
-                    raise HTTPException(status_code=400, detail="No se encontraron tablas en el PDF")
-                headers = all_tables[0]
-                clean_headers = [h if h is not None else f"col_{i+1}" for i, h in enumerate(headers)]
-                raw_rows = all_tables[1:]
-                merged_rows = _merge_pdf_continuation_rows(raw_rows, len(clean_headers))
-                df = pd.DataFrame(merged_rows, columns=clean_headers)
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
+        progreso = importacion.Progreso('conversos')
+        df = importacion.leer(REPORTE, file.filename, contents, progreso)
 
         # --- Registrar en PdfFile (para archivo_fuente_id) ---
-        pdf_file = PdfFile(
-            filename=file.filename,
-            mime=file.content_type,
-            size_bytes=len(contents),
-            status='processing',
+        pdf_file = importacion.registrar_archivo(
+            db_session, file.filename, contents, file.content_type, 'processing',
             file_metadata={'total_filas': len(df), 'columnas': list(df.columns)}
         )
-        db_session.add(pdf_file)
         db_session.commit()
         db_session.refresh(pdf_file)
         file_id = pdf_file.id
@@ -752,14 +699,13 @@ async def import_conversos_directo(
         if primera_col and primera_col not in mapeo_dict:
             mapeo_dict[primera_col] = 'nombre_preferencia'
 
-        print(f"[IMPORT] Columnas: {list(df.columns)}")
-        print(f"[IMPORT] Mapeo final: {mapeo_dict}")
-        print(f"[IMPORT] Total filas en df: {len(df)}")
+        logger.debug('Mapeo automático de %s: %s', list(df.columns), mapeo_dict)
 
         # --- Procesar filas ---
         errores = []
         advertencias = []
         personas_importadas = 0
+        filas = []
 
         FILAS_IGNORAR = ['nombre', 'lista', 'recuento', 'total', 'subtotal', 'suma',
                          'count', 'header', 'encabezado', 'nombre preferencia', 'barrio']
@@ -880,33 +826,30 @@ async def import_conversos_directo(
                     except Exception:
                         datos['fecha_confirmacion'] = datetime.now().date()
 
-                print(f"[IMPORT] Fila {idx+1}: {datos.get('nombre_preferencia')} | sacerdocio='{sacerdocio_raw}' | rec='{datos.get('estado_recomendacion_raw')}' | tiene_rec={tiene_recomendacion}")
-                converso = PersonaConverso(
-                    id=None,
-                    nombre_preferencia=datos.get('nombre_preferencia', ''),
-                    sacerdocio=datos.get('sacerdocio'),
-                    estado_recomendacion_raw=datos.get('estado_recomendacion_raw'),
-                    llamamientos=datos.get('llamamientos'),
-                    unidad=datos.get('unidad'),
-                    fecha_confirmacion=datos.get('fecha_confirmacion'),
-                    fecha_nacimiento=datos.get('fecha_nacimiento'),
-                    sexo=sexo_norm,
-                    edad_al_confirmar=edad_val,
-                    tiene_recomendacion=tiene_recomendacion,
-                    sacerdocio_normalizado=sacerdocio_norm,
-                    esta_ordenado=esta_ordenado,
-                    archivo_fuente_id=file_id,
-                    fila_numero=idx + 1
-                )
-                db_session.add(converso)
+                filas.append({
+                    'nombre_preferencia': datos.get('nombre_preferencia', ''),
+                    'sacerdocio': datos.get('sacerdocio'),
+                    'estado_recomendacion_raw': datos.get('estado_recomendacion_raw'),
+                    'llamamientos': datos.get('llamamientos'),
+                    'unidad': datos.get('unidad'),
+                    'fecha_confirmacion': datos.get('fecha_confirmacion'),
+                    'fecha_nacimiento': datos.get('fecha_nacimiento'),
+                    'sexo': sexo_norm,
+                    'edad_al_confirmar': edad_val,
+                    'tiene_recomendacion': tiene_recomendacion,
+                    'sacerdocio_normalizado': sacerdocio_norm,
+                    'esta_ordenado': esta_ordenado,
+                    'archivo_fuente_id': file_id,
+                    'fila_numero': idx + 1,
+                })
                 personas_importadas += 1
             except Exception as e:
                 errores.append(f'Fila {idx+1}: {str(e)}')
-                print(f"[IMPORT] Error fila {idx+1}: {str(e)}")
 
+        importacion.insertar(db_session, PersonaConverso, filas)
         pdf_file.status = 'processed'
         db_session.commit()
-        print(f"[IMPORT] Total personas importadas: {personas_importadas}")
+        progreso.fin(f'{personas_importadas} personas')
 
         return {
             'ok': True,
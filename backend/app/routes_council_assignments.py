@@ -2,9 +2,12 @@ import json
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import db
+from .dataset_versions import conditional_get
 from .models import AppSetting, CouncilAssignmentsPlan
 
 router = APIRouter()
@@ -184,20 +187,24 @@ def _normalize_plan_payload(plan: dict):
     }
 
 
-@router.get('/council-assignments')
-def get_council_assignments(session: Session = Depends(db.get_db)):
-    row = session.query(CouncilAssignmentsPlan).filter(CouncilAssignmentsPlan.scope_key == COUNCIL_ASSIGNMENTS_SCOPE).first()
+@router.get('/council-assignments', dependencies=[conditional_get(CouncilAssignmentsPlan.__tablename__, AppSetting.__tablename__)])
+async def get_council_assignments(session: AsyncSession = Depends(db.get_async_db)):
+    row = (await session.execute(
+        select(CouncilAssignmentsPlan).where(CouncilAssignmentsPlan.scope_key == COUNCIL_ASSIGNMENTS_SCOPE)
+    )).scalars().first()
     if row and isinstance(row.plan_data, dict):
         return {'plan': _normalize_plan_payload(row.plan_data)}
 
     # Compatibilidad por si hubiera una versión previa en app_settings.
-    setting = session.query(AppSetting).filter(AppSetting.key == COUNCIL_ASSIGNMENTS_KEY).first()
+    setting = (await session.execute(
+        select(AppSetting).where(AppSetting.key == COUNCIL_ASSIGNMENTS_KEY)
+    )).scalars().first()
     if setting and setting.value:
         try:
             plan = _normalize_plan_payload(json.loads(setting.value))
             migrated = CouncilAssignmentsPlan(scope_key=COUNCIL_ASSIGNMENTS_SCOPE, plan_data=plan)
             session.add(migrated)
-            session.commit()
+            await session.commit()
             return {'plan': plan}
         except json.JSONDecodeError:
             pass
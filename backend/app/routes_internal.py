@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from . import db
+from .profiling import list_profiles, profile_path, require_profiling_token
 from .schemas import MeasurementIn
 from .models import Measurement
 
@@ -23,3 +25,16 @@ def create_measurement(payload: MeasurementIn, db: Session = Depends(db.get_db))
     db.commit()
     db.refresh(m)
     return {"id": m.id, "indicator_id": m.indicator_id, "value": float(m.value)}
+
+
+@router.get('/profiles', dependencies=[Depends(require_profiling_token)])
+def listar_perfiles(limit: int = 50):
+    return {"items": list_profiles(limit)}
+
+
+@router.get('/profiles/{name}', dependencies=[Depends(require_profiling_token)])
+def descargar_perfil(name: str):
+    path = profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail='Perfil no encontrado')
+    return FileResponse(path, filename=name)
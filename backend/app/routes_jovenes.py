@@ -1,19 +1,25 @@
 """
 Rutas para gestión de Jóvenes con Recomendación: upload e importación
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, Query, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-import pandas as pd
-import io
+from typing import List, Optional, TYPE_CHECKING
+from datetime import date, datetime
+from functools import partial
+import logging
 import re
 import os
-import pdfplumber
 
-from . import db
-from .models import PdfFile, JovenRecomendacion
+from . import db, historico, importacion, importacion_recomendaciones, recomendaciones
+from .dataset_versions import conditional_get
+from .models import HistoricoCarga, HistoricoConteo, JovenRecomendacion
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 router = APIRouter(prefix='/jovenes', tags=['jovenes'])
+logger = logging.getLogger(__name__)
 
 META_JOVENES_RECOMENDACION = 100  # 100%
 
@@ -62,7 +68,34 @@ def _cell(val):
     s = ' '.join(str(val).split()).strip()
     return '' if s.lower() in ('none', 'nan') else s
 
-def _parse_jovenes_pdf(contents: bytes) -> pd.DataFrame:
+# Estados conocidos en el PDF (para detectarlos dentro de la línea)
+ESTADOS_PDF = [
+    'extraviada o robada', 'extraviado o robado',
+    'no ha sido bautizado', 'no bautizado',
+    'vencen en', 'vence en',
+    'cancelada', 'cancelado',
+    'vencida', 'vencido',
+    'activa', 'vigente',
+]
+# "mes. año" o "mes año" al final
+MES_ANIO_FULL = re.compile(
+    r'\b(ene|feb|mar|abr|may|jun|jul|ago|sep|oct|nov|dic)\.?\s+\d{4}\b',
+    re.IGNORECASE
+)
+UNIDAD_RE = re.compile(
+    r'\b(Barrio|Rama|Distrito|Estaca)\s+[\w\s]+$',
+    re.IGNORECASE
+)
+# Encabezados, pies de página y totales del PDF
+SKIP_STARTS = (
+    'nombre', 'estado de la recomendaci',
+    'para uso exclusivo', 'derechos reservados',
+    'intellectual reserve', 'estaca montevideo',
+    'recuento:', 'total:',
+)
+
+
+def _parse_jovenes_pdf(contents: bytes) -> "pd.DataFrame":
     """
     Extract jovenes PDF using text extraction (not table extraction) to avoid
     zebra-stripe color rows being skipped by pdfplumber's table detector.
@@ -70,72 +103,17 @@ def _parse_jovenes_pdf(contents: bytes) -> pd.DataFrame:
     Expected line format (space-separated tokens):
       Apellido Nombre, Nombre2  Sexo  Edad  [Estado]  [Vencimiento]  Unidad
     """
-    # Known estado values in the PDF (for detection)
-    ESTADOS = [
-        'extraviada o robada', 'extraviado o robado',
-        'no ha sido bautizado', 'no bautizado',
-        'vencen en', 'vence en',
-        'cancelada', 'cancelado',
-        'vencida', 'vencido',
-        'activa', 'vigente',
-    ]
-    # Matches "mes. año" or "mes año" at the end
-    MES_ANIO_FULL = re.compile(
-        r'\b(ene|feb|mar|abr|may|jun|jul|ago|sep|oct|nov|dic)\.?\s+\d{4}\b',
-        re.IGNORECASE
-    )
-    UNIDAD_RE = re.compile(
-        r'\b(Barrio|Rama|Distrito|Estaca)\s+[\w\s]+$',
-        re.IGNORECASE
-    )
-
-    # Lines to skip (headers, footers, page numbers)
-    SKIP_STARTS = [
-        'nombre', 'estado de la recomendaci',
-        'para uso exclusivo', 'derechos reservados',
-        'intellectual reserve', 'estaca montevideo',
-        'recuento:', 'total:',
-    ]
-
-    records = []
-
-    with pdfplumber.open(io.BytesIO(contents)) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            text = page.extract_text(x_tolerance=3, y_tolerance=3)
-            if not text:
-                continue
-            lines = text.split('\n')
-            print(f"[DEBUG JOVENES TEXT] Page {page_num+1}: {len(lines)} lines")
-
-            for line in lines:
-                line = ' '.join(line.split()).strip()
-                if not line:
-                    continue
-
-                # Skip header/footer lines
-                ll = line.lower()
-                if any(ll.startswith(s) for s in SKIP_STARTS):
-                    continue
-                # Skip pure page numbers or "N Para uso..."
-                first_tok = ll.split()[0] if ll.split() else ''
-                if re.match(r'^\d+$', first_tok):
-                    continue
-
-                # Must contain a comma (Apellido, Nombre) to be a data row
-                if ',' not in line:
-                    continue
-
-                rec = _parse_jovenes_line(line, ESTADOS, MES_ANIO_FULL, UNIDAD_RE)
-                if rec:
-                    records.append(rec)
-                    print(f"[DEBUG JOVENES LINE] {rec}")
+    import pandas as pd
 
+    por_pagina = importacion.lineas_pdf(
+        partial(_parse_jovenes_line, estados=ESTADOS_PDF, mes_re=MES_ANIO_FULL, unidad_re=UNIDAD_RE),
+        saltear=SKIP_STARTS,
+        requiere=',',  # Apellido, Nombre
+    )
+    records = importacion.paginas_pdf(contents, por_pagina)
     if not records:
         raise ValueError("No se encontraron datos de jóvenes en el PDF")
-
-    df = pd.DataFrame(records)
-    print(f"[DEBUG JOVENES] Total parsed: {len(df)} records")
-    return df
+    return pd.DataFrame(records)
 
 
 def _parse_jovenes_line(line: str, estados: list, mes_re, unidad_re) -> dict:
@@ -317,7 +295,7 @@ def _merge_jovenes_rows(raw_rows: list, num_cols: int) -> list:
             continue
         # Saltar filas de encabezado/pie de página del PDF
         if is_skip_row(col0) and all_other_empty(row):
-            print(f'[DEBUG JOVENES] Skipping header/footer row: {col0[:60]}')
+            logger.debug('Fila de encabezado/pie salteada: %s', col0[:60])
             continue
         if is_continuation_only(row):
             if result:
@@ -328,12 +306,25 @@ def _merge_jovenes_rows(raw_rows: list, num_cols: int) -> list:
             continue
         result.append([_cell(c) for c in row])
 
-    print(f"[DEBUG JOVENES] merge: {len(padded)} → {len(result)} rows")
-    for i, r in enumerate(result):
-        print(f"[DEBUG JOVENES]   merged {i+1}: {r}")
+    logger.debug('merge de filas: %s → %s', len(padded), len(result))
     return result
 
 
+REPORTE = importacion.Reporte(
+    nombre='jovenes',
+    model=JovenRecomendacion,
+    columnas=importacion_recomendaciones.COLUMNAS,
+    lectores={
+        '.pdf': _parse_jovenes_pdf,
+        '.csv': importacion.leer_csv(importacion_recomendaciones.COLUMNAS),
+        '.xlsx': importacion.leer_excel(importacion_recomendaciones.COLUMNAS),
+        '.xls': importacion.leer_excel(importacion_recomendaciones.COLUMNAS),
+    },
+    normalizar=partial(importacion_recomendaciones.preparar, normalizar_estado=normalizar_estado_joven),
+    historico=True,
+)
+
+
 # === ENDPOINTS ===
 
 @router.post('/upload')
@@ -354,174 +345,82 @@ async def upload_jovenes(
     with open(file_path, 'wb') as f:
         f.write(contents)
 
-    # Register file
-    pdf_file = PdfFile(
-        filename=file.filename,
-        mime=file.content_type,
-        size_bytes=len(contents),
-        status='processed',
-        file_metadata={}
-    )
-    db_session.add(pdf_file)
-    db_session.flush()
-
-    # Parse
-    try:
-        if file.filename.endswith('.pdf'):
-            df = _parse_jovenes_pdf(contents)
-        elif file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-            df.columns = ['nombre', 'sexo', 'edad', 'estado_raw', 'vencimiento_raw', 'unidad'][:len(df.columns)]
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
-            df.columns = ['nombre', 'sexo', 'edad', 'estado_raw', 'vencimiento_raw', 'unidad'][:len(df.columns)]
-    except Exception as e:
-        db_session.rollback()
-        raise HTTPException(status_code=400, detail=f"Error leyendo archivo: {str(e)}")
-
-    # Clean previous data
-    deleted = db_session.query(JovenRecomendacion).delete()
-    print(f"[DEBUG JOVENES] Deleted {deleted} previous records")
-
-    SKIP_NOMBRES = [
-        'nombre', 'apellido', 'lista', 'recuento', 'total', 'subtotal',
-        'estado de', 'para uso', 'derechos', 'intellectual',
-    ]
-    imported = 0
-    skipped = 0
-
-    for idx, row in df.iterrows():
-        nombre = str(row.get('nombre', '') or '').strip()
-        if not nombre or nombre.lower() in ('none', 'nan'):
-            skipped += 1
-            continue
-        nombre_lower = nombre.lower()
-        if any(nombre_lower.startswith(p) for p in SKIP_NOMBRES):
-            print(f"[DEBUG JOVENES] Skip header row: {nombre}")
-            skipped += 1
-            continue
-        if nombre_lower.replace('.', '').replace(',', '').isdigit():
-            skipped += 1
-            continue
-
-        estado_raw = str(row.get('estado_raw', '') or '').strip()
-        venc_raw   = str(row.get('vencimiento_raw', '') or '').strip()
-        estado_norm = normalizar_estado_joven(estado_raw, venc_raw)
-        rec_activa  = tiene_rec_activa(estado_norm)
-
-        edad_raw = row.get('edad', None)
-        try:
-            edad_val = int(str(edad_raw).strip()) if edad_raw not in (None, '', 'nan', 'None') else None
-        except Exception:
-            edad_val = None
-
-        sexo_raw = str(row.get('sexo', '') or '').strip()
-        # _parse_jovenes_line already normalizes V→M
-        sexo_norm = None
-        if sexo_raw.upper() in ('M',):
-            sexo_norm = 'M'
-        elif sexo_raw.upper() in ('F',):
-            sexo_norm = 'F'
-
-        joven = JovenRecomendacion(
-            nombre=nombre,
-            sexo=sexo_norm,
-            edad=edad_val,
-            estado_raw=estado_raw if estado_raw and estado_raw.lower() not in ('none', 'nan') else None,
-            vencimiento_raw=venc_raw if venc_raw and venc_raw.lower() not in ('none', 'nan') else None,
-            unidad=str(row.get('unidad', '') or '').strip() or None,
-            estado_normalizado=estado_norm,
-            tiene_recomendacion_activa=rec_activa,
-            archivo_fuente_id=pdf_file.id,
-            fila_numero=idx + 1
-        )
-        db_session.add(joven)
-        imported += 1
-        print(f"[DEBUG IMPORT] Row {idx+1}: nombre={nombre} | estado_raw='{estado_raw}' | venc_raw='{venc_raw}' | norm={estado_norm}")
-
-    db_session.commit()
-    print(f"[DEBUG JOVENES] Imported {imported}, skipped {skipped}")
+    resultado = importacion.importar(db_session, REPORTE, file.filename, contents, file.content_type)
 
     return {
         "success": True,
-        "file_id": pdf_file.id,
-        "importados": imported,
-        "skipped": skipped
+        "file_id": resultado.archivo.id,
+        "importados": resultado.importados,
+        "skipped": resultado.salteados
     }
 
 
-@router.get('/kpi')
-async def kpi_jovenes_recomendacion(db_session: Session = Depends(db.get_db)):
+BANDAS_EDAD = [('11-12', 12), ('13-14', 14), ('15-16', 16), ('17+', None)]
+ESTADOS_KPI = [ESTADO_ACTIVA, ESTADO_VENCE, ESTADO_VENCIDA, ESTADO_CANCELADA, ESTADO_NO_BAUT, ESTADO_SIN_EST]
+
+
+@router.get('/kpi', dependencies=[conditional_get(JovenRecomendacion.__tablename__)])
+async def kpi_jovenes_recomendacion(
+    por: Optional[str] = Query(None, description="Desglose adicional: unidad | sexo"),
+    db_session: AsyncSession = Depends(db.get_async_db),
+):
     """
     Calcula KPI: Jóvenes con Recomendación.
 
     Real      = activa + vence_pronto
     Potencial = todos (sin_estado + no_bautizado + vencida + cancelada + activa + vence_pronto)
     % = Real / Potencial * 100
+
+    Las listas de personas se piden aparte en /kpi/personas.
     """
-    todos = db_session.query(JovenRecomendacion).all()
-    if not todos:
-        return {
-            "indicador": "jovenes_recomendacion",
-            "nombre": "Jóvenes con Recomendación",
-            "real": 0, "potencial": 0, "porcentaje": 0, "meta": META_JOVENES_RECOMENDACION,
-            "desglose": {"activa":0,"vence_pronto":0,"vencida":0,"cancelada":0,"no_bautizado":0,"sin_estado":0},
-            "personas": {"activa":[],"vence_pronto":[],"vencida":[],"cancelada":[],"no_bautizado":[],"sin_estado":[]}
-        }
-
-    grupos = {
-        ESTADO_ACTIVA:    [],
-        ESTADO_VENCE:     [],
-        ESTADO_VENCIDA:   [],
-        ESTADO_CANCELADA: [],
-        ESTADO_NO_BAUT:   [],
-        ESTADO_SIN_EST:   [],
+    resultado = await recomendaciones.kpi(db_session, JovenRecomendacion, ESTADOS_KPI, por)
+    return {
+        "indicador": "jovenes_recomendacion",
+        "nombre": "Jóvenes con Recomendación",
+        "meta": META_JOVENES_RECOMENDACION,
+        **resultado,
     }
-    for j in todos:
-        est = j.estado_normalizado or ESTADO_SIN_EST
-        if est not in grupos:
-            est = ESTADO_SIN_EST
-        grupos[est].append(j)
 
-    print("[DEBUG KPI] Total jóvenes:", len(todos))
-    for estado, lista in grupos.items():
-        print(f"[DEBUG KPI] Estado: {estado}, Count: {len(lista)}")
 
-    reales     = grupos[ESTADO_ACTIVA] + grupos[ESTADO_VENCE]
-    print("[DEBUG KPI] Reales (activa + vence_pronto):", len(reales))
+@router.get('/kpi/personas', dependencies=[conditional_get(JovenRecomendacion.__tablename__)])
+async def kpi_jovenes_personas(
+    estado: List[str] = Query(..., description="Uno o más estados del desglose"),
+    offset: int = 0,
+    limit: int = recomendaciones.LIMITE_PERSONAS,
+    db_session: AsyncSession = Depends(db.get_async_db),
+):
+    """Jóvenes en los estados pedidos, paginados y ordenados por nombre."""
+    return await recomendaciones.personas(db_session, JovenRecomendacion, ESTADOS_KPI, estado, offset, limit)
 
-    potencial  = len(todos)
-    real       = len(reales)
-    porcentaje = round(real / potencial * 100, 1) if potencial > 0 else 0
 
-    print("[DEBUG KPI] Potencial:", potencial)
-    print("[DEBUG KPI] Real:", real)
-    print("[DEBUG KPI] Porcentaje:", porcentaje)
+@router.get('/kpi/desglose', dependencies=[conditional_get(JovenRecomendacion.__tablename__)])
+async def kpi_jovenes_desglose(db_session: AsyncSession = Depends(db.get_async_db)):
+    """Jóvenes: conteos por estado para cada unidad, sexo y banda de edad (sin listas de personas)."""
+    return await recomendaciones.desglose(db_session, JovenRecomendacion, ESTADOS_KPI, BANDAS_EDAD)
 
-    def personas(lista):
-        return [{"nombre": j.nombre, "unidad": j.unidad or '', "vencimiento": j.vencimiento_raw or '', "estado": j.estado_raw or ''} for j in lista]
 
-    return {
-        "indicador": "jovenes_recomendacion",
-        "nombre": "Jóvenes con Recomendación",
-        "real": real,
-        "potencial": potencial,
-        "porcentaje": porcentaje,
-        "meta": META_JOVENES_RECOMENDACION,
-        "desglose": {
-            "activa":         len(grupos[ESTADO_ACTIVA]),
-            "vence_pronto":   len(grupos[ESTADO_VENCE]),
-            "vencida":        len(grupos[ESTADO_VENCIDA]),
-            "cancelada":      len(grupos[ESTADO_CANCELADA]),
-            "no_bautizado":   len(grupos[ESTADO_NO_BAUT]),
-            "sin_estado":     len(grupos[ESTADO_SIN_EST]),
-        },
-        "personas": {
-            "activa":         personas(grupos[ESTADO_ACTIVA]),
-            "vence_pronto":   personas(grupos[ESTADO_VENCE]),
-            "vencida":        personas(grupos[ESTADO_VENCIDA]),
-            "cancelada":      personas(grupos[ESTADO_CANCELADA]),
-            "no_bautizado":   personas(grupos[ESTADO_NO_BAUT]),
-            "sin_estado":     personas(grupos[ESTADO_SIN_EST]),
-        }
-    }
+@router.get(
+    '/kpi/vencimientos',
+    dependencies=[conditional_get(JovenRecomendacion.__tablename__, extra=lambda: date.today().isoformat())],
+)
+async def kpi_jovenes_vencimientos(
+    horizonte: List[int] = Query(list(recomendaciones.HORIZONTES_DIAS), description="Días hacia adelante (repetible)"),
+    db_session: AsyncSession = Depends(db.get_async_db),
+):
+    """Jóvenes: recomendaciones vigentes que vencen en los próximos 30/60/90 días, por unidad."""
+    return await recomendaciones.vencimientos(db_session, JovenRecomendacion, horizonte)
+
+
+@router.get(
+    '/historico',
+    dependencies=[conditional_get(HistoricoCarga.__tablename__, HistoricoConteo.__tablename__)],
+)
+async def historico_jovenes(
+    unidad: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    desglose: bool = False,
+    db_session: AsyncSession = Depends(db.get_async_db),
+):
+    """Jóvenes: serie de tiempo (total / con recomendación vigente) con una entrada por carga, leída del rollup."""
+    return await historico.serie(db_session, 'jovenes', unidad, desde, hasta, desglose)
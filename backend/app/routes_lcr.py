@@ -1,23 +1,37 @@
 from __future__ import annotations
 
+import logging
+import threading
+from datetime import datetime
 from statistics import mean
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import requests
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from . import asistencia, db
+from .asistencia import UNIDADES_ASISTENCIA
+from .lcr_snapshots import (
+    KIND_ASISTENCIA,
+    KIND_JOVENES,
+    extract_weeks,
+    is_stale,
+    load_snapshots,
+    upsert_snapshot,
+)
+
+if TYPE_CHECKING:
+    import requests
 
 router = APIRouter(prefix='/lcr', tags=['lcr'])
 
-UNIDADES_ASISTENCIA = {
-    'Bella Italia': 238619,
-    'Belloni': 204625,
-    'Libia': 181420,
-    'Los Ceibos': 209392,
-    'Montevideo 14': 97829,
-    'Pando': 219444,
-    'Toledo': 207462,
-}
+UNIDAD_ESTACA = 511927
+LCR_TIMEOUT = 20
+
+# Refrescos en segundo plano en curso, para no lanzar dos veces el mismo año.
+_refrescos_en_curso: set[tuple[int, str]] = set()
+_refrescos_lock = threading.Lock()
 
 
 class LcrIndicadoresBody(BaseModel):
@@ -25,23 +39,7 @@ class LcrIndicadoresBody(BaseModel):
     lang: str = Field(default='spa', min_length=2, max_length=8)
     cookie: str | None = None
     authorization: str | None = None
-
-
-
-def _extract_values(payload: Any) -> list[float]:
-    values: list[float] = []
-
-    if isinstance(payload, dict):
-        for key, value in payload.items():
-            if key == 'value' and isinstance(value, (int, float)):
-                values.append(float(value))
-            else:
-                values.extend(_extract_values(value))
-    elif isinstance(payload, list):
-        for item in payload:
-            values.extend(_extract_values(item))
-
-    return values
+    refrescar: bool = False
 
 
 
@@ -72,53 +70,41 @@ def _build_headers(body: LcrIndicadoresBody) -> dict[str, str]:
 
 
 
-@router.post('/indicadores')
-def obtener_indicadores_lcr(body: LcrIndicadoresBody):
-    headers = _build_headers(body)
-    timeout = 20
+def _fetch_asistencia(nombre: str, unidad: int, year: int, lang: str, headers: dict[str, str]) -> dict[str, float]:
+    import requests
 
-    asistencia_unidades: list[dict[str, Any]] = []
+    endpoint = f'https://lcr.churchofjesuschrist.org/api/sacrament-attendance/unit/{unidad}/years/{year}?lang={lang}'
+    try:
+        response = requests.get(endpoint, headers=headers, timeout=LCR_TIMEOUT)
+    except requests.RequestException as exc:
+        raise HTTPException(status_code=502, detail=f'No se pudo consultar LCR para {nombre}: {exc}') from exc
 
-    for nombre, unidad in UNIDADES_ASISTENCIA.items():
-        endpoint = f'https://lcr.churchofjesuschrist.org/api/sacrament-attendance/unit/{unidad}/years/{body.year}?lang={body.lang}'
-        try:
-            response = requests.get(endpoint, headers=headers, timeout=timeout)
-        except requests.RequestException as exc:
-            raise HTTPException(status_code=502, detail=f'No se pudo consultar LCR para {nombre}: {exc}') from exc
-
-        if response.status_code in (401, 403):
-            raise HTTPException(
-                status_code=401,
-                detail='LCR rechazó la autenticación. Revisa cookie/authorization de sesión.',
-            )
-
-        if not response.ok:
-            raise HTTPException(
-                status_code=502,
-                detail=f'LCR respondió {response.status_code} para {nombre}',
-            )
-
-        payload = _safe_json(response, endpoint)
-        valores = _extract_values(payload)
-        promedio = mean(valores) if valores else 0.0
+    if response.status_code in (401, 403):
+        raise HTTPException(
+            status_code=401,
+            detail='LCR rechazó la autenticación. Revisa cookie/authorization de sesión.',
+        )
+
+    if not response.ok:
+        raise HTTPException(
+            status_code=502,
+            detail=f'LCR respondió {response.status_code} para {nombre}',
+        )
+
+    return extract_weeks(_safe_json(response, endpoint))
 
-        asistencia_unidades.append({
-            'unidad': nombre,
-            'unidad_id': unidad,
-            'cantidad_muestras': len(valores),
-            'promedio': round(promedio, 2),
-            'suma': round(sum(valores), 2),
-        })
 
-    total_asistencia = round(sum(item['promedio'] for item in asistencia_unidades), 2)
+
+def _fetch_resumen_jovenes(headers: dict[str, str]) -> dict[str, int]:
+    import requests
 
     youth_endpoint = (
         'https://lcr.churchofjesuschrist.org/api/temple-recommend/youth-report'
-        '?unitNumber=511927&loadTableData=true&lang=spa'
+        f'?unitNumber={UNIDAD_ESTACA}&loadTableData=true&lang=spa'
     )
 
     try:
-        youth_response = requests.get(youth_endpoint, headers=headers, timeout=timeout)
+        youth_response = requests.get(youth_endpoint, headers=headers, timeout=LCR_TIMEOUT)
     except requests.RequestException as exc:
         raise HTTPException(status_code=502, detail=f'No se pudo consultar reporte de jóvenes: {exc}') from exc
 
@@ -144,8 +130,6 @@ def obtener_indicadores_lcr(body: LcrIndicadoresBody):
                 table_data = maybe_rows
                 break
 
-    total_jovenes = len(table_data)
-
     activos = 0
     vence_pronto = 0
 
@@ -165,11 +149,123 @@ def obtener_indicadores_lcr(body: LcrIndicadoresBody):
         if any(token in estado for token in ('expires soon', 'vence pronto', 'expiring')):
             vence_pronto += 1
 
+    return {'total': len(table_data), 'activos': activos, 'vence_pronto': vence_pronto}
+
+
+
+def _refrescar_snapshots(
+    session: Session,
+    year: int,
+    lang: str,
+    headers: dict[str, str],
+    unidades: dict[str, int],
+    incluir_jovenes: bool,
+) -> None:
+    """Descarga de LCR los reportes indicados y los fusiona en el almacén local."""
+    for nombre, unidad in unidades.items():
+        semanas = _fetch_asistencia(nombre, unidad, year, lang, headers)
+        snapshot = upsert_snapshot(session, KIND_ASISTENCIA, unidad, year, semanas=semanas)
+        asistencia.guardar(session, nombre, asistencia.semanas_lcr(snapshot.semanas), fuente='lcr')
+
+    if incluir_jovenes:
+        upsert_snapshot(session, KIND_JOVENES, UNIDAD_ESTACA, year, resumen=_fetch_resumen_jovenes(headers))
+
+    session.commit()
+
+
+
+def _refrescar_en_segundo_plano(year: int, lang: str, headers: dict[str, str]) -> None:
+    key = (year, lang)
+    with _refrescos_lock:
+        if key in _refrescos_en_curso:
+            return
+        _refrescos_en_curso.add(key)
+
+    session = db.SessionLocal()
+    try:
+        _refrescar_snapshots(session, year, lang, headers, UNIDADES_ASISTENCIA, incluir_jovenes=True)
+        logging.info('[LCR] Snapshots %s refrescados en segundo plano', year)
+    except Exception as exc:
+        # Se sigue sirviendo el snapshot anterior; el próximo pedido vuelve a intentar.
+        session.rollback()
+        detail = exc.detail if isinstance(exc, HTTPException) else repr(exc)
+        logging.warning('[LCR] No se pudo refrescar snapshots %s: %s', year, detail)
+    finally:
+        session.close()
+        with _refrescos_lock:
+            _refrescos_en_curso.discard(key)
+
+
+
+@router.post('/indicadores')
+def obtener_indicadores_lcr(
+    body: LcrIndicadoresBody,
+    background_tasks: BackgroundTasks,
+    session: Session = Depends(db.get_db),
+):
+    """
+    Responde desde el almacén local de snapshots. Solo consulta LCR en vivo para los
+    reportes que todavía no existen (o con refrescar=true); si hay snapshots
+    desactualizados se devuelven igual y se refrescan en segundo plano.
+    """
+    headers = _build_headers(body)
+    snapshots = load_snapshots(session, body.year)
+
+    if body.refrescar:
+        faltantes = dict(UNIDADES_ASISTENCIA)
+        faltan_jovenes = True
+    else:
+        faltantes = {
+            nombre: unidad
+            for nombre, unidad in UNIDADES_ASISTENCIA.items()
+            if (KIND_ASISTENCIA, unidad) not in snapshots
+        }
+        faltan_jovenes = (KIND_JOVENES, UNIDAD_ESTACA) not in snapshots
+
+    if faltantes or faltan_jovenes:
+        _refrescar_snapshots(session, body.year, body.lang, headers, faltantes, faltan_jovenes)
+        snapshots = load_snapshots(session, body.year)
+
+    desactualizado = any(is_stale(snap) for snap in snapshots.values())
+    puede_refrescar = bool(body.cookie or body.authorization)
+    if desactualizado and puede_refrescar:
+        background_tasks.add_task(_refrescar_en_segundo_plano, body.year, body.lang, headers)
+
+    asistencia_unidades: list[dict[str, Any]] = []
+
+    for nombre, unidad in UNIDADES_ASISTENCIA.items():
+        snap = snapshots[(KIND_ASISTENCIA, unidad)]
+        valores = list((snap.semanas or {}).values())
+        promedio = mean(valores) if valores else 0.0
+
+        asistencia_unidades.append({
+            'unidad': nombre,
+            'unidad_id': unidad,
+            'cantidad_muestras': len(valores),
+            'promedio': round(promedio, 2),
+            'suma': round(sum(valores), 2),
+        })
+
+    total_asistencia = round(sum(item['promedio'] for item in asistencia_unidades), 2)
+
+    resumen_jovenes = snapshots[(KIND_JOVENES, UNIDAD_ESTACA)].resumen or {}
+    total_jovenes = resumen_jovenes.get('total', 0)
+    activos = resumen_jovenes.get('activos', 0)
+    vence_pronto = resumen_jovenes.get('vence_pronto', 0)
+
     jovenes_activos_total = activos + vence_pronto
     porcentaje_jovenes = round((jovenes_activos_total / total_jovenes) * 100, 2) if total_jovenes else 0
 
+    refreshed = [snap.refreshed_at for snap in snapshots.values() if snap.refreshed_at]
+    actualizado_en: datetime | None = min(refreshed) if refreshed else None
+
     return {
         'year': body.year,
+        'snapshot': {
+            'actualizado_en': actualizado_en.isoformat() if actualizado_en else None,
+            'desactualizado': desactualizado,
+            'refrescando': desactualizado and puede_refrescar,
+        },
         'asistencia': {
             'indicador': 'asistencia_sacramental',
             'total': total_asistencia,
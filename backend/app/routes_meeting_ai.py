@@ -1,17 +1,23 @@
+import base64
+import binascii
 import json
+import logging
 import os
 from datetime import datetime
 from typing import Any
 
-import requests
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
+from sqlalchemy import String, and_, case, func, or_, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .db import SessionLocal
-from .models import AppSetting, MeetingMinute
+from .db import SessionLocal, get_async_db
+from .meeting_search import search_minutes
+from .models import AppSetting, MeetingAnalysis, MeetingChunk, MeetingMinute
 
 router = APIRouter(tags=["meeting-ai"])
+logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = """Actúa como un asistente inteligente especializado en analizar reuniones, clases, discursos y conversaciones.
 
@@ -40,6 +46,9 @@ class AnalyzeRequest(BaseModel):
 class AskRequest(BaseModel):
     org_id: str = "default"
     question: str
+    limit: int = Field(default=8, ge=1, le=30)
+    date_from: str | None = None
+    date_to: str | None = None
 
 
 class SummarizeRequest(BaseModel):
@@ -94,9 +103,74 @@ def _set_setting(db: Session, key: str, value: Any):
         db.add(AppSetting(key=key, value=payload))
 
 
+DEFAULT_MEMORY = {"decisiones_vigentes": [], "tareas_abiertas": [], "riesgos": [], "temas_recurrentes": []}
+
+
+def _analysis_to_dict(r: MeetingAnalysis) -> dict:
+    return {
+        "meeting_id": r.meeting_id,
+        "date": r.date,
+        "participants": r.participants or [],
+        "analysis": r.analysis or "",
+        "created_at": r.created_at.isoformat() if r.created_at else None,
+    }
+
+
+def _migrate_legacy_analyses(db: Session, org_id: str):
+    """Pasa el historial guardado como JSON en app_settings a la tabla meeting_analyses (una sola vez)."""
+    legacy = db.get(AppSetting, f"meeting_ai:{org_id}:meetings")
+    if not legacy:
+        return
+    try:
+        meetings = json.loads(legacy.value)
+    except Exception:
+        meetings = []
+    for item in meetings if isinstance(meetings, list) else []:
+        if not isinstance(item, dict):
+            continue
+        created_at = None
+        try:
+            created_at = datetime.fromisoformat(str(item.get("created_at") or "").rstrip("Z"))
+        except ValueError:
+            pass
+        db.add(MeetingAnalysis(
+            org_id=org_id,
+            meeting_id=item.get("meeting_id") or "",
+            date=item.get("date") or "",
+            participants=item.get("participants") or [],
+            analysis=item.get("analysis") or "",
+            created_at=created_at,
+        ))
+    db.delete(legacy)
+    db.commit()
+
+
+def _recent_analyses(
+    db: Session,
+    org_id: str,
+    limit: int,
+    date_from: str | None = None,
+    date_to: str | None = None,
+) -> list[dict]:
+    """Últimos `limit` análisis de la organización (opcionalmente filtrados por fecha), en orden cronológico."""
+    query = db.query(MeetingAnalysis).filter(MeetingAnalysis.org_id == org_id)
+    if date_from:
+        query = query.filter(MeetingAnalysis.date >= date_from)
+    if date_to:
+        query = query.filter(MeetingAnalysis.date <= date_to)
+    rows = (
+        query.order_by(MeetingAnalysis.date.desc(), MeetingAnalysis.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    return [_analysis_to_dict(r) for r in reversed(rows)]
+
+
 def _chat_ollama(messages: list[dict[str, str]]) -> str:
     ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434/api/chat")
     model = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
+    import requests
+
     try:
         resp = requests.post(ollama_url, json={"model": model, "stream": False, "messages": messages}, timeout=120)
         resp.raise_for_status()
@@ -112,6 +186,7 @@ def _chat_openrouter(messages: list[dict[str, str]]) -> str:
 
     base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
     model = os.getenv("OPENROUTER_MODEL", "anthropic/claude-3-haiku")
+    import requests
 
     try:
         resp = requests.post(
@@ -294,14 +369,12 @@ def analyze_meeting(body: AnalyzeRequest):
 
     db = SessionLocal()
     try:
-        meetings_key = f"meeting_ai:{body.org_id}:meetings"
-        memory_key = f"meeting_ai:{body.org_id}:memory"
-        meetings = _get_setting(db, meetings_key, [])
-        memory = _get_setting(db, memory_key, {"decisiones_vigentes": [], "tareas_abiertas": [], "riesgos": [], "temas_recurrentes": []})
+        _migrate_legacy_analyses(db, body.org_id)
+        memory = _get_setting(db, f"meeting_ai:{body.org_id}:memory", DEFAULT_MEMORY)
 
         meeting_date = body.date or datetime.utcnow().date().isoformat()
         meeting_id = body.meeting_id or f"meeting-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
-        context = json.dumps({"memoria": memory, "ultimas_reuniones": meetings[-5:]}, ensure_ascii=False)
+        context = json.dumps({"memoria": memory, "ultimas_reuniones": _recent_analyses(db, body.org_id, 5)}, ensure_ascii=False)
 
         user_prompt = f"""Contexto previo de la organización:
 {context}
@@ -321,30 +394,57 @@ Devuelve el análisis en el formato solicitado."""
             {"role": "user", "content": user_prompt},
         ])
 
-        meetings.append({
-            "meeting_id": meeting_id,
-            "date": meeting_date,
-            "participants": body.participants,
-            "analysis": analysis,
-            "created_at": datetime.utcnow().isoformat() + "Z",
-        })
-
-        _set_setting(db, meetings_key, meetings[-30:])
-        _set_setting(db, memory_key, memory)
+        db.add(MeetingAnalysis(
+            org_id=body.org_id,
+            meeting_id=meeting_id,
+            date=meeting_date,
+            participants=body.participants,
+            analysis=analysis,
+        ))
         db.commit()
         return {"ok": True, "meeting_id": meeting_id, "analysis": analysis, "memory": memory}
     finally:
         db.close()
 
 
+ASK_MAX_PASSAGES = 8
+# Tope de caracteres de pasajes que se envían al modelo por pregunta.
+ASK_CONTEXT_CHARS = int(os.getenv("MEETING_AI_CONTEXT_CHARS", "6000"))
+
+
 @router.post("/ai/meetings/ask")
-def ask_meeting_context(body: AskRequest):
+def ask_meeting_context(body: AskRequest, background_tasks: BackgroundTasks):
+    from . import meeting_embeddings  # numpy: se carga recién al primer uso
+
+    # Actas todavía sin indexar: se indexan después de responder, no dentro de la pregunta.
+    background_tasks.add_task(meeting_embeddings.backfill_en_segundo_plano)
     db = SessionLocal()
     try:
-        context = {
-            "memoria": _get_setting(db, f"meeting_ai:{body.org_id}:memory", {}),
-            "ultimas_reuniones": _get_setting(db, f"meeting_ai:{body.org_id}:meetings", [])[-8:],
-        }
+        _migrate_legacy_analyses(db, body.org_id)
+        # Pasajes más parecidos a la pregunta (búsqueda semántica sobre todo el archivo),
+        # completados con coincidencias de texto. Si no hay nada, últimos análisis.
+        top_k = min(body.limit, ASK_MAX_PASSAGES)
+        similares = meeting_embeddings.retrieve(
+            db, body.question, top_k=top_k, date_from=body.date_from, date_to=body.date_to,
+            max_chars=ASK_CONTEXT_CHARS,
+        )
+        pasajes = [{"fecha": p["date"], "categoria": p["category"], "texto": p["text"]} for p in similares]
+        cubiertas = {p["meeting_id"] for p in similares}
+        used = sum(len(p["texto"]) for p in pasajes)
+        for hit in search_minutes(
+            db, body.question, date_from=body.date_from, date_to=body.date_to,
+            limit=top_k, match_any=True, snippet_words=48,
+        )["items"]:
+            if hit["id"] in cubiertas or used + len(hit["snippet"]) > ASK_CONTEXT_CHARS:
+                continue
+            pasajes.append({"fecha": hit["date"], "categoria": hit["category"], "texto": hit["snippet"]})
+            used += len(hit["snippet"])
+
+        context = {"memoria": _get_setting(db, f"meeting_ai:{body.org_id}:memory", {})}
+        if pasajes:
+            context["pasajes_relevantes"] = pasajes
+        else:
+            context["ultimas_reuniones"] = _recent_analyses(db, body.org_id, body.limit, body.date_from, body.date_to)
         answer = _chat_ollama([
             {"role": "system", "content": "Eres asistente experto de la organización. Responde solo con información registrada. Si no existe, indícalo."},
             {"role": "user", "content": f"Contexto: {json.dumps(context, ensure_ascii=False)}\n\nPregunta: {body.question}"},
@@ -354,6 +454,33 @@ def ask_meeting_context(body: AskRequest):
         db.close()
 
 
+@router.post("/ai/meetings/reindex")
+def reindex_meetings():
+    """Vuelve a generar los fragmentos y vectores de todas las actas."""
+    from . import meeting_embeddings
+
+    db = SessionLocal()
+    try:
+        db.query(MeetingChunk).delete(synchronize_session=False)
+        db.commit()
+        total = meeting_embeddings.backfill(db, limit=None)
+        return {"ok": True, "actas": total, "modelo": meeting_embeddings.model_name()}
+    finally:
+        db.close()
+
+
+def _index_minute(db: Session, record: MeetingMinute) -> None:
+    # Si falla el indexado el acta igual queda guardada; el backfill la toma tras la próxima pregunta.
+    from . import meeting_embeddings
+
+    try:
+        meeting_embeddings.index_meeting(db, record)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logger.warning("No se pudo indexar el acta %s: %s", record.id, exc)
+
+
 # ── CRUD de Actas ──────────────────────────────────────────────────────────────
 
 class MeetingMinuteIn(BaseModel):
@@ -377,21 +504,126 @@ def _minute_to_dict(r: MeetingMinute) -> dict:
     }
 
 
+SUMMARY_PREVIEW_CHARS = 160
+
+
+def _encode_cursor(date: str, created_at: datetime | None, meeting_id: str) -> str:
+    raw = json.dumps([date, created_at.isoformat() if created_at else None, meeting_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, datetime | None, str]:
+    try:
+        date, created_at, meeting_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(date), datetime.fromisoformat(created_at) if created_at else None, str(meeting_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+
+def _created_key(dialect_name: str):
+    """
+    created_at para ordenar y comparar con el cursor. En Postgres es la columna tal cual
+    (el parámetro viaja como timestamp). SQLite lo guarda como texto: CURRENT_TIMESTAMP
+    sin microsegundos y SQLAlchemy con 6 dígitos; se completa a 6 para que el texto
+    ordene igual que la fecha y coincida con cómo se bindea un datetime.
+    """
+    if dialect_name != "sqlite":
+        return MeetingMinute.created_at
+    texto = type_coerce(MeetingMinute.created_at, String)
+    return type_coerce(
+        case((func.length(texto) == 19, texto + ".000000"), else_=texto),
+        MeetingMinute.created_at.type,
+    )
+
+
 @router.get("/meetings")
-def list_meetings(category: str = "consejo"):
+async def list_meetings(
+    category: str = "consejo",
+    limit: int = Query(30, ge=1, le=100),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Listado paginado por cursor sobre (date, created_at, id), de más nueva a más vieja.
+    Solo trae columnas livianas y un recorte del resumen; el acta completa está en /meetings/{id}.
+    """
+    created_key = _created_key(db.bind.dialect.name)
+    query = (
+        select(
+            MeetingMinute.id,
+            MeetingMinute.category,
+            MeetingMinute.date,
+            MeetingMinute.participants,
+            func.substr(MeetingMinute.summary, 1, SUMMARY_PREVIEW_CHARS).label("summary_preview"),
+            func.length(MeetingMinute.summary).label("summary_length"),
+            MeetingMinute.created_at,
+            MeetingMinute.updated_at,
+        )
+        .where(MeetingMinute.category == category)
+    )
+    if cursor:
+        c_date, c_created, c_id = _decode_cursor(cursor)
+        if c_created is None:  # created_at siempre tiene server_default; por las dudas, desempata el id
+            siguientes = MeetingMinute.id < c_id
+        else:
+            siguientes = or_(
+                created_key < c_created,
+                and_(created_key == c_created, MeetingMinute.id < c_id),
+            )
+        query = query.where(or_(
+            MeetingMinute.date < c_date,
+            and_(MeetingMinute.date == c_date, siguientes),
+        ))
+    rows = (await db.execute(
+        query
+        .order_by(MeetingMinute.date.desc(), created_key.desc(), MeetingMinute.id.desc())
+        .limit(limit + 1)
+    )).all()
+    page = rows[:limit]
+    items = [
+        {
+            "id": r.id,
+            "category": r.category,
+            "date": r.date,
+            "participants": r.participants or "",
+            "summary_preview": r.summary_preview or "",
+            "summary_truncated": (r.summary_length or 0) > SUMMARY_PREVIEW_CHARS,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+            "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+        }
+        for r in page
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = _encode_cursor(last.date, last.created_at, last.id)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/meetings/search")
+def search_meetings(
+    q: str = Query(..., min_length=2, max_length=200),
+    category: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+):
     db = SessionLocal()
     try:
-        rows = (
-            db.query(MeetingMinute)
-            .filter(MeetingMinute.category == category)
-            .order_by(MeetingMinute.date.desc(), MeetingMinute.created_at.desc())
-            .all()
-        )
-        return [_minute_to_dict(r) for r in rows]
+        return search_minutes(db, q, category=category, date_from=date_from, date_to=date_to, limit=limit, offset=offset)
     finally:
         db.close()
 
 
+@router.get("/meetings/{meeting_id}")
+async def get_meeting(meeting_id: str, db: AsyncSession = Depends(get_async_db)):
+    record = await db.get(MeetingMinute, meeting_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Acta no encontrada.")
+    return _minute_to_dict(record)
+
+
 @router.post("/meetings")
 def create_meeting(body: MeetingMinuteIn):
     if not body.date:
@@ -408,6 +640,7 @@ def create_meeting(body: MeetingMinuteIn):
         db.add(record)
         db.commit()
         db.refresh(record)
+        _index_minute(db, record)
         return _minute_to_dict(record)
     finally:
         db.close()
@@ -426,6 +659,7 @@ def update_meeting(meeting_id: str, body: MeetingMinuteIn):
         record.summary = body.summary
         db.commit()
         db.refresh(record)
+        _index_minute(db, record)
         return _minute_to_dict(record)
     finally:
         db.close()
@@ -438,6 +672,7 @@ def delete_meeting(meeting_id: str):
         record = db.query(MeetingMinute).filter(MeetingMinute.id == meeting_id).first()
         if not record:
             raise HTTPException(status_code=404, detail="Acta no encontrada.")
+        db.query(MeetingChunk).filter(MeetingChunk.meeting_id == meeting_id).delete(synchronize_session=False)
         db.delete(record)
         db.commit()
         return {"ok": True}
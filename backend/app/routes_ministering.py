@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import db
+from .dataset_versions import conditional_get
 from .models import AppSetting
 
 router = APIRouter()
@@ -14,9 +17,11 @@ class MinisteringPayload(BaseModel):
     text: str = ''
 
 
-@router.get('/ministering')
-def get_ministering_text(session: Session = Depends(db.get_db)):
-    setting = session.query(AppSetting).filter(AppSetting.key == MINISTERING_TEXT_KEY).first()
+@router.get('/ministering', dependencies=[conditional_get(AppSetting.__tablename__)])
+async def get_ministering_text(session: AsyncSession = Depends(db.get_async_db)):
+    setting = (await session.execute(
+        select(AppSetting).where(AppSetting.key == MINISTERING_TEXT_KEY)
+    )).scalars().first()
     return {'text': setting.value if setting else ''}
 
 
@@ -1,13 +1,24 @@
 import io
+import logging
 import re
 import csv
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+import unicodedata
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .db import get_db
-from .models import MisioneroCampo, PdfFile
+from . import historico, importacion, misioneros
+from .dataset_versions import conditional_get
+from .db import get_async_db, get_db
+from .models import HistoricoCarga, HistoricoConteo, MisioneroCampo
 
 router = APIRouter(prefix='/misioneros', tags=['misioneros'])
 
+logger = logging.getLogger(__name__)
+
 META_MISIONEROS = 19
 MISION_SERVICIO_LABEL = "Misión de servicio a la Iglesia"
 
@@ -21,194 +32,179 @@ def es_mision_servicio(mision: str) -> bool:
     return "servicio a la iglesia" in m or "servicio iglesia" in m
 
 
+def _misioneros_pagina(page) -> list[dict]:
+    """Filas de una página del PDF: primero extract_tables(), si no hay tablas extract_text() línea por línea."""
+    filas = []
+    # ── Intentar extract_tables ──────────────────────────────────────────────
+    tables = page.extract_tables()
+    if tables:
+        for table in tables:
+            for row in table:
+                if not row or not any(row):
+                    continue
+                cells = [str(c).strip() if c else '' for c in row]
+                # Detectar fila de encabezado: solo si contiene "nombre" + otra columna de cabecera
+                joined = ' '.join(cells).lower()
+                if 'nombre' in joined and ('comenzó' in joined or 'comenzo' in joined or 'término' in joined):
+                    continue
+                # Saltar filas de título/sección
+                if joined.startswith('misioneros') or 'estaca' in joined or 'mi plan' == joined.strip():
+                    continue
+                # La primera celda no vacía es el nombre
+                nombre = next((c for c in cells if c), '')
+                if not nombre:
+                    continue
+                filas.append({
+                    'nombre':           cells[0] if cells[0] else nombre,
+                    'mision':           cells[1] if len(cells) > 1 else '',
+                    'comenzo':          cells[2] if len(cells) > 2 else '',
+                    'termino_esperado': cells[3] if len(cells) > 3 else '',
+                    'unidad_actual':    cells[4] if len(cells) > 4 else '',
+                })
+        return filas
+
+    # ── Fallback: extract_text line-by-line ─────────────────────────────────
+    text = page.extract_text() or ''
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        # Saltar encabezados y títulos de página
+        lower = line.lower()
+        if 'nombre' in lower and ('comenzó' in lower or 'comenzo' in lower or 'término' in lower):
+            continue
+        if 'misioneros de' in lower or 'estaca' in lower or 'mi plan' in lower:
+            continue
+        # Separar por tabulaciones, múltiples espacios o |
+        parts = re.split(r'\t|  {2,}|\|', line)
+        parts = [p.strip() for p in parts if p.strip()]
+        if len(parts) >= 1:
+            filas.append({
+                'nombre':           parts[0],
+                'mision':           parts[1] if len(parts) > 1 else '',
+                'comenzo':          parts[2] if len(parts) > 2 else '',
+                'termino_esperado': parts[3] if len(parts) > 3 else '',
+                'unidad_actual':    parts[4] if len(parts) > 4 else '',
+            })
+    return filas
+
+
 def _parse_misioneros_pdf(content: bytes) -> list[dict]:
     """Extrae misioneros de un PDF usando pdfplumber.
-    Intenta primero extract_tables(), si no hay tablas usa extract_text() line-by-line.
     El PDF debe tener columnas: Nombre / Misión / Comenzó / Término esperado / Unidad actual
     """
-    try:
-        import pdfplumber
-    except ImportError:
-        raise HTTPException(status_code=500, detail="pdfplumber no está instalado")
+    filas = importacion.paginas_pdf(content, _misioneros_pagina)
+    for fila_num, fila in enumerate(filas, start=1):
+        fila['fila_numero'] = fila_num
+    return filas
 
-    filas = []
-    fila_num = 1
 
-    with pdfplumber.open(io.BytesIO(content)) as pdf:
-        print(f"[DEBUG MISIONEROS PDF] Páginas: {len(pdf.pages)}")
-        for page_idx, page in enumerate(pdf.pages):
-            # ── Intentar extract_tables ──────────────────────────────────────
-            tables = page.extract_tables()
-            print(f"[DEBUG MISIONEROS PDF] Página {page_idx+1}: {len(tables)} tabla(s) encontrada(s)")
-            if tables:
-                for t_idx, table in enumerate(tables):
-                    print(f"[DEBUG MISIONEROS PDF] Tabla {t_idx}: {len(table)} filas")
-                    for r_idx, row in enumerate(table):
-                        if not row or not any(row):
-                            continue
-                        cells = [str(c).strip() if c else '' for c in row]
-                        print(f"[DEBUG MISIONEROS PDF]   fila {r_idx}: {cells[:4]}")
-                        # Detectar fila de encabezado: solo si contiene "nombre" + otra columna de cabecera
-                        joined = ' '.join(cells).lower()
-                        if 'nombre' in joined and ('comenzó' in joined or 'comenzo' in joined or 'término' in joined):
-                            print(f"[DEBUG MISIONEROS PDF]   → encabezado, salteada")
-                            continue
-                        # Saltar filas de título/sección
-                        if joined.startswith('misioneros') or 'estaca' in joined or 'mi plan' == joined.strip():
-                            continue
-                        # La primera celda no vacía es el nombre
-                        nombre = next((c for c in cells if c), '')
-                        if not nombre:
-                            continue
-                        # Asignar columnas flexiblemente: tomar el primer no-vacío como nombre
-                        # y las demás en orden
-                        non_empty = [c for c in cells if c]
-                        filas.append({
-                            'nombre':           cells[0] if cells[0] else non_empty[0],
-                            'mision':           cells[1] if len(cells) > 1 else '',
-                            'comenzo':          cells[2] if len(cells) > 2 else '',
-                            'termino_esperado': cells[3] if len(cells) > 3 else '',
-                            'unidad_actual':    cells[4] if len(cells) > 4 else '',
-                            'fila_numero':      fila_num,
-                        })
-                        fila_num += 1
-            else:
-                # ── Fallback: extract_text line-by-line ─────────────────────
-                text = page.extract_text() or ''
-                print(f"[DEBUG MISIONEROS PDF] Página {page_idx+1} texto (primeros 300 chars): {text[:300]!r}")
-                for line in text.split('\n'):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    # Saltar encabezados y títulos de página
-                    lower = line.lower()
-                    if 'nombre' in lower and ('comenzó' in lower or 'comenzo' in lower or 'término' in lower):
-                        continue
-                    if 'misioneros de' in lower or 'estaca' in lower or 'mi plan' in lower:
-                        continue
-                    # Separar por tabulaciones, múltiples espacios o |
-                    parts = re.split(r'\t|  {2,}|\|', line)
-                    parts = [p.strip() for p in parts if p.strip()]
-                    if len(parts) >= 1:
-                        filas.append({
-                            'nombre':           parts[0],
-                            'mision':           parts[1] if len(parts) > 1 else '',
-                            'comenzo':          parts[2] if len(parts) > 2 else '',
-                            'termino_esperado': parts[3] if len(parts) > 3 else '',
-                            'unidad_actual':    parts[4] if len(parts) > 4 else '',
-                            'fila_numero':      fila_num,
-                        })
-                        fila_num += 1
-
-    print(f"[DEBUG MISIONEROS PDF] Total filas parseadas: {len(filas)}")
-    return filas
+# ── Texto pegado del portal ──────────────────────────────────────────────────
+
+# Fechas tipo "3 ene 2025" / "15 agosto 2026"; \s+ acepta cualquier espacio
+MONTHS = (r'(?:ene(?:ro)?|feb(?:rero)?|mar(?:zo)?|abr(?:il)?|may(?:o)?|jun(?:io)?'
+          r'|jul(?:io)?|ago(?:sto)?|sep(?:t(?:iembre)?)?|set|oct(?:ubre)?'
+          r'|nov(?:iembre)?|dic(?:iembre)?)')
+DATE_RE = re.compile(rf'\b\d{{1,2}}\s+{MONTHS}\.?\s+\d{{4}}\b', re.IGNORECASE)
+ENTRY_START_RE = re.compile(r'^[A-ZÁÉÍÓÚÑÜ]')
+TITULO_RE = re.compile(r'^misioneros\s+(de|en)\b')
+ESPACIOS_RE = re.compile(r'  +')
+MI_PLAN_RE = re.compile(r'\s*mi plan\s*$', re.IGNORECASE)
+SERVICIO_RE = re.compile(r'misi[oó]n\s+de\s+servicio', re.IGNORECASE)
+
+MISSION_START = {
+    'bolivia','méxico','mexico','brasil','brazil','perú','peru','ecuador',
+    'argentina','chile','colombia','paraguay','uruguay','venezuela',
+    'guatemala','costa','panamá','panama','honduras','nicaragua',
+    'estados','usa','canada','canadá','españa','spain','alemania',
+    'australia','filipinas','japan','corea','korea','misión','mision','mission',
+    'north','south','east','west','ciudad','new','el',
+}
+SKIP_TXT = {'mi plan', 'unidad actual', 'término esperado', 'termino esperado',
+            'comenzó', 'comenzo', 'misión', 'mision', 'nombre'}
 
 
-def _parse_misioneros_txt(text: str) -> list[dict]:
-    """
-    Parsea el texto copiado del portal de miembros.
-    El portal pega con U+00A0 (non-breaking space) en lugar de espacios normales.
-    """
-    import unicodedata
+@lru_cache(maxsize=1)
+def _tabla_espacios() -> dict:
+    """str.translate: todo espacio Unicode (categoría Zs, todos en el BMP), tab y CR → ' '."""
+    tabla = {cp: ' ' for cp in range(0x10000) if unicodedata.category(chr(cp)) == 'Zs'}
+    tabla.update({ord('\t'): ' ', ord('\r'): ' '})
+    return tabla
 
-    # ── Paso 1: normalización TOTAL de todo tipo de espacio unicode ──────────
-    normalized = ''
-    for ch in text:
-        if unicodedata.category(ch) == 'Zs' or ch in ('\t', '\r'):
-            normalized += ' '
-        else:
-            normalized += ch
-    text = normalized
-
-    # ── Paso 2: Regex de fechas — usa \s+ para capturar cualquier espacio ────
-    MONTHS = (r'(?:ene(?:ro)?|feb(?:rero)?|mar(?:zo)?|abr(?:il)?|may(?:o)?|jun(?:io)?'
-              r'|jul(?:io)?|ago(?:sto)?|sep(?:t(?:iembre)?)?|set|oct(?:ubre)?'
-              r'|nov(?:iembre)?|dic(?:iembre)?)')
-    DATE_RE = re.compile(rf'\b\d{{1,2}}\s+{MONTHS}\.?\s+\d{{4}}\b', re.IGNORECASE)
-
-    SERV_LABEL = 'Misión de servicio a la Iglesia'
-    MISSION_START = {
-        'bolivia','méxico','mexico','brasil','brazil','perú','peru','ecuador',
-        'argentina','chile','colombia','paraguay','uruguay','venezuela',
-        'guatemala','costa','panamá','panama','honduras','nicaragua',
-        'estados','usa','canada','canadá','españa','spain','alemania',
-        'australia','filipinas','japan','corea','korea','misión','mision','mission',
-        'north','south','east','west','ciudad','new','el',
-    }
 
-    # ── Paso 3: unir líneas partidas ─────────────────────────────────────────
-    def is_new_entry(ln: str) -> bool:
-        ln = ln.strip()
-        if not ln or not re.match(r'^[A-ZÁÉÍÓÚÑÜ]', ln):
-            return False
-        ci = ln.find(',')
-        if ci < 1 or ci > 45:
-            return False
-        if any(c.isdigit() for c in ln[:ci]):
-            return False
-        first = ln.split()[0].lower().rstrip('.,') if ln.split() else ''
-        return first not in MISSION_START
-
-    SKIP = {'mi plan', 'unidad actual', 'término esperado', 'termino esperado',
-            'comenzó', 'comenzo', 'misión', 'mision', 'nombre'}
+def _is_new_entry(ln: str) -> bool:
+    """Una línea que empieza un misionero: "Apellido, Nombre ..." (no un país/misión partido)."""
+    if not ENTRY_START_RE.match(ln):
+        return False
+    ci = ln.find(',')
+    if ci < 1 or ci > 45:
+        return False
+    if any(c.isdigit() for c in ln[:ci]):
+        return False
+    first = ln.split(None, 1)[0].lower().rstrip('.,')
+    return first not in MISSION_START
+
 
+def _bloques_misioneros(text: str) -> list[str]:
+    """Une en un solo bloque las líneas partidas de cada misionero (una pasada)."""
     blocks: list[str] = []
-    cur = ''
+    cur: list[str] = []
     for raw in text.split('\n'):
         ln = raw.strip()
         if not ln:
             continue
         low = ln.lower()
-        if low in SKIP:
+        if low in SKIP_TXT:
             continue
         if 'nombre' in low and ('misión' in low or 'mision' in low):
             continue
-        if re.match(r'^misioneros\s+(de|en)\b', low):
+        if TITULO_RE.match(low):
             continue
-        if is_new_entry(ln):
-            if cur:
-                blocks.append(cur)
-            cur = ln
-        else:
-            cur = (cur + ' ' + ln).strip() if cur else ln
+        if cur and _is_new_entry(ln):
+            blocks.append(' '.join(cur))
+            cur = []
+        cur.append(ln)
     if cur:
-        blocks.append(cur)
+        blocks.append(' '.join(cur))
+    return blocks
+
 
-    print(f"[MIS TXT] {len(blocks)} bloques")
+def _parse_misioneros_txt(text: str) -> list[dict]:
+    """
+    Parsea el texto copiado del portal de miembros.
+    El portal pega con U+00A0 (non-breaking space) en lugar de espacios normales.
+    """
+    blocks = _bloques_misioneros(text.translate(_tabla_espacios()))
+    logger.debug('TXT de misioneros: %s bloques', len(blocks))
 
-    # ── Paso 4: parsear cada bloque ───────────────────────────────────────────
     filas = []
     for i, block in enumerate(blocks):
         # colapsar múltiples espacios que quedaron
-        block = re.sub(r'  +', ' ', block).strip()
+        block = ESPACIOS_RE.sub(' ', block).strip()
         dates = list(DATE_RE.finditer(block))
-        print(f"[MIS TXT] [{i+1}] {len(dates)} fechas | {block[:90]!r}")
-
         if not dates:
-            print(f"[MIS TXT]   → sin fechas, omitido")
+            logger.debug('Bloque %s sin fechas, omitido: %r', i + 1, block[:90])
             continue
 
         comenzo = dates[0].group(0).strip()
+        before = block[:dates[0].start()].strip()
         if len(dates) >= 2:
             termino = dates[1].group(0).strip()
-            before  = block[:dates[0].start()].strip()
-            unidad  = block[dates[1].end():].strip()
+            unidad = block[dates[1].end():].strip()
         else:
             termino = ''
-            before  = block[:dates[0].start()].strip()
-            unidad  = block[dates[0].end():].strip()
+            unidad = block[dates[0].end():].strip()
 
-        unidad = re.sub(r'\s*mi plan\s*$', '', unidad, flags=re.IGNORECASE).strip()
+        unidad = MI_PLAN_RE.sub('', unidad).strip()
 
         nombre = before
         mision = ''
-        low_b  = before.lower()
 
-        if 'servicio a la iglesia' in low_b:
-            si = re.search(r'misi[oó]n\s+de\s+servicio', before, re.IGNORECASE)
+        if 'servicio a la iglesia' in before.lower():
+            si = SERVICIO_RE.search(before)
             cut = si.start() if si else len(before)
             nombre = before[:cut].strip().rstrip(',').strip()
-            mision = SERV_LABEL
+            mision = MISION_SERVICIO_LABEL
         else:
             ci = before.find(',')
             if ci >= 0:
@@ -230,9 +226,8 @@ def _parse_misioneros_txt(text: str) -> list[dict]:
             'unidad_actual': unidad,
             'fila_numero': i + 1,
         })
-        print(f"[MIS TXT]   OK → {nombre.strip()!r} | {mision.strip()!r}")
 
-    print(f"[MIS TXT] Total: {len(filas)}")
+    logger.info('TXT de misioneros: %s filas de %s bloques', len(filas), len(blocks))
     return filas
 
 
@@ -352,64 +347,63 @@ async def debug_pdf(file: UploadFile = File(...)):
             result.append(page_info)
     return result
 
+def _con_datos(parser):
+    """Lector que responde 400 (con diagnóstico si es PDF) cuando el archivo no trae registros."""
+    def lector(content: bytes) -> list[dict]:
+        filas = parser(content)
+        if not filas:
+            diag = _diagnostico_pdf(content) if parser is _parse_misioneros_pdf else "Archivo vacío o sin datos reconocibles"
+            raise HTTPException(status_code=400, detail=f"No se encontraron registros. Diagnóstico: {diag}")
+        return filas
+    return lector
+
+
+def _leer_misioneros_txt(content: bytes) -> list[dict]:
+    return _parse_misioneros_txt(content.decode('utf-8-sig', errors='replace'))
+
+
+def _normalizar_misioneros(filas: list[dict], archivo_fuente_id: str) -> tuple[list, int]:
+    return [
+        {
+            'nombre': f['nombre'],
+            'mision': f['mision'],
+            'comenzo': f['comenzo'],
+            'termino_esperado': f['termino_esperado'],
+            'unidad_actual': f['unidad_actual'],
+            **misioneros.fechas(f['comenzo'], f['termino_esperado']),
+            'es_mision_servicio': es_mision_servicio(f['mision']),
+            'archivo_fuente_id': archivo_fuente_id,
+            'fila_numero': f['fila_numero'],
+        }
+        for f in filas
+    ], 0
+
+
+REPORTE = importacion.Reporte(
+    nombre='misioneros',
+    model=MisioneroCampo,
+    columnas=('nombre', 'mision', 'comenzo', 'termino_esperado', 'unidad_actual'),
+    lectores={
+        '.pdf': _con_datos(_parse_misioneros_pdf),
+        '.txt': _con_datos(_leer_misioneros_txt),
+        '.csv': _con_datos(_parse_misioneros_csv),
+        '.xlsx': _con_datos(_parse_misioneros_excel),
+        '.xls': _con_datos(_parse_misioneros_excel),
+    },
+    normalizar=_normalizar_misioneros,
+    formatos='PDF, TXT, CSV o Excel (.xlsx)',
+    historico=True,
+)
+
+
 @router.post('/upload')
 async def upload_misioneros(file: UploadFile = File(...), db: Session = Depends(get_db)):
     content = await file.read()
-    fname = file.filename.lower()
+    resultado = importacion.importar(db, REPORTE, file.filename, content, file.content_type, status='procesado')
 
-    # Parsear según tipo
-    if fname.endswith('.pdf'):
-        filas = _parse_misioneros_pdf(content)
-    elif fname.endswith('.txt'):
-        text = content.decode('utf-8-sig', errors='replace')
-        filas = _parse_misioneros_txt(text)
-    elif fname.endswith('.csv'):
-        filas = _parse_misioneros_csv(content)
-    elif fname.endswith('.xlsx') or fname.endswith('.xls'):
-        filas = _parse_misioneros_excel(content)
-    else:
-        raise HTTPException(status_code=400, detail="Solo se aceptan PDF, CSV o Excel (.xlsx)")
-
-    if not filas:
-        # Devolver diagnóstico
-        diag = _diagnostico_pdf(content) if fname.endswith('.pdf') else "Archivo vacío o sin datos reconocibles"
-        raise HTTPException(status_code=400, detail=f"No se encontraron registros. Diagnóstico: {diag}")
-
-    # Registrar archivo
-    pdf_file = PdfFile(
-        filename=file.filename,
-        mime=file.content_type or 'application/octet-stream',
-        size_bytes=len(content),
-        status='procesado',
-    )
-    db.add(pdf_file)
-    db.flush()
-
-    # Limpiar registros anteriores
-    db.query(MisioneroCampo).delete()
-
-    # Insertar nuevos
-    total = 0
-    servicio = 0
-    for f in filas:
-        es_serv = es_mision_servicio(f['mision'])
-        if es_serv:
-            servicio += 1
-        misionero = MisioneroCampo(
-            nombre=f['nombre'],
-            mision=f['mision'],
-            comenzo=f['comenzo'],
-            termino_esperado=f['termino_esperado'],
-            unidad_actual=f['unidad_actual'],
-            es_mision_servicio=es_serv,
-            archivo_fuente_id=pdf_file.id,
-            fila_numero=f['fila_numero'],
-        )
-        db.add(misionero)
-        total += 1
-
-    db.commit()
-    print(f"[MISIONEROS] Total: {total} | Misión de servicio: {servicio}")
+    total = resultado.importados
+    servicio = sum(1 for f in resultado.filas if f['es_mision_servicio'])
+    logger.debug('misioneros: %s en total, %s en misión de servicio', total, servicio)
     return {
         'ok': True,
         'total': total,
@@ -418,48 +412,33 @@ async def upload_misioneros(file: UploadFile = File(...), db: Session = Depends(
     }
 
 
-@router.get('/kpi')
-def get_kpi_misioneros(db: Session = Depends(get_db)):
-    todos = db.query(MisioneroCampo).all()
-
-    # En el campo = misiones reales (Bolivia, México, etc.) – los que NO son servicio a la Iglesia
-    en_campo = [m for m in todos if not m.es_mision_servicio]
-    de_servicio = [m for m in todos if m.es_mision_servicio]
-
-    total_campo = len(en_campo)
-    total_servicio = len(de_servicio)
-    porcentaje = round((total_campo / META_MISIONEROS) * 100, 1) if META_MISIONEROS > 0 else 0
-
-    personas_campo = [
-        {
-            'nombre': m.nombre,
-            'mision': m.mision or '',
-            'comenzo': m.comenzo or '',
-            'termino_esperado': m.termino_esperado or '',
-            'unidad_actual': m.unidad_actual or '',
-        }
-        for m in en_campo
-    ]
-
-    personas_servicio = [
-        {
-            'nombre': m.nombre,
-            'unidad_actual': m.unidad_actual or '',
-            'comenzo': m.comenzo or '',
-            'termino_esperado': m.termino_esperado or '',
-        }
-        for m in de_servicio
-    ]
-
-    print(f"[MISIONEROS KPI] En campo: {total_campo} | De servicio: {total_servicio}")
-
-    return {
-        'indicador': 'misioneros_campo',
-        'nombre': 'Misioneros en el Campo',
-        'real': total_campo,           # Los que están en misiones reales
-        'meta': META_MISIONEROS,
-        'porcentaje': porcentaje,
-        'sub_servicio': total_servicio,  # Misioneros de servicio a la Iglesia
-        'personas': personas_campo,      # Detalle de los en campo
-        'personas_servicio': personas_servicio,  # Detalle de los de servicio
-    }
+@router.get('/kpi', dependencies=[conditional_get(MisioneroCampo.__tablename__)])
+async def get_kpi_misioneros(db: AsyncSession = Depends(get_async_db)):
+    return await misioneros.kpi(db, META_MISIONEROS)
+
+
+@router.get(
+    '/proyeccion',
+    dependencies=[conditional_get(MisioneroCampo.__tablename__, extra=lambda: date.today().strftime('%Y-%m'))],
+)
+async def proyeccion_misioneros(
+    meses: int = Query(misioneros.MESES_PROYECCION, description="Meses hacia adelante, empezando por el actual"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Misioneros en el campo y de servicio por mes según las fechas de término, contra META_MISIONEROS."""
+    return await misioneros.proyeccion(db, META_MISIONEROS, meses)
+
+
+@router.get(
+    '/historico',
+    dependencies=[conditional_get(HistoricoCarga.__tablename__, HistoricoConteo.__tablename__)],
+)
+async def historico_misioneros(
+    unidad: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    desglose: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Misioneros: serie de tiempo (total / en el campo) con una entrada por carga, leída del rollup."""
+    return await historico.serie(db, 'misioneros', unidad, desde, hasta, desglose)
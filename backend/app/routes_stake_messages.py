@@ -1,12 +1,14 @@
 import json
 import re
 
-import requests
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import db
+from .dataset_versions import conditional_get
 from .models import AppSetting, StakeMessagesPlan
 
 router = APIRouter()
@@ -61,14 +63,18 @@ def _clean_preview_text(value: str) -> str:
     return cleaned
 
 
-@router.get('/stake-messages-plan')
-def get_stake_messages_plan(session: Session = Depends(db.get_db)):
-    row = session.query(StakeMessagesPlan).filter(StakeMessagesPlan.scope_key == STAKE_MESSAGES_PLAN_SCOPE).first()
+@router.get('/stake-messages-plan', dependencies=[conditional_get(StakeMessagesPlan.__tablename__, AppSetting.__tablename__)])
+async def get_stake_messages_plan(session: AsyncSession = Depends(db.get_async_db)):
+    row = (await session.execute(
+        select(StakeMessagesPlan).where(StakeMessagesPlan.scope_key == STAKE_MESSAGES_PLAN_SCOPE)
+    )).scalars().first()
     if row and isinstance(row.plan_data, dict):
         return {'plan': _normalize_plan_payload(row.plan_data)}
 
     # Compatibilidad: migrar desde app_settings si existe el dato histórico.
-    setting = session.query(AppSetting).filter(AppSetting.key == STAKE_MESSAGES_PLAN_KEY).first()
+    setting = (await session.execute(
+        select(AppSetting).where(AppSetting.key == STAKE_MESSAGES_PLAN_KEY)
+    )).scalars().first()
     if not setting or not setting.value:
         return {'plan': {}}
 
@@ -81,7 +87,7 @@ def get_stake_messages_plan(session: Session = Depends(db.get_db)):
             plan_data=normalized_plan,
         )
         session.add(migrated)
-        session.commit()
+        await session.commit()
         return {'plan': normalized_plan}
     except json.JSONDecodeError:
         return {'plan': {}}
@@ -117,6 +123,8 @@ def save_stake_messages_plan(payload: StakeMessagesPlanPayload, session: Session
 
 @router.get('/stake-messages-link-preview')
 def get_stake_messages_link_preview(url: str = Query(..., min_length=8, max_length=2000)):
+    import requests
+
     if not (url.startswith('http://') or url.startswith('https://')):
         return {'ok': False, 'detail': 'URL inválida'}
 
@@ -1,6 +1,5 @@
 from .celery_app import celery
 import time
-import requests
 import os
 
 BACKEND_URL = os.getenv('BACKEND_INTERNAL_URL', 'http://backend:8000')
@@ -21,6 +20,8 @@ def process_pdf(self, file_id: str):
         "job_id": str(self.request.id)
     }
     try:
+        import requests
+
         url = f"{BACKEND_URL}/api/internal/measurements"
         requests.post(url, json=payload, timeout=10)
     except Exception:
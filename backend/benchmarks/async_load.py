@@ -0,0 +1,163 @@
+"""
+Throughput concurrente: misma consulta por la ruta sync (threadpool) y la async.
+
+Levanta uvicorn con una app mínima que expone la consulta del KPI de jóvenes de
+las dos formas (/sync y /async) sobre la misma base, le pega con N clientes
+concurrentes y reporta req/s, latencias y memoria (RSS) del servidor.
+
+Uso (desde backend/):
+    python -m benchmarks.async_load --concurrency 200 --seconds 15
+    python -m benchmarks.async_load --database-url postgresql+psycopg2://...   # Neon/Postgres
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+if "BENCH_SERVER" in os.environ:
+    # ── Proceso servidor ──────────────────────────────────────────────────────
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from app import db
+    from app.models import JovenRecomendacion
+
+    bench_app = FastAPI()
+
+    def _resumen(rows):
+        estados = {}
+        for r in rows:
+            estados[r.estado_normalizado] = estados.get(r.estado_normalizado, 0) + 1
+        return {"total": len(rows), "estados": estados}
+
+    @bench_app.get("/sync")
+    def kpi_sync(session: Session = Depends(db.get_db)):
+        return _resumen(session.query(JovenRecomendacion).all())
+
+    @bench_app.get("/async")
+    async def kpi_async(session: AsyncSession = Depends(db.get_async_db)):
+        return _resumen((await session.execute(select(JovenRecomendacion))).scalars().all())
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _seed(database_url: str, rows: int):
+    env = {**os.environ, "DATABASE_URL": database_url}
+    code = (
+        "from app.db import Base, engine, SessionLocal\n"
+        "from app.models import JovenRecomendacion\n"
+        "Base.metadata.create_all(bind=engine)\n"
+        "s = SessionLocal()\n"
+        "if s.query(JovenRecomendacion).count() < %d:\n"
+        "    s.bulk_save_objects([JovenRecomendacion(nombre=f'Joven {i}', unidad=f'U{i %% 7}',"
+        " estado_normalizado=('activa', 'vencida', 'sin_estado')[i %% 3]) for i in range(%d)])\n"
+        "    s.commit()\n"
+    ) % (rows, rows)
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return 0.0
+
+
+def _load(url: str, concurrency: int, seconds: float, server_pid: int) -> dict:
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    peak_rss = [0.0]
+
+    def client():
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=60)
+                response.raise_for_status()
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+            except requests.RequestException as exc:
+                with lock:
+                    errors.append(type(exc).__name__)
+
+    def sampler():
+        while time.perf_counter() < deadline:
+            peak_rss[0] = max(peak_rss[0], _rss_mb(server_pid))
+            time.sleep(0.25)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)] + [threading.Thread(target=sampler)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    ordered = sorted(latencies)
+    pct = lambda p: round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 1) if ordered else 0.0
+    return {
+        "req_por_seg": round(len(latencies) / seconds, 1),
+        "latencia_ms": {"p50": round(statistics.median(ordered), 1) if ordered else 0.0, "p95": pct(95), "p99": pct(99)},
+        "errores": len(errors),
+        "rss_pico_mb": peak_rss[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='bench_async_')}/bench.db"
+    _seed(database_url, args.rows)
+
+    port = _free_port()
+    env = {**os.environ, "DATABASE_URL": database_url, "BENCH_SERVER": "1", "STRICT_EPHEMERAL_SQLITE": "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.async_load:bench_app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        for _ in range(100):
+            try:
+                requests.get(f"{base}/sync", timeout=2)
+                requests.get(f"{base}/async", timeout=2)
+                break
+            except requests.RequestException:
+                time.sleep(0.2)
+        report = {
+            "concurrencia": args.concurrency,
+            "base": database_url.split("://", 1)[0],
+            "sync": _load(f"{base}/sync", args.concurrency, args.seconds, server.pid),
+            "async": _load(f"{base}/async", args.concurrency, args.seconds, server.pid),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
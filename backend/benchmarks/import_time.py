@@ -0,0 +1,87 @@
+"""
+Tiempo de arranque y memoria al importar la app (lo que paga cada cold start).
+
+Mide `python -X importtime -c "import app.main"` varias veces y verifica que las
+librerías pesadas de parseo no se carguen al importar. Sale con código 1 si alguna
+se cargó o si la mediana supera --max-ms, para poder usarlo como chequeo en CI.
+
+Uso (desde backend/):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --max-ms 900 --runs 7
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Solo se deben cargar al primer upload / primera pregunta, nunca al importar la app.
+LAZY_MODULES = ("pandas", "numpy", "pdfplumber", "pdfminer", "openpyxl", "requests")
+
+_PROBE = """
+import json, resource, sys
+import app.main
+print(json.dumps({
+    "cargados": sorted(m for m in %r if m in sys.modules),
+    "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+}))
+""" % (LAZY_MODULES,)
+
+_APP_MAIN = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+app\.main$", re.M)
+
+
+def _env() -> dict:
+    tmp = tempfile.mkdtemp(prefix="bench_import_")
+    return {**os.environ, "DATABASE_URL": os.getenv("DATABASE_URL", f"sqlite:///{tmp}/import.db")}
+
+
+def measure(runs: int) -> dict:
+    env = _env()
+    tiempos = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        match = _APP_MAIN.search(result.stderr)
+        if match:
+            tiempos.append(int(match.group(1)) / 1000)
+
+    probe = subprocess.run([sys.executable, "-c", _PROBE], env=env, capture_output=True, text=True, check=True)
+    info = json.loads(probe.stdout.strip().splitlines()[-1])
+    return {
+        "import_app_main_ms": {
+            "mediana": round(statistics.median(tiempos), 1) if tiempos else None,
+            "min": round(min(tiempos), 1) if tiempos else None,
+            "max": round(max(tiempos), 1) if tiempos else None,
+        },
+        "rss_mb": info["rss_mb"],
+        "modulos_pesados_cargados": info["cargados"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="falla si la mediana supera este valor")
+    args = parser.parse_args()
+
+    report = measure(args.runs)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    errores = []
+    if report["modulos_pesados_cargados"]:
+        errores.append(f"se importaron al arrancar: {', '.join(report['modulos_pesados_cargados'])}")
+    mediana = report["import_app_main_ms"]["mediana"]
+    if args.max_ms is not None and mediana is not None and mediana > args.max_ms:
+        errores.append(f"import de app.main {mediana} ms > {args.max_ms} ms")
+    if errores:
+        print("FALLA: " + "; ".join(errores), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
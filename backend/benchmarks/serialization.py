@@ -0,0 +1,124 @@
+"""
+Tamaño y tiempo de codificación de una respuesta /faltantes de 5k personas.
+
+Compara el camino por defecto de FastAPI (jsonable_encoder + json.dumps) con
+ORJSONResponse y mide el cuerpo sin comprimir, con gzip y con brotli. Después pega
+contra el endpoint real con datos sintéticos, con y sin Accept-Encoding.
+
+Uso (desde backend/):
+    python -m benchmarks.serialization --personas 5000 --repeat 20
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix="bench_serial_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/app.db")
+os.environ.setdefault("STRICT_EPHEMERAL_SQLITE", "false")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from app.responses import BROTLI_QUALITY, GZIP_LEVEL, ORJSONResponse, brotli  # noqa: E402
+
+
+def _faltantes(n: int) -> list:
+    """Misma forma que CalculadorIndicadores._preparar_faltantes."""
+    hoy = date.today()
+    return [
+        {
+            "id": f"{i:08d}-0000-4000-8000-000000000000",
+            "nombre": f"Apellido{i % 97} Apellido{i % 89}, Nombre{i % 53}",
+            "unidad": f"Barrio {i % 12}",
+            "estado_actual": "Sin recomendación activa",
+            "fecha_confirmacion": hoy - timedelta(days=i % 700),
+            "dias_desde_confirmacion": i % 700,
+        }
+        for i in range(n)
+    ]
+
+
+def _ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+def encode(n: int, repeat: int) -> dict:
+    payload = _faltantes(n)
+    default_body = JSONResponse(jsonable_encoder(payload)).body
+    orjson_body = ORJSONResponse(payload).body
+    report = {
+        "encode_ms": {
+            "jsonable_encoder+json": _ms(lambda: JSONResponse(jsonable_encoder(payload)), repeat),
+            "orjson": _ms(lambda: ORJSONResponse(payload), repeat),
+        },
+        "bytes": {
+            "json": len(default_body),
+            "orjson": len(orjson_body),
+            f"gzip-{GZIP_LEVEL}": len(gzip.compress(orjson_body, compresslevel=GZIP_LEVEL)),
+        },
+        "compress_ms": {
+            f"gzip-{GZIP_LEVEL}": _ms(lambda: gzip.compress(orjson_body, compresslevel=GZIP_LEVEL), repeat),
+        },
+    }
+    if brotli is not None:
+        report["bytes"][f"br-{BROTLI_QUALITY}"] = len(brotli.compress(orjson_body, quality=BROTLI_QUALITY))
+        report["compress_ms"][f"br-{BROTLI_QUALITY}"] = _ms(lambda: brotli.compress(orjson_body, quality=BROTLI_QUALITY), repeat)
+    assert json.loads(default_body) == json.loads(orjson_body)
+    return report
+
+
+def endpoint(n: int, repeat: int) -> dict:
+    """Endpoint real: /faltantes de conversos_ordenados con ~n personas pendientes."""
+    from fastapi.testclient import TestClient
+
+    from app.db import engine
+    from app.init_periodos import inicializar_periodos_2026
+    from app.main import app
+
+    from . import synthetic
+
+    url = "/api/kpis/conversos_ordenados/faltantes?periodo=2026"
+    with TestClient(app) as client:
+        inicializar_periodos_2026()
+        scale = n * 4
+        synthetic.populate(engine, scale)
+        while len(client.get(url).json()) < n:
+            scale *= 2
+            synthetic.populate(engine, scale)
+
+        result = {"personas": len(client.get(url).json())}
+        for name, accept in (("identity", "identity"), ("gzip", "gzip"), ("br", "br")):
+            response = client.get(url, headers={"Accept-Encoding": accept})
+            result[name] = {
+                "bytes_en_red": int(response.headers.get("content-length", 0)),
+                "content_encoding": response.headers.get("content-encoding", "identity"),
+                "ms": _ms(lambda: client.get(url, headers={"Accept-Encoding": accept}), repeat),
+            }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--personas", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sin-endpoint", action="store_true", help="solo mide la codificación")
+    args = parser.parse_args()
+
+    report = {"personas": args.personas, "codificacion": encode(args.personas, args.repeat)}
+    if not args.sin_endpoint:
+        report["endpoint"] = endpoint(args.personas, max(args.repeat // 4, 3))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Latencia de lecturas del dashboard mientras corre un import en SQLite.
+
+Compara el SQLite "de fábrica" (rollback journal, sin serializar escrituras) con el
+perfil de app.db.configure_sqlite_engine (WAL + pragmas + un escritor por vez).
+
+Uso (desde backend/):
+    python -m benchmarks.sqlite_concurrency --rows 20000 --readers 4 --writers 2
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+_tmpdir = tempfile.mkdtemp(prefix="bench_sqlite_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/app.db")
+
+from app.db import configure_sqlite_engine  # noqa: E402
+
+
+def _make_engine(path: str, tuned: bool):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    return configure_sqlite_engine(engine) if tuned else engine
+
+
+def _seed(engine, rows: int):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS bench_personas ("
+            "id INTEGER PRIMARY KEY, unidad TEXT, estado TEXT, edad INTEGER, nota TEXT)"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_bench_unidad ON bench_personas (unidad)"))
+        conn.execute(
+            text("INSERT INTO bench_personas (unidad, estado, edad, nota) VALUES (:u, :e, :a, :n)"),
+            [{"u": f"U{i % 12}", "e": ("activo", "inactivo", "nuevo")[i % 3], "a": 10 + i % 70, "n": "x" * 80} for i in range(rows)],
+        )
+
+
+def _writer(engine, rows: int, batch: int, errors: list, stop: threading.Event):
+    """Simula un import: borra y reinserta por lotes dentro de una sola transacción."""
+    while not stop.is_set():
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM bench_personas WHERE unidad = 'U0'"))
+                for start in range(0, rows, batch):
+                    conn.execute(
+                        text("INSERT INTO bench_personas (unidad, estado, edad, nota) VALUES (:u, :e, :a, :n)"),
+                        [{"u": "U0", "e": "activo", "a": 30, "n": "y" * 80} for _ in range(batch)],
+                    )
+                    time.sleep(0.002)  # parseo del siguiente lote
+        except Exception as exc:
+            errors.append(type(exc).__name__ + ": " + str(exc).splitlines()[0])
+            time.sleep(0.05)
+
+
+def _reader(engine, latencies: list, errors: list, stop: threading.Event):
+    query = text("SELECT unidad, estado, count(*), avg(edad) FROM bench_personas GROUP BY unidad, estado")
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(query).fetchall()
+            latencies.append((time.perf_counter() - started) * 1000)
+        except Exception as exc:
+            errors.append(type(exc).__name__ + ": " + str(exc).splitlines()[0])
+        time.sleep(0.01)
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(tuned: bool, args) -> dict:
+    path = os.path.join(_tmpdir, f"bench_{'tuned' if tuned else 'default'}.db")
+    engine = _make_engine(path, tuned)
+    _seed(engine, args.rows)
+
+    stop = threading.Event()
+    latencies, read_errors, write_errors = [], [], []
+    threads = [threading.Thread(target=_reader, args=(engine, latencies, read_errors, stop)) for _ in range(args.readers)]
+    threads += [
+        threading.Thread(target=_writer, args=(engine, args.rows // 4, args.batch, write_errors, stop))
+        for _ in range(args.writers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    return {
+        "perfil": "tuned" if tuned else "default",
+        "lecturas": len(latencies),
+        "lectura_ms": {
+            "p50": round(statistics.median(latencies), 2) if latencies else 0.0,
+            "p95": round(_percentile(latencies, 95), 2),
+            "p99": round(_percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2) if latencies else 0.0,
+        },
+        "errores_lectura": len(read_errors),
+        "errores_escritura": len(write_errors),
+        "ejemplo_error": (read_errors or write_errors or [None])[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(json.dumps([run(False, args), run(True, args)], indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
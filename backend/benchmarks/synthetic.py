@@ -0,0 +1,381 @@
+"""
+Datos sintéticos para los benchmarks: filas de cada tabla y archivos estilo LCR.
+
+Todo es determinista a partir de una semilla, así dos corridas con la misma escala
+generan exactamente los mismos datos y los reportes se pueden comparar.
+
+- populate(engine, scale): vacía las tablas de datos y carga `scale` conversos más
+  jóvenes, adultos, misioneros, actas y asistencia en proporción (inserción por lotes).
+- conversos_csv / jovenes_pdf / jovenes_csv / adultos_csv / misioneros_csv: archivos
+  con el mismo formato que exporta LCR, para medir los endpoints de importación.
+"""
+import csv
+import io
+import random
+from datetime import date, timedelta
+from typing import Iterator
+
+from sqlalchemy import delete
+from sqlalchemy.engine import Engine
+
+from app.dataset_versions import bump
+from app.normalizacion import parsear_vencimiento
+from app.models import (
+    AdultoRecomendacion,
+    AsistenciaSacramental,
+    AsistenciaSemanal,
+    HistoricoCarga,
+    HistoricoConteo,
+    JovenRecomendacion,
+    MeetingChunk,
+    MeetingMinute,
+    MisioneroCampo,
+    PersonaConverso,
+)
+
+YEAR = 2026
+BATCH = 5000
+
+# Filas de cada tabla por cada converso (scale = cantidad de conversos).
+RATIOS = {
+    'jovenes': 0.5,
+    'adultos': 1.0,
+    'misioneros': 0.02,
+    'actas': 0.01,
+}
+
+UNIDADES = [
+    'Barrio Centro', 'Barrio Cordón', 'Barrio Pocitos', 'Barrio Malvín', 'Barrio Unión',
+    'Barrio Buceo', 'Barrio Carrasco', 'Barrio La Blanqueada', 'Rama Piedras Blancas', 'Rama Colón',
+]
+APELLIDOS = [
+    'Rodríguez', 'González', 'Fernández', 'Pérez', 'García', 'López', 'Martínez', 'Sosa',
+    'Silva', 'Núñez', 'Suárez', 'Díaz', 'Acosta', 'Ramírez', 'Benítez', 'Méndez', 'Castro',
+    'Olivera', 'Pereira', 'Cabrera', 'Techera', 'Viera', 'Ferreira', 'Correa',
+]
+NOMBRES_M = ['Juan', 'Martín', 'Diego', 'Santiago', 'Nicolás', 'Matías', 'Pablo', 'Agustín', 'Joaquín', 'Facundo']
+NOMBRES_F = ['María', 'Lucía', 'Valentina', 'Sofía', 'Camila', 'Florencia', 'Ana', 'Micaela', 'Agustina', 'Carolina']
+SACERDOCIO = [
+    ('No ha sido ordenado', 0.25), ('Aarónico - Diácono', 0.15), ('Aarónico - Presbítero', 0.2),
+    ('Elder', 0.3), ('Sumo sacerdote', 0.1),
+]
+ESTADOS_REC = [
+    ('Activa', 0.45), ('Vencen en 20 días', 0.08), ('Vencida', 0.25),
+    ('Cancelada', 0.04), ('Extraviada o robada', 0.02), ('', 0.16),
+]
+ESTADOS_JOVEN = ESTADOS_REC + [('No ha sido bautizado', 0.05)]
+MISIONES = [
+    'Uruguay Montevideo', 'Argentina Buenos Aires Norte', 'Chile Santiago Este', 'Perú Lima Sur',
+    'Brasil Porto Alegre', 'México Puebla', 'Misión de servicio a la Iglesia',
+]
+MESES = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic']
+VOCABULARIO = (
+    'ministración jóvenes templo bautismo recomendación consejo barrio rama obispo presidente '
+    'actividad misioneros investigadores asistencia sacramental llamamiento capacitación familia '
+    'visitas plan seguimiento meta conversos ordenanzas historia familiar seminario instituto'
+).split()
+
+
+def counts(scale: int) -> dict:
+    """Filas de cada tabla para una escala dada."""
+    return {
+        'conversos': scale,
+        **{name: max(int(scale * ratio), 10) for name, ratio in RATIOS.items()},
+    }
+
+
+def _pick(rng: random.Random, weighted: list) -> str:
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights)[0]
+
+
+def _nombre(rng: random.Random, sexo: str) -> str:
+    nombres = NOMBRES_M if sexo == 'M' else NOMBRES_F
+    return f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}, {rng.choice(nombres)} {rng.choice(nombres)}"
+
+
+def _fecha(rng: random.Random, start: date, days: int) -> date:
+    return start + timedelta(days=rng.randrange(days))
+
+
+def _vencimiento(rng: random.Random, estado: str) -> str:
+    if not estado or 'bautizado' in estado.lower():
+        return ''
+    year = YEAR + 1 if estado == 'Activa' else YEAR if estado.startswith('Vencen') else YEAR - 1
+    return f"{rng.choice(MESES)}. {year}"
+
+
+def _fecha_lcr(value: date) -> str:
+    return f"{value.day} {MESES[value.month - 1]} {value.year}"
+
+
+# ── Filas ──────────────────────────────────────────────────────────────────────
+
+def conversos(n: int, seed: int = 0) -> Iterator[dict]:
+    rng = random.Random(f'conversos-{seed}')
+    for i in range(n):
+        sexo = rng.choice('MF')
+        sacerdocio = _pick(rng, SACERDOCIO) if sexo == 'M' else ''
+        estado = _pick(rng, ESTADOS_REC)
+        confirmacion = _fecha(rng, date(YEAR - 1, 1, 1), 730)
+        nacimiento = confirmacion - timedelta(days=rng.randrange(9 * 365, 70 * 365))
+        yield {
+            'nombre_preferencia': _nombre(rng, sexo),
+            'sacerdocio': sacerdocio,
+            'estado_recomendacion_raw': estado,
+            'llamamientos': rng.choice(['', '', 'Maestro de Escuela Dominical', 'Secretario', 'Consejero']),
+            'unidad': rng.choice(UNIDADES),
+            'fecha_confirmacion': confirmacion,
+            'sacerdocio_normalizado': (
+                'no_ordenado' if sacerdocio.startswith('No') else
+                'aaronico' if sacerdocio.startswith('Aar') else
+                'melquisedec' if sacerdocio else None
+            ),
+            'tiene_recomendacion': estado.startswith(('Activa', 'Vencen')) if estado else None,
+            'esta_ordenado': bool(sacerdocio) and not sacerdocio.startswith('No') if sexo == 'M' else None,
+            'fecha_nacimiento': nacimiento,
+            'edad_al_confirmar': (confirmacion - nacimiento).days // 365,
+            'sexo': sexo,
+            'enriquecido': rng.random() < 0.7,
+            'fila_numero': i + 1,
+        }
+
+
+def _recomendaciones(n: int, rng: random.Random, estados: list, edades: tuple) -> Iterator[dict]:
+    for i in range(n):
+        sexo = rng.choice('MF')
+        estado = _pick(rng, estados)
+        normalizado = (
+            'sin_estado' if not estado else
+            'no_bautizado' if 'bautizado' in estado else
+            'cancelada' if estado.startswith(('Cancelada', 'Extraviada')) else
+            'vence_pronto' if estado.startswith('Vencen') else
+            'vencida' if estado == 'Vencida' else 'activa'
+        )
+        vencimiento = _vencimiento(rng, estado)
+        yield {
+            'nombre': _nombre(rng, sexo),
+            'sexo': sexo,
+            'edad': rng.randint(*edades),
+            'estado_raw': estado,
+            'vencimiento_raw': vencimiento,
+            'vencimiento_fecha': parsear_vencimiento(vencimiento, estado, date(YEAR, 1, 1)),
+            'unidad': rng.choice(UNIDADES),
+            'estado_normalizado': normalizado,
+            'tiene_recomendacion_activa': normalizado in ('activa', 'vence_pronto'),
+            'fila_numero': i + 1,
+        }
+
+
+def jovenes(n: int, seed: int = 0) -> Iterator[dict]:
+    return _recomendaciones(n, random.Random(f'jovenes-{seed}'), ESTADOS_JOVEN, (11, 17))
+
+
+def adultos(n: int, seed: int = 0) -> Iterator[dict]:
+    return _recomendaciones(n, random.Random(f'adultos-{seed}'), ESTADOS_REC, (18, 90))
+
+
+def misioneros(n: int, seed: int = 0) -> Iterator[dict]:
+    rng = random.Random(f'misioneros-{seed}')
+    for i in range(n):
+        mision = rng.choice(MISIONES)
+        comenzo = _fecha(rng, date(YEAR - 2, 1, 1), 900)
+        meses = 18 if mision.startswith('Misión de servicio') else rng.choice([18, 24])
+        termino = comenzo + timedelta(days=meses * 30)
+        yield {
+            'nombre': _nombre(rng, rng.choice('MF')),
+            'mision': mision,
+            'comenzo': _fecha_lcr(comenzo),
+            'termino_esperado': _fecha_lcr(termino),
+            'comenzo_fecha': comenzo,
+            'termino_fecha': termino,
+            'unidad_actual': rng.choice(UNIDADES),
+            'es_mision_servicio': mision.startswith('Misión de servicio'),
+            'fila_numero': i + 1,
+        }
+
+
+def actas(n: int, seed: int = 0) -> Iterator[dict]:
+    rng = random.Random(f'actas-{seed}')
+    for _ in range(n):
+        dia = _fecha(rng, date(YEAR - 2, 1, 1), 1000)
+        yield {
+            'category': rng.choice(['consejo', 'presidencia']),
+            'date': dia.isoformat(),
+            'participants': ', '.join(_nombre(rng, rng.choice('MF')) for _ in range(rng.randint(3, 8))),
+            'summary': ' '.join(rng.choices(VOCABULARIO, k=rng.randint(60, 160))) + '.',
+            'transcript': ' '.join(rng.choices(VOCABULARIO, k=rng.randint(400, 1500))) + '.',
+        }
+
+
+def asistencia(seed: int = 0) -> Iterator[dict]:
+    rng = random.Random(f'asistencia-{seed}')
+    for periodo in [str(YEAR), *(f'{YEAR}-Q{q}' for q in range(1, 5))]:
+        desglose = {u: rng.randint(40, 180) for u in UNIDADES}
+        yield {'periodo': periodo, 'valor': sum(desglose.values()), 'desglose': desglose, 'notas': 'sintético'}
+
+
+def asistencia_semanal(seed: int = 0) -> Iterator[dict]:
+    """Dos años de domingos por unidad, con una base por unidad y ruido semanal."""
+    rng = random.Random(f'asistencia-semanal-{seed}')
+    primero = date(YEAR - 1, 1, 1)
+    primero += timedelta(days=(6 - primero.weekday()) % 7)
+    for unidad in UNIDADES:
+        base = rng.randint(40, 180)
+        for semana in range(104):
+            yield {
+                'unidad': unidad,
+                'semana': primero + timedelta(weeks=semana),
+                'valor': max(0, base + rng.randint(-15, 15)),
+                'fuente': 'sintético',
+            }
+
+
+# ── Carga en la base ──────────────────────────────────────────────────────────
+
+TABLES = [
+    PersonaConverso, JovenRecomendacion, AdultoRecomendacion, MisioneroCampo, MeetingChunk, MeetingMinute,
+    AsistenciaSacramental, AsistenciaSemanal, HistoricoConteo, HistoricoCarga,
+]
+
+
+def _insert(engine: Engine, model, rows: Iterator[dict]) -> int:
+    total, batch = 0, []
+    table = model.__table__
+    with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH:
+                conn.execute(table.insert(), batch)
+                total, batch = total + len(batch), []
+        if batch:
+            conn.execute(table.insert(), batch)
+            total += len(batch)
+        # Core directo: la sesión no se entera, hay que invalidar ETags y almacén columnar a mano
+        bump(conn, [table.name])
+    return total
+
+
+def clear(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for model in TABLES:
+            conn.execute(delete(model.__table__))
+        bump(conn, [model.__tablename__ for model in TABLES])
+
+
+def populate(engine: Engine, scale: int, seed: int = 0) -> dict:
+    """Reemplaza los datos de las tablas de indicadores por `scale` conversos y proporcionales."""
+    n = counts(scale)
+    clear(engine)
+    return {
+        'conversos': _insert(engine, PersonaConverso, conversos(n['conversos'], seed)),
+        'jovenes': _insert(engine, JovenRecomendacion, jovenes(n['jovenes'], seed)),
+        'adultos': _insert(engine, AdultoRecomendacion, adultos(n['adultos'], seed)),
+        'misioneros': _insert(engine, MisioneroCampo, misioneros(n['misioneros'], seed)),
+        'actas': _insert(engine, MeetingMinute, actas(n['actas'], seed)),
+        'asistencia': _insert(engine, AsistenciaSacramental, asistencia(seed)),
+        'asistencia_semanal': _insert(engine, AsistenciaSemanal, asistencia_semanal(seed)),
+    }
+
+
+# ── Archivos estilo LCR ───────────────────────────────────────────────────────
+
+def _csv(header: list, rows: list) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buf.getvalue().encode('utf-8')
+
+
+def conversos_csv(n: int, seed: int = 0) -> bytes:
+    header = ['Nombre preferencia', 'Sacerdocio', 'Estado recomendacion', 'Llamamientos',
+              'Unidad', 'Fecha confirmacion', 'Fecha nacimiento', 'Sexo']
+    return _csv(header, [
+        [r['nombre_preferencia'], r['sacerdocio'], r['estado_recomendacion_raw'], r['llamamientos'],
+         r['unidad'], r['fecha_confirmacion'].isoformat(), r['fecha_nacimiento'].isoformat(), r['sexo']]
+        for r in conversos(n, seed)
+    ])
+
+
+def _recomendaciones_csv(rows: Iterator[dict]) -> bytes:
+    # Mismo orden de columnas que asumen /jovenes/upload y /adultos/upload para CSV.
+    header = ['Nombre', 'Sexo', 'Edad', 'Estado', 'Vencimiento', 'Unidad']
+    return _csv(header, [
+        [r['nombre'], r['sexo'], r['edad'], r['estado_raw'], r['vencimiento_raw'], r['unidad']] for r in rows
+    ])
+
+
+def jovenes_csv(n: int, seed: int = 0) -> bytes:
+    return _recomendaciones_csv(jovenes(n, seed))
+
+
+def adultos_csv(n: int, seed: int = 0) -> bytes:
+    return _recomendaciones_csv(adultos(n, seed))
+
+
+def misioneros_csv(n: int, seed: int = 0) -> bytes:
+    header = ['Nombre', 'Misión', 'Comenzó', 'Término esperado', 'Unidad actual']
+    return _csv(header, [
+        [r['nombre'], r['mision'], r['comenzo'], r['termino_esperado'], r['unidad_actual']]
+        for r in misioneros(n, seed)
+    ])
+
+
+def _pdf_escape(line: str) -> bytes:
+    raw = line.encode('cp1252', errors='replace')
+    return raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def text_pdf(lines: list, title: str = '', lines_per_page: int = 50) -> bytes:
+    """PDF mínimo (Helvetica, WinAnsi) con una línea de texto por fila, como los listados de LCR."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # /Pages, se completa al final
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    ]
+    kids = []
+    for number, page_lines in enumerate(pages, start=1):
+        rows = ([title] if title else []) + page_lines + [f'{number} Para uso exclusivo de la Iglesia']
+        stream = b'BT /F1 9 Tf 12 TL 36 800 Td ' + b''.join(b'(' + _pdf_escape(r) + b') Tj T* ' for r in rows) + b'ET'
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        content_id = len(objects)
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % k for k in kids), len(kids),
+    )
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n' % i + body + b'\nendobj\n')
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b'%010d 00000 n \n' % offset)
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def _recomendaciones_pdf(rows: Iterator[dict], title: str) -> bytes:
+    # "Apellido Nombre, Nombre2  Sexo  Edad  [Estado]  [Vencimiento]  Unidad"
+    lines = [
+        ' '.join(p for p in (r['nombre'], r['sexo'], str(r['edad']), r['estado_raw'], r['vencimiento_raw'], r['unidad']) if p)
+        for r in rows
+    ]
+    return text_pdf(lines, title=title)
+
+
+def jovenes_pdf(n: int, seed: int = 0) -> bytes:
+    return _recomendaciones_pdf(jovenes(n, seed), 'Nombre Sexo Edad Estado de la recomendación Vencimiento Unidad')
+
+
+def adultos_pdf(n: int, seed: int = 0) -> bytes:
+    return _recomendaciones_pdf(adultos(n, seed), 'Nombre Sexo Edad Estado de la recomendación Vencimiento Unidad')
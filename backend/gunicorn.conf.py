@@ -0,0 +1,76 @@
+"""
+Configuración de gunicorn para producción (workers uvicorn).
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+- Cantidad de workers: WEB_CONCURRENCY o, si no está, según los CPU disponibles.
+- preload_app: la app se importa una vez en el master. La app carga pandas, numpy,
+  pdfplumber y requests recién al usarlos; on_starting los importa igual en el master
+  (PRELOAD_MODULES) para que los workers compartan esas páginas de memoria al hacer fork.
+- Los workers se reciclan después de MAX_REQUESTS pedidos (con jitter, para que no
+  se reinicien todos juntos) y así se acota el crecimiento de memoria.
+- init_db corre una sola vez en el master antes de crear los workers.
+"""
+import importlib
+import multiprocessing
+import os
+
+
+def _int_env(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+
+def _default_workers() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = multiprocessing.cpu_count()
+    return max(2, min(cpus + 1, _int_env("WEB_MAX_WORKERS", 8)))
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = _int_env("WEB_CONCURRENCY", _default_workers())
+
+preload_app = True
+
+max_requests = _int_env("MAX_REQUESTS", 1000)
+max_requests_jitter = _int_env("MAX_REQUESTS_JITTER", 100)
+
+# Los uploads de PDF grandes pueden tardar; pasado este tiempo el worker se reinicia.
+timeout = _int_env("WORKER_TIMEOUT", 180)
+graceful_timeout = _int_env("GRACEFUL_TIMEOUT", 30)
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+# Librerías pesadas que la app importa de forma diferida; se cargan en el master antes del fork.
+PRELOAD_MODULES = [m for m in os.getenv("PRELOAD_MODULES", "pandas,numpy,pdfplumber,requests").split(",") if m.strip()]
+
+
+def on_starting(server):
+    from app import init_db
+
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module.strip())
+        except ImportError as e:
+            server.log.warning("[PRELOAD] %s no disponible: %s", module, e)
+
+    init_db.init()
+    # Los workers heredan el entorno del master: el startup de la app ya no repite init.
+    os.environ["APP_DB_INITIALIZED"] = "1"
+    server.log.info("[DB] init_db ejecutado en el master (%s workers)", workers)
+
+
+def post_fork(server, worker):
+    from app import db
+
+    # Las conexiones abiertas en el master no se comparten con los hijos:
+    # cada worker arma su propio pool sin cerrar los sockets del padre.
+    db.engine.dispose(close=False)
+    db.reset_async_engine()
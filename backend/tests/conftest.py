@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+# La app lee DATABASE_URL al importarse: base SQLite temporal para toda la corrida.
+_tmp = tempfile.mkdtemp(prefix='dashboard-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ['STRICT_EPHEMERAL_SQLITE'] = 'false'
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import init_db
+    from app.main import app as fastapi_app
+
+    init_db.init()
+    return fastapi_app
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def session(app):
+    from app.db import SessionLocal
+
+    db_session = SessionLocal()
+    try:
+        yield db_session
+    finally:
+        db_session.rollback()
+        db_session.close()
@@ -0,0 +1,34 @@
+from datetime import date
+
+from app import asistencia, routes_lcr
+from app.models import AsistenciaSemanal
+
+
+def test_unidad_canonica():
+    assert asistencia.unidad_canonica('Montevideo') == 'Montevideo 14'
+    assert asistencia.unidad_canonica('Barrio  los ceibos') == 'Los Ceibos'
+    assert asistencia.unidad_canonica('Rama Nueva') == 'Rama Nueva'
+
+
+def test_txt_y_lcr_en_la_misma_semana_son_una_sola_serie(client, session, monkeypatch):
+    session.query(AsistenciaSemanal).delete()
+    session.commit()
+
+    txt = 'Asistencia sacramental\nMontevideo 80\nBarrio Pando 120\n'
+    response = client.post(
+        '/api/asistencia/upload', params={'periodo': '2026', 'semana': '2026-03-01'},
+        files={'file': ('asistencia.txt', txt.encode('utf-8'), 'text/plain')},
+    )
+    assert response.status_code == 200
+
+    monkeypatch.setattr(routes_lcr, '_fetch_asistencia', lambda *args: {'2026-03-01': 95.0})
+    routes_lcr._refrescar_snapshots(session, 2026, 'spa', {}, {'Montevideo 14': 97829}, incluir_jovenes=False)
+
+    filas = session.query(AsistenciaSemanal.unidad, AsistenciaSemanal.semana, AsistenciaSemanal.valor).all()
+    assert sorted(filas) == [('Montevideo 14', date(2026, 3, 1), 95.0), ('Pando', date(2026, 3, 1), 120.0)]
+
+    ranking = client.get('/api/asistencia/semanal/ranking').json()
+    assert [u['unidad'] for u in ranking['unidades']] == ['Pando', 'Montevideo 14']
+
+    total = client.get('/api/asistencia/semanal/media-movil', params={'ventana': 1}).json()['total']
+    assert total == [{'semana': '2026-03-01', 'valor': 215.0, 'media': 215.0}]
@@ -0,0 +1,16 @@
+from datetime import date
+
+from app.models import DatasetVersion, PeriodoKPI
+
+
+def _version(session, table):
+    return session.query(DatasetVersion.version).filter(DatasetVersion.name == table).scalar()
+
+
+def test_insert_masivo_por_la_sesion_sube_la_version(session):
+    antes = _version(session, PeriodoKPI.__tablename__)
+    session.execute(PeriodoKPI.__table__.insert(), [
+        {'nombre': 'Q3 2032', 'tipo': 'trimestre', 'fecha_inicio': date(2032, 7, 1), 'fecha_fin': date(2032, 9, 30), 'year': 2032},
+    ])
+    session.commit()
+    assert _version(session, PeriodoKPI.__tablename__) == antes + 1
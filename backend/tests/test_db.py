@@ -0,0 +1,34 @@
+import threading
+
+from sqlalchemy import text
+
+from app.db import engine, pool_stats
+
+
+def test_sqlite_en_archivo_reusa_conexiones(app):
+    assert pool_stats()['pool'] == 'InstrumentedQueuePool'
+    with engine.connect() as conn:
+        primera = conn.connection.dbapi_connection
+        assert conn.execute(text('PRAGMA cache_size')).scalar() == -16384
+    with engine.connect() as conn:
+        assert conn.connection.dbapi_connection is primera
+
+
+def test_lock_de_escritura_se_libera_al_devolver_la_conexion(app):
+    conn = engine.connect()
+    conn.begin()
+    conn.execute(text("UPDATE dataset_versions SET version = version WHERE name = 'periodos'"))
+    assert conn.info.get('sqlite_write_lock')
+    conn.close()  # sin commit: el rollback al devolverla al pool tiene que soltar el turno
+
+    terminado = threading.Event()
+
+    def escribir():
+        with engine.begin() as otra:
+            otra.execute(text("UPDATE dataset_versions SET version = version WHERE name = 'periodos'"))
+        terminado.set()
+
+    hilo = threading.Thread(target=escribir)
+    hilo.start()
+    hilo.join(timeout=5)
+    assert terminado.is_set()
@@ -0,0 +1,18 @@
+import json
+import os
+import subprocess
+import sys
+
+# Solo se cargan al primer upload / primera pregunta, nunca al importar la app.
+PESADOS = ('pandas', 'numpy', 'pdfplumber', 'requests')
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importar_la_app_no_carga_librerias_pesadas():
+    probe = f"import json, sys\nimport app.main\nprint(json.dumps(sorted(m for m in {PESADOS!r} if m in sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, '-c', probe], cwd=BACKEND, env=os.environ.copy(),
+        capture_output=True, text=True, check=True,
+    )
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,33 @@
+from datetime import date, datetime, timedelta, timezone
+
+from app import lcr_snapshots
+from app.lcr_snapshots import SEMANAS_REABIERTAS, is_stale, merge_weeks
+from app.models import LcrSnapshot
+
+HOY = date(2026, 3, 18)  # miércoles; semana en curso desde el domingo 15
+
+
+def test_semana_cerrada_en_cero_toma_el_valor_que_llega_tarde():
+    guardado = {'2026-01-04': 0.0, '2026-01-11': 120.0}
+    fusionado = merge_weeks(guardado, {'2026-01-04': 131.0, '2026-01-11': 99.0}, today=HOY)
+    assert fusionado['2026-01-04'] == 131.0
+    # Semana vieja con dato: no se pisa
+    assert fusionado['2026-01-11'] == 120.0
+
+
+def test_semanas_cerradas_recientes_se_reabren():
+    guardado = {'2026-03-01': 80.0, '2026-03-15': 10.0}
+    fusionado = merge_weeks(guardado, {'2026-03-01': 140.0, '2026-03-15': 150.0}, today=HOY)
+    assert SEMANAS_REABIERTAS >= 2
+    assert fusionado == {'2026-03-01': 140.0, '2026-03-15': 150.0}
+
+
+def test_anio_cerrado_refrescado_antes_de_fin_de_anio_sigue_venciendo(monkeypatch):
+    monkeypatch.setattr(lcr_snapshots, '_utcnow', lambda: datetime(2027, 6, 1, tzinfo=timezone.utc))
+    antes_del_cierre = LcrSnapshot(year=2026, refreshed_at=datetime(2026, 12, 15, tzinfo=timezone.utc))
+    assert is_stale(antes_del_cierre, today=date(2027, 6, 1))
+
+    definitivo = LcrSnapshot(
+        year=2026, refreshed_at=datetime(2027, 1, 1, tzinfo=timezone.utc) + timedelta(weeks=SEMANAS_REABIERTAS),
+    )
+    assert not is_stale(definitivo, today=date(2027, 6, 1))
@@ -0,0 +1,16 @@
+from app import meeting_embeddings
+from app.models import MeetingChunk, MeetingMinute
+
+
+def test_backfill_saltea_actas_vacias_y_llega_a_las_viejas(session):
+    vacias = [MeetingMinute(category='consejo', date=f'2026-05-{d:02d}', summary='', transcript='  ') for d in range(1, 4)]
+    vieja = MeetingMinute(category='consejo', date='2025-01-05', summary='Se acordó visitar a las familias nuevas.')
+    session.add_all([*vacias, vieja])
+    session.commit()
+
+    assert meeting_embeddings.backfill(session, limit=3) >= 1
+    indexadas = {m for (m,) in session.query(MeetingChunk.meeting_id).distinct()}
+    assert vieja.id in indexadas
+    assert not indexadas & {m.id for m in vacias}
+    # Nada pendiente: las vacías no vuelven a elegirse
+    assert meeting_embeddings.backfill(session, limit=3) == 0
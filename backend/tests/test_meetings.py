@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from app.models import MeetingMinute
+
+
+def test_listado_pagina_mas_alla_de_la_primera(client, session):
+    session.query(MeetingMinute).filter(MeetingMinute.category == 'paginado').delete()
+    # Mezcla created_at del servidor (sin microsegundos) y de Python (con microsegundos)
+    session.add_all([
+        MeetingMinute(category='paginado', date='2026-02-01', summary=f'acta {i}',
+                      **({'created_at': datetime(2026, 2, 1, 10, 0, 0, 1000 * i)} if i % 2 else {}))
+        for i in range(7)
+    ])
+    session.add(MeetingMinute(category='paginado', date='2026-01-01', summary='más vieja'))
+    session.commit()
+    esperados = {m.id for m in session.query(MeetingMinute).filter(MeetingMinute.category == 'paginado')}
+
+    vistos, cursor, paginas = [], None, 0
+    while True:
+        params = {'category': 'paginado', 'limit': 3, **({'cursor': cursor} if cursor else {})}
+        response = client.get('/api/meetings', params=params)
+        assert response.status_code == 200
+        data = response.json()
+        vistos += [item['id'] for item in data['items']]
+        paginas += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+
+    assert paginas == 3
+    assert len(vistos) == len(set(vistos)) == len(esperados)
+    assert set(vistos) == esperados
+    assert vistos[-1] == session.query(MeetingMinute.id).filter_by(date='2026-01-01', category='paginado').scalar()
+
+
+def test_cursor_invalido(client):
+    assert client.get('/api/meetings', params={'cursor': 'no-es-un-cursor'}).status_code == 400
@@ -0,0 +1,18 @@
+from datetime import date
+
+from app.misioneros import _sumar_meses
+from app.models import MisioneroCampo
+
+
+def test_proyeccion_sin_fecha_de_termino_solo_cuenta_el_mes_actual(client, session):
+    session.query(MisioneroCampo).delete()
+    inicio = date.today().replace(day=1)
+    session.add_all([
+        MisioneroCampo(nombre='Con fecha', comenzo_fecha=_sumar_meses(inicio, -6), termino_fecha=_sumar_meses(inicio, 3)),
+        MisioneroCampo(nombre='Sin fecha', comenzo_fecha=_sumar_meses(inicio, -6), termino_esperado='pronto'),
+    ])
+    session.commit()
+
+    datos = client.get('/api/misioneros/proyeccion', params={'meses': 6}).json()
+    assert [m['campo'] for m in datos['meses']] == [2, 1, 1, 1, 0, 0]
+    assert datos['sin_fecha_termino'] == 1
@@ -0,0 +1,25 @@
+from datetime import date
+
+from app import periodos
+from app.db import SessionLocal
+from app.models import PeriodoKPI
+
+
+def test_resolver_recarga_cuando_otro_proceso_crea_periodos(app, session):
+    session.query(PeriodoKPI).filter(PeriodoKPI.year == 2031).delete()
+    session.commit()
+    assert periodos.resolver(session, 'Q2 2031').id == 'virtual-Q2 2031'
+    session.commit()
+
+    # Otra sesión (otro worker o el script init_periodos) crea el periodo; no se llama a nada aquí.
+    otra = SessionLocal()
+    try:
+        otra.add(PeriodoKPI(nombre='Q2 2031', tipo='trimestre', fecha_inicio=date(2031, 4, 1),
+                            fecha_fin=date(2031, 6, 30), year=2031))
+        otra.commit()
+    finally:
+        otra.close()
+
+    periodo = periodos.resolver(session, '2031-Q2')
+    assert periodo.nombre == 'Q2 2031'
+    assert not periodo.id.startswith('virtual-')
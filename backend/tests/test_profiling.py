@@ -0,0 +1,13 @@
+from app import profiling
+
+
+def test_token_solo_en_el_header(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, 'PROFILING_TOKEN', 'secreto')
+    monkeypatch.setattr(profiling, 'PROFILING_DIR', str(tmp_path))
+
+    assert client.get('/api/internal/profiles', params={'token': 'secreto'}).status_code == 403
+    assert client.get('/api/internal/profiles', headers={'X-Profile': 'otro'}).status_code == 403
+    assert client.get('/api/internal/profiles', headers={'X-Profile': 'secreto'}).status_code == 200
+
+    assert 'x-profile-id' not in client.get('/health', params={'_profile': 'secreto'}).headers
+    assert 'x-profile-id' in client.get('/health', headers={'X-Profile': 'secreto'}).headers
@@ -0,0 +1,74 @@
+from datetime import date
+
+import orjson
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.periodos import Periodo
+from app.responses import CompressionMiddleware, ORJSONResponse
+
+ETAG = '"abc123"'
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get('/grande')
+    def grande(request: Request):
+        if request.headers.get('if-none-match') in (ETAG, f'W/{ETAG}'):
+            raise HTTPException(status_code=304, headers={'ETag': ETAG})
+        return ORJSONResponse({'filas': list(range(200))}, headers={'ETag': ETAG})
+
+    @app.get('/chica')
+    def chica():
+        return ORJSONResponse({'ok': True}, headers={'ETag': ETAG})
+
+    @app.get('/binario')
+    def binario():
+        return PlainTextResponse('x' * 500, media_type='application/octet-stream')
+
+    return TestClient(app)
+
+
+def test_vary_en_toda_respuesta_comprimible():
+    client = _client()
+    sin_encoding = client.get('/grande', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in sin_encoding.headers
+    assert sin_encoding.headers['vary'] == 'Accept-Encoding'
+    assert sin_encoding.headers['etag'] == ETAG
+
+    chica = client.get('/chica', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in chica.headers
+    assert chica.headers['vary'] == 'Accept-Encoding'
+
+    assert 'vary' not in client.get('/binario', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_etag_debil_al_comprimir():
+    client = _client()
+    comprimida = client.get('/grande', headers={'Accept-Encoding': 'gzip'})
+    assert comprimida.headers['content-encoding'] == 'gzip'
+    assert comprimida.headers['vary'] == 'Accept-Encoding'
+    assert comprimida.headers['etag'] == f'W/{ETAG}'
+    assert comprimida.json()['filas'][-1] == 199
+
+    no_modificada = client.get('/grande', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'W/{ETAG}'})
+    assert no_modificada.status_code == 304
+    assert no_modificada.headers['etag'] == f'W/{ETAG}'
+    assert no_modificada.headers['vary'] == 'Accept-Encoding'
+
+
+def test_serializa_dataclasses_y_rechaza_otros_objetos():
+    periodo = Periodo(id='p1', nombre='2026', tipo='año', fecha_inicio=date(2026, 1, 1), fecha_fin=date(2026, 12, 31), year=2026)
+    assert orjson.loads(ORJSONResponse({'periodo': periodo}).body)['periodo']['nombre'] == '2026'
+
+    class Instancia:
+        def __init__(self):
+            self._sa_instance_state = object()
+            self.nombre = 'x'
+
+    with pytest.raises(TypeError):
+        ORJSONResponse({'fila': Instancia()})
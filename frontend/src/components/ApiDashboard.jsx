@@ -11,7 +11,7 @@ export default function ApiDashboard() {
   const [error, setError] = useState('')
   const [resultado, setResultado] = useState(null)
 
-  async function cargarIndicadores() {
+  async function cargarIndicadores(refrescar = false) {
     setLoading(true)
     setError('')
 
@@ -20,6 +20,7 @@ export default function ApiDashboard() {
         year: Number(year),
         cookie: cookie || null,
         authorization: authorization || null,
+        refrescar,
       })
       setResultado(data)
     } catch (e) {
@@ -50,9 +51,20 @@ export default function ApiDashboard() {
             <input value={authorization} onChange={(e) => setAuthorization(e.target.value)} placeholder='Bearer ... (opcional)' style={styles.input} />
           </label>
         </div>
-        <button onClick={cargarIndicadores} disabled={loading} style={styles.button}>
-          {loading ? 'Consultando...' : 'Cargar indicadores desde API'}
-        </button>
+        <div style={styles.actions}>
+          <button onClick={() => cargarIndicadores(false)} disabled={loading} style={styles.button}>
+            {loading ? 'Consultando...' : 'Cargar indicadores desde API'}
+          </button>
+          <button onClick={() => cargarIndicadores(true)} disabled={loading} style={styles.secondaryButton}>
+            Forzar actualización desde LCR
+          </button>
+        </div>
+        {resultado?.snapshot?.actualizado_en && (
+          <p style={styles.snapshotInfo}>
+            Datos al {new Date(resultado.snapshot.actualizado_en).toLocaleString()}
+            {resultado.snapshot.refrescando ? ' · actualizando en segundo plano…' : ''}
+          </p>
+        )}
       </div>
 
       {error && <div style={styles.error}>{error}</div>}
@@ -116,7 +128,10 @@ const styles = {
   formGrid: { display: 'grid', gridTemplateColumns: '1fr 2fr 2fr', gap: 12, marginBottom: 12 },
   field: { display: 'flex', flexDirection: 'column', gap: 6, fontWeight: 600, fontSize: 14 },
   input: { padding: '8px 10px', borderRadius: 8, border: '1px solid #d0d7de', fontSize: 14 },
+  actions: { display: 'flex', gap: 8, flexWrap: 'wrap' },
   button: { padding: '10px 16px', borderRadius: 8, border: 'none', background: '#2563eb', color: '#fff', cursor: 'pointer', fontWeight: 600 },
+  secondaryButton: { padding: '10px 16px', borderRadius: 8, border: '1px solid #2563eb', background: '#fff', color: '#2563eb', cursor: 'pointer', fontWeight: 600 },
+  snapshotInfo: { margin: '10px 0 0', color: '#555', fontSize: 13 },
   error: { marginTop: 12, background: '#fee2e2', color: '#991b1b', padding: 12, borderRadius: 8 },
   grid: { marginTop: 18, display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(320px, 1fr))', gap: 16 },
   tableCard: { marginTop: 20, background: '#fff', borderRadius: 12, padding: 16, boxShadow: '0 1px 4px rgba(0,0,0,0.08)' },
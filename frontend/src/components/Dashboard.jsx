@@ -3,6 +3,9 @@ import { useEffect, useMemo, useRef, useState } from 'react'
 import { Bar, BarChart, CartesianGrid, Legend, Line, LineChart, ResponsiveContainer, Tooltip, XAxis, YAxis } from 'recharts'
 import API_BASE from '../config'
 import KPICard from './KPICard'
+import DesgloseRecomendacion from './DesgloseRecomendacion'
+import PersonasRecomendacion from './PersonasRecomendacion'
+import ProyeccionMisioneros from './ProyeccionMisioneros'
 import { getMinisteringSummary, MINISTERING_API_PATH, MINISTERING_STORAGE_KEY, parseMinisteringText } from '../utils/ministering'
 
 const KPI_RESUMEN_STORAGE_KEY = 'dashboard_kpis_resumen_cache'
@@ -405,21 +408,12 @@ export default function Dashboard() {
                     )
                   })}
                 </div>
+                <DesgloseRecomendacion path="/api/jovenes/kpi/desglose" />
                 <strong>Con recomendación activa ({(kpiJovenes.desglose?.activa ?? 0) + (kpiJovenes.desglose?.vence_pronto ?? 0)}):</strong>
-                <ul style={{margin:'8px 0 16px 0'}}>
-                  {[...(kpiJovenes.personas?.activa ?? []), ...(kpiJovenes.personas?.vence_pronto ?? [])].length > 0
-                    ? [...(kpiJovenes.personas?.activa ?? []), ...(kpiJovenes.personas?.vence_pronto ?? [])].map((p, i) => (
-                        <li key={i}>{p.nombre} <span style={{color:'#666',fontSize:12}}>{p.unidad ? `(${p.unidad})` : ''}{p.vencimiento ? ` · vence ${p.vencimiento}` : ''}</span></li>
-                      ))
-                    : <li style={{color:'#999'}}>Ninguno</li>}
-                </ul>
+                <PersonasRecomendacion path="/api/jovenes/kpi/personas" estados={['activa', 'vence_pronto']} showVencimiento emptyText="Ninguno" />
                 {(kpiJovenes.desglose?.vencida ?? 0) > 0 && (<>
                   <strong>Vencidas ({kpiJovenes.desglose.vencida}):</strong>
-                  <ul style={{margin:'8px 0 16px 0'}}>
-                    {(kpiJovenes.personas?.vencida ?? []).map((p, i) => (
-                      <li key={i} style={{color:'#ef4444'}}>{p.nombre} <span style={{fontSize:12}}>{p.unidad ? `(${p.unidad})` : ''}</span></li>
-                    ))}
-                  </ul>
+                  <PersonasRecomendacion path="/api/jovenes/kpi/personas" estados={['vencida']} itemColor="#ef4444" />
                 </>)}
                 <button onClick={() => setDetalleJovenesOpen(false)} style={{marginTop:8,padding:'4px 12px',borderRadius:6,border:'1px solid #ddd',background:'#fff',cursor:'pointer'}}>Cerrar</button>
               </div>
@@ -463,21 +457,12 @@ export default function Dashboard() {
                     )
                   })}
                 </div>
+                <DesgloseRecomendacion path="/api/adultos/kpi/desglose" />
                 <strong>Con recomendación activa ({(kpiAdultos.desglose?.activa ?? 0) + (kpiAdultos.desglose?.vence_pronto ?? 0)}):</strong>
-                <ul style={{margin:'8px 0 16px 0'}}>
-                  {[...(kpiAdultos.personas?.activa ?? []), ...(kpiAdultos.personas?.vence_pronto ?? [])].length > 0
-                    ? [...(kpiAdultos.personas?.activa ?? []), ...(kpiAdultos.personas?.vence_pronto ?? [])].map((p, i) => (
-                        <li key={i}>{p.nombre} <span style={{color:'#666',fontSize:12}}>{p.unidad ? `(${p.unidad})` : ''}{p.vencimiento ? ` · vence ${p.vencimiento}` : ''}</span></li>
-                      ))
-                    : <li style={{color:'#999'}}>Ninguno</li>}
-                </ul>
+                <PersonasRecomendacion path="/api/adultos/kpi/personas" estados={['activa', 'vence_pronto']} showVencimiento emptyText="Ninguno" />
                 {(kpiAdultos.desglose?.vencida ?? 0) > 0 && (<>
                   <strong>Vencidas ({kpiAdultos.desglose.vencida}):</strong>
-                  <ul style={{margin:'8px 0 16px 0'}}>
-                    {(kpiAdultos.personas?.vencida ?? []).map((p, i) => (
-                      <li key={i} style={{color:'#ef4444'}}>{p.nombre} <span style={{fontSize:12}}>{p.unidad ? `(${p.unidad})` : ''}</span></li>
-                    ))}
-                  </ul>
+                  <PersonasRecomendacion path="/api/adultos/kpi/personas" estados={['vencida']} itemColor="#ef4444" />
                 </>)}
                 <button onClick={() => setDetalleAdultosOpen(false)} style={{marginTop:8,padding:'4px 12px',borderRadius:6,border:'1px solid #ddd',background:'#fff',cursor:'pointer'}}>Cerrar</button>
               </div>
@@ -505,6 +490,7 @@ export default function Dashboard() {
             />
             {detalleMisionerosOpen && (
               <div style={{background:'#f9fafb',border:'1px solid #ddd',borderRadius:8,padding:16,marginTop:8}}>
+                <ProyeccionMisioneros />
                 {/* Misioneros en el Campo */}
                 {(kpiMisioneros.personas?.length > 0) && (
                   <>
@@ -0,0 +1,62 @@
+import axios from 'axios'
+import { useEffect, useState } from 'react'
+import { Bar, BarChart, CartesianGrid, Legend, ResponsiveContainer, Tooltip, XAxis, YAxis } from 'recharts'
+import API_BASE from '../config'
+
+const VISTAS = [
+  { key: 'por_unidad', label: 'Por unidad', campo: 'unidad' },
+  { key: 'por_edad', label: 'Por edad', campo: 'banda' },
+  { key: 'por_sexo', label: 'Por sexo', campo: 'sexo' },
+]
+
+// Barras apiladas (con recomendación / resto) por unidad, banda de edad o sexo.
+// Solo conteos: usa /kpi/desglose, sin bajar las listas de personas.
+export default function DesgloseRecomendacion({ path }) {
+  const [data, setData] = useState(null)
+  const [vista, setVista] = useState('por_unidad')
+
+  useEffect(() => {
+    let cancelled = false
+    axios.get(`${API_BASE}${path}`)
+      .then(({ data }) => { if (!cancelled) setData(data) })
+      .catch(() => { if (!cancelled) setData(null) })
+    return () => { cancelled = true }
+  }, [path])
+
+  if (!data) return null
+
+  const { campo } = VISTAS.find(v => v.key === vista)
+  const filas = (data[vista] ?? []).map(g => ({
+    nombre: g[campo] || 'Sin dato',
+    real: g.real,
+    resto: g.potencial - g.real,
+    porcentaje: g.porcentaje,
+  }))
+
+  return (
+    <div style={{marginBottom:16}}>
+      <div style={{display:'flex',gap:6,marginBottom:8}}>
+        {VISTAS.map(v => (
+          <button
+            key={v.key}
+            onClick={() => setVista(v.key)}
+            style={{padding:'2px 10px',borderRadius:6,border:'1px solid #ddd',cursor:'pointer',fontSize:12,background:vista === v.key ? '#1e3a5f' : '#fff',color:vista === v.key ? '#fff' : '#374151'}}
+          >
+            {v.label}
+          </button>
+        ))}
+      </div>
+      <ResponsiveContainer width="100%" height={Math.max(160, filas.length * 28 + 60)}>
+        <BarChart data={filas} layout="vertical" margin={{ left: 24 }}>
+          <CartesianGrid strokeDasharray="3 3" />
+          <XAxis type="number" allowDecimals={false} />
+          <YAxis type="category" dataKey="nombre" width={140} tick={{ fontSize: 12 }} />
+          <Tooltip formatter={(value, name, { payload }) => name === 'Con recomendación' ? [`${value} (${payload.porcentaje}%)`, name] : [value, name]} />
+          <Legend />
+          <Bar dataKey="real" name="Con recomendación" stackId="a" fill="#10b981" />
+          <Bar dataKey="resto" name="Sin recomendación activa" stackId="a" fill="#e5e7eb" />
+        </BarChart>
+      </ResponsiveContainer>
+    </div>
+  )
+}
@@ -1,6 +1,24 @@
 import { useEffect, useMemo, useRef, useState } from 'react'
 import API_BASE from '../config'
 
+const PAGE_SIZE = 30
+const PREVIEW_CHARS = 160
+
+// El listado solo trae un recorte del resumen; el acta completa se pide a /api/meetings/{id}
+function toListItem(record) {
+  const summary = record.summary || ''
+  return {
+    id: record.id,
+    category: record.category,
+    date: record.date,
+    participants: record.participants || '',
+    summary_preview: summary.slice(0, PREVIEW_CHARS),
+    summary_truncated: summary.length > PREVIEW_CHARS,
+    created_at: record.created_at,
+    updated_at: record.updated_at
+  }
+}
+
 function summarizeText(text, participants = '') {
   const normalized = (text || '').trim().replace(/\s+/g, ' ')
   if (!normalized) return ''
@@ -15,6 +33,9 @@ export default function MeetingMinutes({ canEdit, category = 'consejo' }) {
   const [records, setRecords] = useState([])
   const [recordsLoading, setRecordsLoading] = useState(true)
   const [recordsError, setRecordsError] = useState('')
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [details, setDetails] = useState({})
   const [saving, setSaving] = useState(false)
   const [form, setForm] = useState({ date: '', participants: '', transcript: '', summary: '' })
   const [editingId, setEditingId] = useState(null)
@@ -108,9 +129,11 @@ export default function MeetingMinutes({ canEdit, category = 'consejo' }) {
     fetch(url, { method, headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(payload) })
       .then((r) => { if (!r.ok) throw new Error('Error al guardar'); return r.json() })
       .then((saved) => {
+        const item = toListItem(saved)
         setRecords((prev) =>
-          editingId ? prev.map((r) => (r.id === saved.id ? saved : r)) : [saved, ...prev]
+          editingId ? prev.map((r) => (r.id === saved.id ? item : r)) : [item, ...prev]
         )
+        setDetails((prev) => ({ ...prev, [saved.id]: saved }))
         setForm({ date: '', participants: '', transcript: '', summary: '' })
         setEditingId(null)
         setShowForm(false)
@@ -119,18 +142,54 @@ export default function MeetingMinutes({ canEdit, category = 'consejo' }) {
       .finally(() => setSaving(false))
   }
 
+  function fetchDetail(recordId) {
+    if (details[recordId]) return Promise.resolve(details[recordId])
+    return fetch(`${API_BASE}/api/meetings/${recordId}`)
+      .then((r) => { if (!r.ok) throw new Error('No se pudo cargar el acta.'); return r.json() })
+      .then((detail) => {
+        setDetails((prev) => ({ ...prev, [recordId]: detail }))
+        return detail
+      })
+  }
+
+  function handleExpand(recordId) {
+    if (expandedId === recordId) {
+      setExpandedId(null)
+      return
+    }
+    setExpandedId(recordId)
+    fetchDetail(recordId).catch((err) => setAiError(err.message))
+  }
+
   function handleEdit(record) {
-    setForm({
-      date: record.date || '',
-      participants: record.participants || '',
-      transcript: record.transcript || '',
-      summary: record.summary || ''
-    })
-    setEditingId(record.id)
-    setShowForm(true)
-    setExpandedId(null)
-    setRecognitionError('')
-    window.scrollTo({ top: 0, behavior: 'smooth' })
+    fetchDetail(record.id)
+      .then((detail) => {
+        setForm({
+          date: detail.date || '',
+          participants: detail.participants || '',
+          transcript: detail.transcript || '',
+          summary: detail.summary || ''
+        })
+        setEditingId(record.id)
+        setShowForm(true)
+        setExpandedId(null)
+        setRecognitionError('')
+        window.scrollTo({ top: 0, behavior: 'smooth' })
+      })
+      .catch((err) => setAiError(err.message))
+  }
+
+  function loadMore() {
+    if (!nextCursor || loadingMore) return
+    setLoadingMore(true)
+    fetch(`${API_BASE}/api/meetings?category=${category}&limit=${PAGE_SIZE}&cursor=${encodeURIComponent(nextCursor)}`)
+      .then((r) => { if (!r.ok) throw new Error('No se pudieron cargar más actas.'); return r.json() })
+      .then((data) => {
+        setRecords((prev) => [...prev, ...data.items.filter((item) => !prev.some((r) => r.id === item.id))])
+        setNextCursor(data.next_cursor)
+      })
+      .catch((err) => setRecordsError(err.message))
+      .finally(() => setLoadingMore(false))
   }
 
   function handleDelete(recordId) {
@@ -139,6 +198,7 @@ export default function MeetingMinutes({ canEdit, category = 'consejo' }) {
       .then((r) => { if (!r.ok) throw new Error('Error al eliminar') })
       .then(() => {
         setRecords((prev) => prev.filter((r) => r.id !== recordId))
+        setDetails((prev) => { const next = { ...prev }; delete next[recordId]; return next })
         if (editingId === recordId) {
           setEditingId(null)
           setForm({ date: '', participants: '', transcript: '', summary: '' })
@@ -302,9 +362,15 @@ export default function MeetingMinutes({ canEdit, category = 'consejo' }) {
     let active = true
     setRecordsLoading(true)
     setRecordsError('')
-    fetch(`${API_BASE}/api/meetings?category=${category}`)
+    setNextCursor(null)
+    setDetails({})
+    fetch(`${API_BASE}/api/meetings?category=${category}&limit=${PAGE_SIZE}`)
       .then((r) => { if (!r.ok) throw new Error('No se pudieron cargar las actas.'); return r.json() })
-      .then((data) => { if (active) setRecords(data) })
+      .then((data) => {
+        if (!active) return
+        setRecords(data.items)
+        setNextCursor(data.next_cursor)
+      })
       .catch((err) => { if (active) setRecordsError(err.message) })
       .finally(() => { if (active) setRecordsLoading(false) })
     return () => { active = false }
@@ -610,13 +676,14 @@ export default function MeetingMinutes({ canEdit, category = 'consejo' }) {
 
           {sortedRecords.map((record) => {
             const isExpanded = expandedId === record.id
-            const summaryPreview = (record.summary || '').replace(/\n/g, ' ').slice(0, isMobile ? 70 : 120)
-            const hasMore = (record.summary || '').length > (isMobile ? 70 : 120)
+            const summaryPreview = (record.summary_preview || '').replace(/\n/g, ' ').slice(0, isMobile ? 70 : 120)
+            const hasMore = record.summary_truncated || (record.summary_preview || '').length > (isMobile ? 70 : 120)
+            const detail = details[record.id]
             return (
               <div key={record.id} style={{ background: '#fff', borderRadius: 10, border: `1px solid ${isExpanded ? '#a5b4fc' : '#e2e8f0'}`, overflow: 'hidden', boxShadow: isExpanded ? '0 2px 8px rgba(99,102,241,0.08)' : 'none' }}>
                 {/* Fila principal */}
                 <div
-                  onClick={() => setExpandedId(isExpanded ? null : record.id)}
+                  onClick={() => handleExpand(record.id)}
                   style={{ display: 'grid', gridTemplateColumns: isMobile ? '1fr auto' : '110px 1fr 90px', gap: isMobile ? 8 : 12, padding: isMobile ? '10px 12px' : '11px 14px', cursor: 'pointer', alignItems: 'center', background: isExpanded ? '#eef2ff' : '#fff' }}
                 >
                   {isMobile ? (
@@ -672,12 +739,23 @@ export default function MeetingMinutes({ canEdit, category = 'consejo' }) {
                     <div style={{ marginBottom: 8 }}>
                       <span style={{ fontSize: 11, fontWeight: 700, color: '#6366f1', textTransform: 'uppercase', letterSpacing: '0.05em' }}>📝 Resumen</span>
                     </div>
-                    <pre style={{ margin: 0, fontFamily: 'inherit', fontSize: isMobile ? 12 : 13, color: '#374151', whiteSpace: 'pre-wrap', lineHeight: 1.7 }}>{record.summary || 'Sin resumen.'}</pre>
+                    <pre style={{ margin: 0, fontFamily: 'inherit', fontSize: isMobile ? 12 : 13, color: '#374151', whiteSpace: 'pre-wrap', lineHeight: 1.7 }}>{detail ? (detail.summary || 'Sin resumen.') : 'Cargando…'}</pre>
                   </div>
                 ) : null}
               </div>
             )
           })}
+
+          {nextCursor ? (
+            <button
+              type="button"
+              onClick={loadMore}
+              disabled={loadingMore}
+              style={{ marginTop: 6, padding: '9px 14px', background: '#fff', border: '1px solid #c7d2fe', borderRadius: 8, color: '#4f46e5', fontSize: 13, fontWeight: 600, cursor: loadingMore ? 'wait' : 'pointer' }}
+            >
+              {loadingMore ? 'Cargando…' : 'Cargar más actas'}
+            </button>
+          ) : null}
         </div>
       )}
     </main>
@@ -0,0 +1,56 @@
+import axios from 'axios'
+import { useEffect, useState } from 'react'
+import API_BASE from '../config'
+
+const PAGE_SIZE = 50
+
+// Lista paginada de personas de uno o más estados del KPI de recomendación.
+// Se monta solo al abrir el detalle; pide la primera página y "Ver más" trae las siguientes.
+export default function PersonasRecomendacion({ path, estados, itemColor, showVencimiento = false, emptyText = null }) {
+  const [personas, setPersonas] = useState([])
+  const [total, setTotal] = useState(null)
+  const [loading, setLoading] = useState(false)
+  const estadosKey = estados.join(',')
+
+  async function fetchPage(offset) {
+    const params = new URLSearchParams()
+    estados.forEach(e => params.append('estado', e))
+    params.append('offset', offset)
+    params.append('limit', PAGE_SIZE)
+    setLoading(true)
+    try {
+      const { data } = await axios.get(`${API_BASE}${path}?${params.toString()}`)
+      setPersonas(prev => offset === 0 ? data.personas : [...prev, ...data.personas])
+      setTotal(data.total)
+    } catch (e) {
+      if (offset === 0) setPersonas([])
+    } finally {
+      setLoading(false)
+    }
+  }
+
+  useEffect(() => {
+    fetchPage(0)
+  }, [path, estadosKey])
+
+  if (total === 0 && !emptyText) return null
+
+  return (
+    <ul style={{margin:'8px 0 16px 0'}}>
+      {personas.length > 0
+        ? personas.map((p, i) => (
+            <li key={i} style={itemColor ? {color:itemColor} : undefined}>
+              {p.nombre} <span style={{color:itemColor ? undefined : '#666',fontSize:12}}>{p.unidad ? `(${p.unidad})` : ''}{showVencimiento && p.vencimiento ? ` · vence ${p.vencimiento}` : ''}</span>
+            </li>
+          ))
+        : <li style={{color:'#999'}}>{loading ? 'Cargando…' : emptyText}</li>}
+      {total != null && personas.length < total && (
+        <li style={{listStyle:'none',marginTop:6}}>
+          <button onClick={() => fetchPage(personas.length)} disabled={loading} style={{padding:'2px 10px',borderRadius:6,border:'1px solid #ddd',background:'#fff',cursor:'pointer',fontSize:12}}>
+            {loading ? 'Cargando…' : `Ver más (${total - personas.length})`}
+          </button>
+        </li>
+      )}
+    </ul>
+  )
+}
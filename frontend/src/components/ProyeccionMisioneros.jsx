@@ -0,0 +1,40 @@
+import axios from 'axios'
+import { useEffect, useState } from 'react'
+import { CartesianGrid, Legend, Line, LineChart, ReferenceLine, ResponsiveContainer, Tooltip, XAxis, YAxis } from 'recharts'
+import API_BASE from '../config'
+
+// Misioneros en el campo por mes (próximos 24) según las fechas de término, contra la meta.
+export default function ProyeccionMisioneros() {
+  const [data, setData] = useState(null)
+
+  useEffect(() => {
+    let cancelled = false
+    axios.get(`${API_BASE}/api/misioneros/proyeccion`)
+      .then(({ data }) => { if (!cancelled) setData(data) })
+      .catch(() => { if (!cancelled) setData(null) })
+    return () => { cancelled = true }
+  }, [])
+
+  if (!data || !data.meses?.length) return null
+
+  return (
+    <div style={{marginBottom:16}}>
+      <strong style={{fontSize:13,color:'#1e3a5f'}}>Proyección (próximos {data.meses.length} meses)</strong>
+      {data.sin_fecha_termino > 0 && (
+        <span style={{fontSize:12,color:'#666',marginLeft:8}}>{data.sin_fecha_termino} sin fecha de término (contados solo en el mes actual)</span>
+      )}
+      <ResponsiveContainer width="100%" height={220}>
+        <LineChart data={data.meses} margin={{ top: 8, right: 16 }}>
+          <CartesianGrid strokeDasharray="3 3" />
+          <XAxis dataKey="mes" tick={{ fontSize: 11 }} />
+          <YAxis allowDecimals={false} />
+          <Tooltip />
+          <Legend />
+          <ReferenceLine y={data.meta} stroke="#ef4444" strokeDasharray="4 4" label={{ value: `Meta ${data.meta}`, fontSize: 11, fill: '#ef4444' }} />
+          <Line type="stepAfter" dataKey="campo" name="En el campo" stroke="#1e3a5f" dot={false} />
+          <Line type="stepAfter" dataKey="servicio" name="Servicio a la Iglesia" stroke="#6b21a8" dot={false} />
+        </LineChart>
+      </ResponsiveContainer>
+    </div>
+  )
+}
@@ -1,6 +1,9 @@
 import React from 'react'
 import { createRoot } from 'react-dom/client'
 import App from './App'
+import { installHttpCache } from './utils/httpCache'
+
+installHttpCache()
 
 createRoot(document.getElementById('root')).render(
   <React.StrictMode>
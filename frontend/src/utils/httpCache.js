@@ -0,0 +1,60 @@
+import axios from 'axios'
+
+// Caché de GET por ETag: el backend responde 304 sin recalcular si el dato no cambió.
+// Se guarda en memoria por URL completa (con query), solo mientras la pestaña está abierta.
+const MAX_ENTRIES = 100
+const cache = new Map()
+
+function cacheKey(config) {
+  return axios.getUri(config)
+}
+
+function remember(key, etag, data) {
+  cache.delete(key)
+  cache.set(key, { etag, data })
+  if (cache.size > MAX_ENTRIES) {
+    cache.delete(cache.keys().next().value)
+  }
+}
+
+export function clearHttpCache() {
+  cache.clear()
+}
+
+export function installHttpCache(instance = axios) {
+  instance.interceptors.request.use((config) => {
+    if ((config.method || 'get').toLowerCase() !== 'get') return config
+
+    const entry = cache.get(cacheKey(config))
+    if (entry) {
+      config.headers = config.headers || {}
+      config.headers['If-None-Match'] = entry.etag
+      const validate = config.validateStatus
+      config.validateStatus = (status) => status === 304 || (validate ? validate(status) : status >= 200 && status < 300)
+    }
+    return config
+  })
+
+  instance.interceptors.response.use((response) => {
+    const { config } = response
+    if ((config.method || 'get').toLowerCase() !== 'get') return response
+
+    const key = cacheKey(config)
+    if (response.status === 304) {
+      const entry = cache.get(key)
+      if (entry) {
+        return { ...response, status: 200, data: entry.data, fromCache: true }
+      }
+      // La entrada se descartó mientras viajaba el pedido: pedir de nuevo sin condición.
+      const headers = { ...config.headers }
+      delete headers['If-None-Match']
+      return instance.request({ ...config, headers, validateStatus: undefined })
+    }
+
+    const etag = response.headers?.etag
+    if (etag) {
+      remember(key, etag, response.data)
+    }
+    return response
+  })
+}